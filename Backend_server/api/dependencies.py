@@ -1,12 +1,14 @@
-from pathlib import Path
-import pandas as pd
+from services.market_data import market_store
 
-def load_cached_data():
-    """Safely loads your existing cache without modifications"""
-    data_path = Path(__file__).parent.parent/"quantum_optimizer"/"data"
+def load_cached_data(tickers=None):
+    """
+    Returns views over the in-memory market-data store (no CSV re-parse);
+    `tickers` projects the price columns.
+    """
+    snapshot = market_store.snapshot()
     return {
-        "prices": pd.read_csv(data_path/"last6m.csv", index_col=0, parse_dates=True),
-        "fundamentals": pd.read_csv(data_path/"fundamentals.csv", index_col=0)
+        "prices": snapshot.price_frame(tickers),
+        "fundamentals": snapshot.fundamentals_frame()
     }
 
 VALID_TICKERS = {"TCS.NS", "SIEMENS.NS", "NHPC.NS", "IDEA.NS"}
\ No newline at end of file
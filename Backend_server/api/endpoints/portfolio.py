@@ -17,7 +17,7 @@ async def optimize_portfolio(tickers: List[str]):
         )
 
     # 2. Load your exact cached data
-    data = load_cached_data()
+    data = load_cached_data(tickers)
     
     # 3. Prepare inputs for your existing run_vqe()
     price_matrix = data["prices"][tickers].values.astype(np.float64)
@@ -29,7 +29,7 @@ async def optimize_portfolio(tickers: List[str]):
         return {
             "success": True,
             "weights": {t: float(w) for t, w in zip(tickers, weights)},
-            "cache_used": ["last6m.csv", "fundamentals.csv"]
+            "cache_used": ["prices", "fundamentals.csv"]
         }
     except Exception as e:
         raise HTTPException(
@@ -4,7 +4,8 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List
 import logging
-from pathlib import Path
+
+from services.market_data import market_store
 
 
 
@@ -29,32 +30,13 @@ async def optimize(request: PortfolioRequest):
     try:
         logger.info(f"Starting optimization for {request.tickers}")
         
-        # 1. Load data
-        data_path = Path(__file__).parent.parent/"quantum_optimizer"/"data"
-        prices = pd.read_csv(
-            data_path/"last6m.csv",
-            index_col=0,
-            parse_dates=True
-        )[request.tickers]
-        
-        fundamentals = pd.read_csv(
-            data_path/"fundamentals.csv",
-            index_col="Ticker"
-        ).loc[request.tickers]
+        # 1. Load data from the in-memory store
+        snapshot = market_store.snapshot()
 
         # 2. Clean and prepare data
-        returns = prices.pct_change().dropna()
-        mu = returns.mean().values.astype(np.float64)
-        cov = returns.cov().values.astype(np.float64)
-        
-        clean_fundamentals = {
-            t: {
-                'PE': 1.0 if np.isnan(fundamentals.at[t, 'PE']) else float(fundamentals.at[t, 'PE']),
-                'PB': 1.0 if np.isnan(fundamentals.at[t, 'PB']) else float(fundamentals.at[t, 'PB']),
-                'ROE': 0.1 if np.isnan(fundamentals.at[t, 'ROE']) else float(fundamentals.at[t, 'ROE'])
-            }
-            for t in request.tickers
-        }
+        mu, cov = snapshot.moments(request.tickers)
+
+        clean_fundamentals = snapshot.fundamentals_for(request.tickers)
 
         # 3. Run VQE
         from quantum_optimizer.processing.vqe_portfolio import run_vqe
@@ -1,20 +1,54 @@
-from fastapi import FastAPI, Query, HTTPException, APIRouter
-from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Query, HTTPException, APIRouter, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from http import HTTPStatus
-import pandas as pd
-import math
-from pydantic import BaseModel,Field
-from typing import List, Dict, Any
-import numpy as np
-import logging
-from pathlib import Path
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, Literal, Optional
+from contextlib import asynccontextmanager
+import os
+
+# ---------- Init core app ----------
+from quantum_optimizer.preprocessing.logger import metrics, span
+from services.config import settings
+from services.catalog import catalog_store
+from services.market_data import market_store
+from services.refresher import data_refresher
+from services.startup import Startup
+from services.tracing import configure_timing_log, timing_middleware
+from services.stock_index import (
+    EMPTY_BODY, InvalidCursor, UnknownFields, decode_cursor, encode_cursor, etag_for, etag_matches,
+)
+from services.result_cache import optimization_cache, optimization_key
+from services.optimization import (
+    build_payload, format_result, frontier_body, optimize_cached, optimize_batch, warm_start_store
+)
+from services.jobs import job_manager
+from services.executor import (
+    optimizer_executor, QueueFullError, JobTimeoutError, JobCancelledError
+)
+
 
-# ---------- Import tickers and init core app ----------
-from tickers import tickers
+# ✅ Heavy startup work, run per STARTUP_MODE (before serving, in the background, or never):
+# tickers + fundamentals -> /stock, /stocks bodies; price history + fundamentals -> μ/Σ;
+# optimizer workers spawned with qiskit imported and a tiny VQE run
+startup = Startup(settings.startup_mode, [
+    ("catalog", catalog_store.load),
+    ("market_data", market_store.load),
+    ("optimizer_workers", optimizer_executor.start),
+])
 
-app = FastAPI(title="Quantum Optimizer", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup.begin()
+    # Re-fetch prices and swap in new snapshots every DATA_REFRESH_INTERVAL seconds
+    data_refresher.start()
+    yield
+    await data_refresher.stop()
+    optimizer_executor.shutdown()
+
+
+app = FastAPI(title="Quantum Optimizer", version="1.0.0", lifespan=lifespan)
 
 # ✅ CORS config
 app.add_middleware(
@@ -23,18 +57,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "Server-Timing"],
 )
 
-# ✅ Load tickers and stock data
-data, df, tickers = tickers()
-
-
-# ---------- Helper Functions ----------
-def safe_value(val):
-    """Handle NaN/inf values."""
-    if isinstance(val, float) and (math.isnan(val) or math.isinf(val)):
-        return None
-    return val
+# ✅ Stage timings: Server-Timing header + a JSON log line per request; ?profile=1 for admins
+configure_timing_log(settings.timing_log)
+app.middleware("http")(timing_middleware)
 
 
 # ---------- Stock Routes (Original main.py) ----------
@@ -44,44 +72,82 @@ def home():
 
 
 @app.get("/stocks", status_code=HTTPStatus.OK)
-def get_stocks(page: int = Query(1, ge=1), limit: int = Query(50, ge=1, le=500)):
-    start = (page - 1) * limit
-    end = start + limit
-    if start >= len(df):
+async def get_stocks(
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces page"),
+    q: Optional[str] = Query(None, min_length=1, max_length=64, description="symbol/name substring"),
+    if_none_match: Optional[str] = Header(None),
+):
+    try:
+        start = decode_cursor(cursor) if cursor else (page - 1) * limit
+    except InvalidCursor as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    with metrics.timer("serialization_seconds", kind="stocks_page"):
+        body, total = catalog_store.current().stock_list.page(start, limit, q)
+    if start >= total and (start > 0 or not q):
         raise HTTPException(status_code=404, detail="No more stocks available.")
 
-    result = [
-        {"ticker": safe_value(row["Symbol"]), "name": safe_value(row["Name"])}
-        for _, row in df.iloc[start:end].iterrows()
-    ]
-    return JSONResponse(content=result)
+    headers = {
+        "ETag": etag_for(body),
+        "Cache-Control": f"public, max-age={settings.stock_list_max_age}",
+        "X-Total-Count": str(total),
+    }
+    if start + limit < total:
+        headers["X-Next-Cursor"] = encode_cursor(start + limit)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 #Fundamentals.csv file Data-------------------------
 
-@app.get("/stock/{ticker}", status_code=HTTPStatus.OK)
-def get_one_stock(ticker: str):
+MAX_BULK_TICKERS = 1000
+
+
+class FundamentalsRequest(BaseModel):
+    tickers: List[str] = Field(..., min_items=1, max_items=MAX_BULK_TICKERS)
+    fields: Optional[List[str]] = None
+
+
+def _bulk_fundamentals(tickers: List[str], fields: Optional[List[str]]) -> Response:
     try:
-        match = data.loc[data["Ticker"] == ticker]
+        with metrics.timer("serialization_seconds", kind="fundamentals"):
+            body = catalog_store.current().fundamentals_columns.select(tickers, fields)
+    except UnknownFields as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+    return Response(body, media_type="application/json")
 
-        if match.empty:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail=f"No data found for ticker '{ticker}'"
-            )
 
-        row = match.iloc[0].to_dict()
+@app.get("/stocks/fundamentals", status_code=HTTPStatus.OK)
+async def get_fundamentals(
+    tickers: str = Query(..., description="comma-separated tickers"),
+    fields: Optional[str] = Query(None, description="comma-separated fundamentals.csv columns"),
+):
+    """Fundamentals of many tickers in one columnar response (values as in /stock/{ticker})."""
+    names = [t for t in tickers.split(",") if t.strip()]
+    if not names or len(names) > MAX_BULK_TICKERS:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                            detail=f"Pass between 1 and {MAX_BULK_TICKERS} tickers")
+    return _bulk_fundamentals(names, [f.strip() for f in fields.split(",") if f.strip()] if fields else None)
 
-        clean_row = {}
-        for key, value in row.items():
-            if pd.isna(value):
-                clean_row[key] = ""
-            else:
-                clean_row[key] = str(value)
-        
-        return clean_row
 
-    except Exception as e:
-            return{}
+@app.post("/stocks/fundamentals", status_code=HTTPStatus.OK)
+async def post_fundamentals(request: FundamentalsRequest):
+    """POST variant of GET /stocks/fundamentals for lists too long for a URL."""
+    return _bulk_fundamentals(request.tickers, request.fields)
+
+
+@app.get("/stock/{ticker}", status_code=HTTPStatus.OK)
+async def get_one_stock(ticker: str, if_none_match: Optional[str] = Header(None)):
+    # Unknown tickers keep answering 200 {} (the frontend alerts on errors)
+    entry = catalog_store.current().stock_index.get(ticker)
+    if entry is None:
+        return Response(EMPTY_BODY, media_type="application/json")
+    headers = {"ETag": entry.etag}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
 
 # ---------- Quantum Router (Converted fastapi_adapter.py) ----------
 
@@ -91,6 +157,43 @@ class PortfolioRequest(BaseModel):
     tickers: List[str] = Field(..., min_items=2, max_items=4)
     risk_factor: float = Field(0.5, ge=0.1, le=1.0)
     budget: float = Field(1.0, gt=0)
+    # "vqe" (default), classical "exact" / "annealing", or "auto" (by basket size)
+    solver: Literal["vqe", "exact", "annealing", "auto"] = "vqe"
+    # VQE convergence: optimizer, SPSA step calibration, wall-clock budget (seconds)
+    optimizer: Literal["spsa", "cobyla", "l-bfgs-b"] = "spsa"
+    calibrate: bool = False
+    time_budget: Optional[float] = Field(None, gt=0)
+
+    def options(self) -> Dict[str, Any]:
+        """run_vqe options of this request: server defaults, overridden by what was set."""
+        fields = self.dict(exclude={"tickers", "risk_factor", "budget"}, exclude_none=True)
+        return {**settings.run_options(), **fields}
+
+class BatchRequest(BaseModel):
+    items: List[PortfolioRequest] = Field(..., min_items=1, max_items=500)
+
+MAX_FRONTIER_TICKERS = 50
+
+class FrontierRequest(BaseModel):
+    tickers: List[str] = Field(..., min_items=2, max_items=MAX_FRONTIER_TICKERS)
+    points: int = Field(50, ge=2, le=200)
+    # annualized, like the frontier's returns (compile_results' default)
+    risk_free_rate: float = Field(0.05, ge=-1.0, le=1.0)
+    long_only: bool = True
+    # overlay the /quantum/optimize portfolio for these settings (2-4 tickers)
+    vqe: bool = False
+    risk_factor: float = Field(0.5, ge=0.1, le=1.0)
+    budget: float = Field(1.0, gt=0)
+    solver: Literal["vqe", "exact", "annealing", "auto"] = "vqe"
+
+    def overlay(self) -> Optional[Dict[str, Any]]:
+        """optimize_cached arguments of the overlay, validated like POST /quantum/optimize."""
+        if not self.vqe:
+            return None
+        request = PortfolioRequest(tickers=self.tickers, risk_factor=self.risk_factor,
+                                   budget=self.budget, solver=self.solver)
+        return {"risk_factor": request.risk_factor, "budget": request.budget, **request.options()}
+
 
 @quantum_router.get("/")
 def quantum_root():
@@ -100,33 +203,188 @@ def quantum_root():
 @quantum_router.post("/optimize")
 async def optimize(request: PortfolioRequest):
     try:
-        # Load data (replace paths as needed)
-        data_path = Path(__file__).parent/"quantum_optimizer"/"data"
-        prices = pd.read_csv(data_path / "last6m.csv", index_col=0, parse_dates=True)[request.tickers]
-        fundamentals = pd.read_csv(data_path / "fundamentals.csv", index_col="Ticker").loc[request.tickers]
-
-        # Calculate returns and covariance
-        returns = prices.pct_change().dropna()
-        mu = returns.mean().values.astype(np.float64)
-        cov = returns.cov().values.astype(np.float64)
-
-        # Run VQE (import your actual function)
-        from quantum_optimizer.processing.vqe_portfolio import run_vqe
-        weights, _ = run_vqe(mu=mu, cov=cov, fundamentals=fundamentals, budget=request.budget,
-                             risk_factor=request.risk_factor)
-
-        return {
-            "tickers": request.tickers,
-            "weights": {t: float(w) for t, w in zip(request.tickers, weights)},
-            "risk": float(np.sqrt(weights @ cov @ weights.T))
-        }
+        # Cached returns/covariance + fundamentals -> VQE in the process pool;
+        # identical requests against the same data share one optimization
+        with span("load"):
+            snapshot = market_store.snapshot()
+        result = await optimize_cached(snapshot, request.tickers,
+                                       request.risk_factor, request.budget, **request.options())
+        with span("serialize"):
+            return JSONResponse(result)
+    except QueueFullError as e:
+        raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS, detail=str(e),
+                            headers={"Retry-After": "5"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=HTTPStatus.GATEWAY_TIMEOUT, detail=str(e))
+    except JobCancelledError as e:
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
 
+@quantum_router.post("/optimize/batch")
+async def optimize_batch_endpoint(request: BatchRequest):
+    """
+    Optimize many baskets / risk factors in one call. Results stream back as
+    NDJSON, one line per item in completion order, tagged with its `index`.
+    """
+    snapshot = market_store.snapshot()
+    return StreamingResponse(
+        optimize_batch(snapshot, [item.dict(exclude_none=True) for item in request.items],
+                       **settings.run_options()),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _frontier(request: FrontierRequest) -> Response:
+    try:
+        overlay = request.overlay()
+    except ValidationError:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                            detail="The VQE overlay supports 2 to 4 tickers")
+    try:
+        with span("load"):
+            snapshot = market_store.snapshot()
+        body = await frontier_body(snapshot, request.tickers, request.points, request.risk_free_rate,
+                                   request.long_only, overlay)
+        return Response(body, media_type="application/json")
+    except (KeyError, ValueError) as e:
+        # unknown tickers, or no frontier for these prices (e.g. singular Σ with short sales)
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=e.args[0] if e.args else str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS, detail=str(e),
+                            headers={"Retry-After": "5"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=HTTPStatus.GATEWAY_TIMEOUT, detail=str(e))
+    except JobCancelledError as e:
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Frontier failed: {str(e)}")
+
+
+@quantum_router.get("/frontier")
+async def get_frontier(
+    tickers: str = Query(..., description="comma-separated tickers"),
+    points: int = 50,
+    risk_free_rate: float = 0.05,
+    long_only: bool = True,
+    vqe: bool = False,
+    risk_factor: float = 0.5,
+    budget: float = 1.0,
+    solver: str = "vqe",
+):
+    """
+    Mean-variance efficient frontier of a ticker set (classical, annualized):
+    `points` portfolios plus the minimum-variance and maximum-Sharpe ones, and
+    with `vqe=true` the /quantum/optimize portfolio on the same axes.
+    """
+    try:
+        request = FrontierRequest(
+            tickers=[t.strip() for t in tickers.split(",") if t.strip()], points=points,
+            risk_free_rate=risk_free_rate, long_only=long_only, vqe=vqe,
+            risk_factor=risk_factor, budget=budget, solver=solver,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST,
+                            detail=[{"loc": err["loc"], "msg": err["msg"]} for err in e.errors()])
+    return await _frontier(request)
+
+
+@quantum_router.post("/frontier")
+async def post_frontier(request: FrontierRequest):
+    """POST variant of GET /quantum/frontier."""
+    return await _frontier(request)
+
+
+# ---------- Optimization Jobs (submit, then poll or stream) ----------
+
+@quantum_router.post("/jobs", status_code=HTTPStatus.ACCEPTED)
+async def submit_job(request: PortfolioRequest):
+    try:
+        snapshot = market_store.snapshot()
+        key = optimization_key(snapshot.data_version, request.tickers, request.risk_factor,
+                               request.budget, **request.options())
+        cached = await optimization_cache.get(key)
+        if cached is not None:
+            job = job_manager.complete(request.dict(), cached)
+        else:
+            payload = build_payload(snapshot, request.tickers, request.risk_factor,
+                                    request.budget, **request.options())
+            await optimizer_executor.ensure_started()
+            job = job_manager.submit(
+                request.dict(), payload,
+                finalize=lambda out: format_result(request.tickers, out["weights"], payload["cov"], out),
+                on_success=lambda result: optimization_cache.put(key, result),
+            )
+    except QueueFullError as e:
+        raise HTTPException(status_code=HTTPStatus.TOO_MANY_REQUESTS, detail=str(e),
+                            headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
+
+    return JSONResponse(
+        status_code=HTTPStatus.ACCEPTED,
+        content={"job_id": job.id, "status": job.status},
+        headers={"Location": f"/quantum/jobs/{job.id}"},
+    )
+
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"No job '{job_id}'")
+    return job
+
+
+@quantum_router.get("/jobs/{job_id}")
+def get_job(job_id: str, progress: bool = False):
+    return _get_job(job_id).to_dict(include_progress=progress)
+
+
+@quantum_router.get("/jobs/{job_id}/events")
+def stream_job(job_id: str):
+    """Server-sent events: per-evaluation VQE energy, then the final job state."""
+    _get_job(job_id)
+    return StreamingResponse(
+        job_manager.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@quantum_router.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    return {"job_id": job.id, "cancelled": job_manager.cancel(job_id)}
+
+
+@quantum_router.get("/warm-start")
+def warm_start_metrics():
+    """How often VQE started from a stored point, and the evaluations / seconds that saved."""
+    if warm_start_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **warm_start_store.metrics()}
+
+
 @quantum_router.get("/health")
 def health_check():
-    return {"status": "healthy"}
+    # snapshot_age: seconds since the prices/fundamentals in use were loaded
+    # pid / snapshot_source tell the workers of a multi-worker server (serve.py) apart
+    return {"status": "healthy", "pid": os.getpid(), "snapshot_source": settings.snapshot_source,
+            "startup": startup.status(), **data_refresher.status()}
+
+
+@quantum_router.get("/ready")
+def readiness():
+    """200 once the startup steps are done (readiness probe), 503 before."""
+    status = startup.status()
+    return JSONResponse(status, status_code=HTTPStatus.OK if status["ready"] else HTTPStatus.SERVICE_UNAVAILABLE)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Counters, gauges and timing summaries in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 # ---------- Mount Quantum Router ----------
@@ -0,0 +1,76 @@
+"""
+Batched statevector estimator vs. qiskit's reference Estimator on the
+portfolio Hamiltonian: energies must agree, then time per evaluation.
+
+    python -m benchmarks.bench_estimator
+"""
+
+import time
+
+import numpy as np
+from qiskit.circuit.library import RealAmplitudes
+from qiskit.primitives import Estimator
+
+from benchmarks.bench_hamiltonian import random_problem
+from processing.fast_estimator import DiagonalStatevectorEstimator
+from processing.vqe_portfolio import create_hamiltonian, run_vqe
+
+ATOL = 1e-9
+BATCH = 32
+
+
+def per_evaluation(estimator, ansatz, H, points):
+    start = time.perf_counter()
+    values = (
+        estimator.run([ansatz] * len(points), [H] * len(points), points).result().values
+    )
+    return values, (time.perf_counter() - start) / len(points)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'n':>3} {'reference (ms)':>15} {'statevector (ms)':>17} {'speedup':>8} "
+        f"{'max |dE|':>10}"
+    )
+    for n in (4, 6, 8, 10, 12, 14):
+        mu, cov, fundamentals = random_problem(n, rng)
+        H = create_hamiltonian(mu, cov, fundamentals, 0.5, 1.0)
+        ansatz = RealAmplitudes(n, reps=1, entanglement="linear", insert_barriers=True)
+        points = rng.uniform(-np.pi, np.pi, size=(BATCH, ansatz.num_parameters))
+
+        fast = DiagonalStatevectorEstimator()
+        per_evaluation(fast, ansatz, H, points[:1])  # compile circuit + diagonal once
+        expected, t_ref = per_evaluation(Estimator(), ansatz, H, points)
+        actual, t_fast = per_evaluation(fast, ansatz, H, points)
+        error = float(np.max(np.abs(actual - expected)))
+        assert error < ATOL, f"n={n}: energies differ by {error}"
+        print(
+            f"{n:>3} {t_ref * 1e3:>15.3f} {t_fast * 1e3:>17.4f} "
+            f"{t_ref / t_fast:>7.0f}x {error:>10.1e}"
+        )
+
+    # Whole VQE runs: same seed, same trajectory, so the same weights
+    mu, cov, fundamentals = random_problem(8, rng)
+    runs = {}
+    for name in ("reference", "statevector"):
+        start = time.perf_counter()
+        weights, result = run_vqe(
+            mu, cov, fundamentals, 1.0, 0.5, seed=7, estimator=name
+        )
+        runs[name] = (weights, result.eigenvalue, time.perf_counter() - start)
+    (w_ref, e_ref, t_ref), (w_fast, e_fast, t_fast) = (
+        runs["reference"],
+        runs["statevector"],
+    )
+    assert np.allclose(
+        w_ref, w_fast, atol=1e-6
+    ), "VQE weights differ between estimators"
+    print(
+        f"\nrun_vqe n=8: reference {t_ref:.2f}s, statevector {t_fast:.2f}s "
+        f"({t_ref / t_fast:.0f}x), |dE|={abs(e_ref - e_fast):.1e}"
+    )
+
+
+if __name__ == "__main__":
+    main()
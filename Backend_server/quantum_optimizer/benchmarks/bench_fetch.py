@@ -0,0 +1,101 @@
+"""
+Fetch engine vs. the old fetchers, against a StubProvider with fixed latency.
+
+fundamentals: the old serial `yf.Ticker(t).info` loop vs. the engine at
+different concurrency / rate limits, and with transient failures retried.
+prices: one request per ticker on 4 threads (old parallel_fetch) vs. the
+engine's batched downloads.
+
+    python -m benchmarks.bench_fetch
+"""
+
+import concurrent.futures
+import time
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.fetch_engine import FetchEngine, RetryPolicy
+from preprocessing.providers import StubProvider
+
+N_TICKERS = 500
+LATENCY = 0.02  # seconds per provider call
+
+
+def universe(rng):
+    tickers = [f"T{i:03d}.NS" for i in range(N_TICKERS)]
+    dates = pd.bdate_range("2024-01-01", periods=126, name="Date")
+    prices = pd.DataFrame(
+        rng.random((len(dates), N_TICKERS)), index=dates, columns=tickers
+    )
+    fundamentals = {
+        t: {"trailingPE": float(rng.uniform(5, 50)), "beta": float(rng.normal(1, 0.3))}
+        for t in tickers
+    }
+    return tickers, prices, fundamentals
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    rng = np.random.default_rng(0)
+    tickers, prices, fundamentals = universe(rng)
+    start, end = prices.index[0], prices.index[-1]
+    fast_retry = RetryPolicy(attempts=5, base=0.05, cap=0.5)
+
+    print(f"fundamentals, {N_TICKERS} tickers, {LATENCY * 1e3:.0f}ms per call")
+    stub = StubProvider(prices, fundamentals, latency=LATENCY)
+    _, serial = timed(lambda: [stub.info(t) for t in tickers])
+    print(f"{'serial loop':>34} {serial:>7.2f}s")
+    for label, kwargs, failure_rate in (
+        ("engine, 16 in flight, no limit", dict(concurrency=16, rate=None), 0.0),
+        ("engine, 32 in flight, no limit", dict(concurrency=32, rate=None), 0.0),
+        (
+            "engine, 32 in flight, 100 req/s",
+            dict(concurrency=32, rate=100, burst=20),
+            0.0,
+        ),
+        (
+            "engine, 32 in flight, 10% failing",
+            dict(concurrency=32, rate=None, retry=fast_retry),
+            0.1,
+        ),
+    ):
+        stub = StubProvider(
+            prices, fundamentals, latency=LATENCY, failure_rate=failure_rate, seed=1
+        )
+        engine = FetchEngine(stub, seed=0, **kwargs)
+        report, elapsed = timed(lambda: engine.run(engine.fetch_fundamentals(tickers)))
+        assert len(report.rows) + len(report.failures) == N_TICKERS
+        print(
+            f"{label:>34} {elapsed:>7.2f}s  {serial / elapsed:>5.1f}x  "
+            f"{report.summary()}"
+        )
+
+    print(
+        f"\nprices, {N_TICKERS} tickers × {len(prices)} days, {LATENCY * 1e3:.0f}ms "
+        "per call"
+    )
+    stub = StubProvider(prices, latency=LATENCY)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as exe:
+        _, threaded = timed(
+            lambda: list(exe.map(lambda t: stub.download([t], start, end), tickers))
+        )
+    print(f"{'per ticker, 4 threads':>34} {threaded:>7.2f}s")
+    engine = FetchEngine(StubProvider(prices, latency=LATENCY), batch_size=100)
+    report, elapsed = timed(
+        lambda: engine.run(engine.fetch_prices(tickers, start, end))
+    )
+    assert np.allclose(report.prices.to_numpy(), prices.to_numpy())
+    print(
+        f"{'engine, batches of 100':>34} {elapsed:>7.2f}s  {threaded / elapsed:>5.1f}x "
+        f" {report.summary()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Batched efficient frontier (processing.frontier) vs. one solve per point.
+
+The baseline solves each frontier point on its own with scipy's SLSQP
+(minimum variance at a target return, long-only), the way a frontier is
+built from repeated single-portfolio calls; its variances and its own
+maximum-Sharpe search are the reference the batched solver is checked
+against. Random problems of n assets, 250 daily returns, annualized.
+
+    python -m benchmarks.bench_frontier [--points 50]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from scipy.optimize import minimize
+
+from processing.frontier import efficient_frontier
+from processing.stats import TRADING_DAYS
+
+RISK_FREE_RATE = 0.05
+
+
+def random_problem(n, rng):
+    market = rng.normal(0.0005, 0.01, size=(250, 1))
+    returns = market + rng.normal(0.0, 0.02, size=(250, n))
+    return (
+        returns.mean(axis=0) * TRADING_DAYS,
+        np.cov(returns, rowvar=False) * TRADING_DAYS,
+    )
+
+
+def _slsqp(objective, n, constraints):
+    return minimize(
+        objective,
+        np.full(n, 1.0 / n),
+        method="SLSQP",
+        bounds=[(0.0, 1.0)] * n,
+        constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1.0}, *constraints],
+        options={"ftol": 1e-14, "maxiter": 1000},
+    )
+
+
+def frontier_loop(mu, cov, targets):
+    """Variance at each target return, one SLSQP solve per point."""
+    n = len(mu)
+    return np.array(
+        [
+            _slsqp(
+                lambda w: w @ cov @ w,
+                n,
+                [{"type": "eq", "fun": lambda w, r=r: w @ mu - r}],
+            ).fun
+            for r in targets
+        ]
+    )
+
+
+def max_sharpe_loop(mu, cov):
+    res = _slsqp(
+        lambda w: -(w @ mu - RISK_FREE_RATE) / np.sqrt(w @ cov @ w), len(mu), []
+    )
+    return -res.fun
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'n':>3} {'points':>6} {'per point (ms)':>15} {'batched (ms)':>13} "
+        f"{'speedup':>8} "
+        f"{'iterations':>10} {'max var err':>12} {'Sharpe err':>11}"
+    )
+    for n in (2, 4, 8, 16, 30, 50):
+        mu, cov = random_problem(n, rng)
+        frontier = efficient_frontier(mu, cov, args.points, RISK_FREE_RATE)
+        variances = frontier_loop(mu, cov, frontier.returns)
+        var_err = np.max(np.abs(frontier.risks**2 - variances) / variances)
+        best = frontier.max_sharpe
+        sharpe = (best @ mu - RISK_FREE_RATE) / np.sqrt(best @ cov @ best)
+        sharpe_err = abs(sharpe - max_sharpe_loop(mu, cov))
+
+        t_loop = min(
+            timeit.repeat(
+                lambda: frontier_loop(mu, cov, frontier.returns), number=1, repeat=3
+            )
+        )
+        reps = 20
+        t_batched = (
+            min(
+                timeit.repeat(
+                    lambda: efficient_frontier(mu, cov, args.points, RISK_FREE_RATE),
+                    number=reps,
+                    repeat=3,
+                )
+            )
+            / reps
+        )
+        print(
+            f"{n:>3} {args.points:>6} {t_loop * 1e3:>15.1f} {t_batched * 1e3:>13.2f} "
+            f"{t_loop / t_batched:>7.1f}x {frontier.iterations:>10} {var_err:>12.1e} "
+            f"{sharpe_err:>11.1e}"
+        )
+
+    print("\nwith short sales (closed form):")
+    for n in (4, 50, 200):
+        mu, cov = random_problem(n, rng)
+        reps = 200
+        t = (
+            min(
+                timeit.repeat(
+                    lambda: efficient_frontier(
+                        mu, cov, args.points, RISK_FREE_RATE, long_only=False
+                    ),
+                    number=reps,
+                    repeat=3,
+                )
+            )
+            / reps
+        )
+        print(f"{n:>3} {args.points:>6} {t * 1e3:>13.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
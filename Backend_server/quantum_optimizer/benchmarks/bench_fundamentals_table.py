@@ -0,0 +1,147 @@
+"""
+Memory footprint and load time of fundamentals: pandas vs. the typed table.
+
+Synthetic tables up to 10 000 tickers with the columns of fundamentals.csv
+(10 % of PE/ROE/Volume missing, a few earnings-date strings). Per size:
+
+    pandas     DataFrame from read_csv, deep memory_usage
+    cleaned    what the API used to hold on top: one str per cell for the
+               listing routes plus the float64 array for the optimizer
+    table      FundamentalsTable.nbytes (float32/int64 columns, ticker
+               codes, string dictionary, missing bitmap)
+
+then read_csv vs. mapping the compiled table, and finally, on Linux, the
+table's resident pages in WORKERS processes that each map and read it: the
+proportional set size (Pss) per process shows one shared copy.
+
+    python -m benchmarks.bench_fundamentals_table
+"""
+
+import multiprocessing as mp
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.fundamentals_table import FundamentalsTable
+
+SIZES = (500, 2000, 10000)
+WORKERS = 4
+
+
+def synthetic_fundamentals(n, rng):
+    frame = pd.DataFrame(
+        {
+            "Ticker": [f"T{i:05d}.NS" for i in range(n)],
+            "PE": rng.normal(25, 10, n),
+            "PB": rng.lognormal(1, 0.8, n),
+            "ROE": rng.normal(0.12, 0.08, n),
+            "Volume": rng.integers(10_000, 500_000_000, n).astype(float),
+            "EarningsDate": np.where(
+                rng.random(n) < 0.2, "2025-01-28;2025-02-01", None
+            ),
+        }
+    )
+    for name in ("PE", "ROE", "Volume"):
+        frame.loc[rng.random(n) < 0.1, name] = np.nan
+    return frame
+
+
+def cleaned_bytes(frame):
+    strings = sum(
+        sys.getsizeof("" if pd.isna(v) else str(v)) for v in frame.to_numpy().ravel()
+    )
+    pointers = frame.size * 8  # object arrays of the cleaned columns
+    numeric = (
+        frame.drop(columns="Ticker")
+        .apply(pd.to_numeric, errors="coerce")
+        .to_numpy(np.float64)
+        .nbytes
+    )
+    return strings + pointers + numeric
+
+
+def best_of(fn, repeat=5):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def _mapped_pss(path, start, done):
+    table = FundamentalsTable.open(path)
+    table.numeric(table.fields)  # touch every page
+    start.wait()
+    root = str(Path(path).resolve())
+    pss = rss = 0
+    with open("/proc/self/smaps") as f:
+        mapping = None
+        for line in f:
+            parts = line.split()
+            if parts and "-" in parts[0] and len(parts) >= 5:
+                mapping = parts[5] if len(parts) > 5 else ""
+            elif mapping and mapping.startswith(root) and parts[0] in ("Pss:", "Rss:"):
+                if parts[0] == "Pss:":
+                    pss += int(parts[1])
+                else:
+                    rss += int(parts[1])
+    done.put((rss, pss))
+    start.wait()
+
+
+def shared_pages(path, workers=WORKERS):
+    ctx = mp.get_context("spawn")
+    start, done = ctx.Barrier(workers + 1), ctx.Queue()
+    procs = [
+        ctx.Process(target=_mapped_pss, args=(str(path), start, done))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    start.wait()  # every worker has the table mapped
+    sizes = [done.get() for _ in procs]
+    start.wait()
+    for p in procs:
+        p.join()
+    return sizes
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'tickers':>7} {'pandas KB':>10} {'cleaned KB':>11} {'table KB':>9} "
+        f"{'ratio':>6} "
+        f"{'read_csv':>9} {'open':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            frame = synthetic_fundamentals(n, rng)
+            csv_path = Path(tmp) / f"fundamentals_{n}.csv"
+            frame.to_csv(csv_path, index=False)
+            table_dir = Path(tmp) / f"table_{n}"
+            table = FundamentalsTable.load(csv_path, table_dir)
+
+            parsed = pd.read_csv(csv_path)
+            pandas_bytes = parsed.memory_usage(deep=True).sum()
+            held = pandas_bytes + cleaned_bytes(parsed)
+            t_csv = best_of(lambda: pd.read_csv(csv_path))
+            t_open = best_of(lambda: FundamentalsTable.open(table_dir))
+            print(
+                f"{n:>7} {pandas_bytes / 1024:>10.1f} {held / 1024:>11.1f} "
+                f"{table.nbytes / 1024:>9.1f} "
+                f"{held / table.nbytes:>5.1f}x {t_csv * 1000:>7.2f}ms "
+                f"{t_open * 1000:>6.2f}ms"
+            )
+
+        print(f"\n{SIZES[-1]}-row table, by part:")
+        for part, size in table.footprint().items():
+            print(f"  {part:<28} {size / 1024:>8.1f} KB")
+
+        if sys.platform.startswith("linux"):
+            print(f"\nmapped by {WORKERS} processes (table files only):")
+            for i, (rss, pss) in enumerate(shared_pages(table_dir)):
+                print(f"  worker {i}: Rss {rss:>5} KB  Pss {pss:>5} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Vectorized create_hamiltonian vs. the original string-building loop.
+
+    python -m benchmarks.bench_hamiltonian
+"""
+
+import timeit
+
+import numpy as np
+from qiskit.quantum_info import SparsePauliOp
+
+from processing.vqe_portfolio import create_hamiltonian
+
+
+def create_hamiltonian_loop(mu, cov, fundamentals, risk_factor, budget):
+    """The pre-vectorization implementation, kept as the reference."""
+    n = len(mu)
+    terms = []
+    tickers = sorted(fundamentals.keys())
+    pe_ratios = np.array(
+        [
+            (
+                float(fundamentals[t].get("PE", 1.0))
+                if not np.isnan(fundamentals[t].get("PE", 1.0))
+                else 1.0
+            )
+            for t in tickers
+        ]
+    )
+    for i in range(n):
+        for j in range(i, n):
+            pauli = ["I"] * n
+            pauli[i] = "Z"
+            pauli[j] = "Z"
+            terms.append(("".join(pauli), float(np.real(risk_factor * cov[i, j]))))
+    for i in range(n):
+        pauli = ["I"] * n
+        pauli[i] = "Z"
+        terms.append(("".join(pauli), float(np.real(-mu[i] * pe_ratios[i]))))
+    for i in range(n):
+        pauli = ["I"] * n
+        pauli[i] = "Z"
+        terms.append(("".join(pauli), float(0.1 * budget)))
+    terms.append(("I" * n, float(0.5 * n)))
+    for p, c in terms:
+        if not isinstance(c, float):
+            raise ValueError(f"Coefficient {c} for {p} is not float")
+        if np.iscomplex(c):
+            raise ValueError(f"Complex coefficient {c} detected")
+    return SparsePauliOp.from_list(terms)
+
+
+def random_problem(n, rng):
+    returns = rng.normal(0.001, 0.02, size=(250, n))
+    fundamentals = {
+        f"T{i:02d}": {"PE": np.nan if i % 7 == 0 else float(rng.uniform(5, 60))}
+        for i in range(n)
+    }
+    return returns.mean(axis=0), np.cov(returns, rowvar=False), fundamentals
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'n':>3} {'terms':>6} {'loop (ms)':>10} {'vectorized (ms)':>16} "
+        f"{'speedup':>8}  equal"
+    )
+    for n in (4, 6, 8, 12, 16, 20, 25, 30):
+        args = (*random_problem(n, rng), 0.5, 1.0)
+        fast = create_hamiltonian(*args)
+        slow = create_hamiltonian_loop(*args)
+        equal = fast.equiv(slow, atol=1e-12)
+
+        reps = 200 if n <= 12 else 50
+        t_slow = (
+            min(
+                timeit.repeat(
+                    lambda: create_hamiltonian_loop(*args), number=reps, repeat=3
+                )
+            )
+            / reps
+        )
+        t_fast = (
+            min(timeit.repeat(lambda: create_hamiltonian(*args), number=reps, repeat=3))
+            / reps
+        )
+        print(
+            f"{n:>3} {len(fast):>6} {t_slow * 1e3:>10.3f} {t_fast * 1e3:>16.3f} "
+            f"{t_slow / t_fast:>7.1f}x  {equal}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Load time of price history: CSV text vs. the memory-mapped price store.
+
+Synthetic universes up to the ~500 tickers of tickers_with_names.csv over
+multi-year windows, read in full and projected to a 4-ticker basket.
+
+    python -m benchmarks.bench_price_store
+"""
+
+import os
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.price_store import PriceStore
+
+BASKET = 4
+
+
+def synthetic_prices(n_tickers, n_days, rng):
+    dates = pd.bdate_range("2015-01-01", periods=n_days, name="Date")
+    walks = 100 * np.exp(
+        np.cumsum(rng.normal(0, 0.01, size=(n_days, n_tickers)), axis=0)
+    )
+    return pd.DataFrame(
+        walks, index=dates, columns=[f"T{i:03d}.NS" for i in range(n_tickers)]
+    )
+
+
+def best_of(fn, repeat=5):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'tickers':>7} {'days':>5} {'csv MB':>7} {'npy MB':>7} "
+        f"{'csv all':>9} {'store all':>10} {'csv 4':>8} {'store 4':>8} "
+        f"{'speedup(4)':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_tickers, n_days in (
+            (4, 126),
+            (50, 252),
+            (500, 252),
+            (500, 1260),
+            (500, 2520),
+        ):
+            frame = synthetic_prices(n_tickers, n_days, rng)
+            csv_path = Path(tmp) / f"prices_{n_tickers}_{n_days}.csv"
+            frame.to_csv(csv_path)
+            store = PriceStore(Path(tmp) / f"store_{n_tickers}_{n_days}")
+            store.write(frame)
+            basket = list(frame.columns[-BASKET:])
+
+            loaded = store.frame(basket)
+            assert np.allclose(loaded.to_numpy(), frame[basket].to_numpy(), rtol=1e-12)
+            assert (loaded.index == frame.index).all()
+
+            # full reads materialize the values, so mapping alone is not what's timed
+            csv_all = best_of(
+                lambda: pd.read_csv(csv_path, index_col=0, parse_dates=True)
+                .to_numpy()
+                .sum()
+            )
+            store_all = best_of(lambda: store.read().values.sum())
+            csv_basket = best_of(
+                lambda: pd.read_csv(
+                    csv_path, index_col=0, parse_dates=True, usecols=["Date", *basket]
+                )
+            )
+            store_basket = best_of(lambda: store.frame(basket))
+
+            manifest = store.manifest()
+            npy_bytes = sum(
+                os.path.getsize(store.path / manifest[k]) for k in ("prices", "dates")
+            )
+            print(
+                f"{n_tickers:>7} {n_days:>5} {csv_path.stat().st_size / 1e6:>7.2f} "
+                f"{npy_bytes / 1e6:>7.2f} "
+                f"{csv_all * 1e3:>7.1f}ms {store_all * 1e3:>8.2f}ms "
+                f"{csv_basket * 1e3:>6.1f}ms {store_basket * 1e3:>6.2f}ms "
+                f"{csv_basket / store_basket:>9.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
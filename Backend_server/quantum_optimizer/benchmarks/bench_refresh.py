@@ -0,0 +1,59 @@
+"""
+Data moved by a price refresh: first backfill vs. the daily incremental run.
+
+A synthetic 500-ticker universe is served by a StubProvider (no network);
+the store is backfilled a year up to one day, then refreshed day by day.
+
+    python -m benchmarks.bench_refresh
+"""
+
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.price_store import PriceStore
+from preprocessing.providers import StubProvider
+from preprocessing.refresh import refresh_prices
+
+N_TICKERS = 500
+
+
+def main():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", "2025-03-31", name="Date")
+    walks = 100 * np.exp(
+        np.cumsum(rng.normal(0, 0.01, size=(len(dates), N_TICKERS)), axis=0)
+    )
+    universe = pd.DataFrame(
+        walks, index=dates, columns=[f"T{i:03d}.NS" for i in range(N_TICKERS)]
+    )
+    provider = StubProvider(universe)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(tmp)
+        runs = [("backfill 1y", list(universe.columns), "2025-03-24")]
+        runs += [
+            (f"daily {day.date()}", None, day)
+            for day in pd.bdate_range("2025-03-25", "2025-03-31")
+        ]
+        runs += [("repeat (last day)", None, "2025-03-31")]
+        print(f"{'run':>18} {'requests':>8} {'rows':>7} {'KiB':>9} {'time':>8}")
+        for name, tickers, today in runs:
+            report = refresh_prices(tickers, store, provider, today=today)
+            print(
+                f"{name:>18} {report.requests:>8} {sum(report.rows.values()):>7} "
+                f"{report.bytes / 1024:>9.1f} {report.seconds * 1e3:>6.1f}ms"
+            )
+
+        stored = store.frame()
+        expected = universe.loc[stored.index[0] : "2025-03-31"]
+        assert np.allclose(stored.to_numpy(), expected.to_numpy())
+        print(
+            f"store: {stored.shape[1]} tickers × {stored.shape[0]} dates, "
+            f"6mo window {store.read(window='6mo').values.shape[1]} dates"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold start of the API process, per STARTUP_MODE.
+
+First `python -X importtime -c "import main"` in a fresh interpreter, summed
+per top-level package (the modules the API imports before serving), then,
+for each mode, a fresh process that imports main and runs the app's
+lifespan, timing:
+
+    up        lifespan done, i.e. when uvicorn would accept connections
+    light     first GET / answered
+    ready     GET /quantum/ready is 200 (data loaded, workers warm)
+    optimize  the first POST /quantum/optimize, after ready
+
+    python -m benchmarks.bench_startup [--modes eager,background,lazy] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[2]  # Backend_server, where main.py lives
+TICKERS = ["TCS.NS", "NHPC.NS"]
+
+_CHILD = """
+import json, time
+t0 = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+out = {"import": time.perf_counter() - t0}
+with TestClient(main.app) as client:
+    out["up"] = time.perf_counter() - t0
+    client.get("/")
+    out["light"] = time.perf_counter() - t0
+    while client.get("/quantum/ready").status_code != 200:
+        time.sleep(0.02)
+    out["ready"] = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    response = client.post("/quantum/optimize", json={"tickers": %r})
+    assert response.status_code == 200, response.text
+    out["optimize"] = time.perf_counter() - t1
+print(json.dumps(out))
+"""
+
+
+def _env(**extra):
+    # no network during the benchmark: the refresher would fetch prices on its first run
+    return {**os.environ, "DATA_REFRESH_INTERVAL": "none", "TIMING_LOG": "0", **extra}
+
+
+def import_times(top: int) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SERVER_DIR,
+        env=_env(STARTUP_MODE="lazy"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    by_package = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        by_package[name.split(".")[0]] += int(self_us)
+        total += int(self_us)
+    print(
+        f"import main: {total / 1e6:.2f}s across {len(by_package)} top-level packages"
+    )
+    for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {package:<28} {us / 1e3:>8.1f} ms  {us / total:>6.1%}")
+
+
+def startup(mode: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD % (TICKERS,)],
+        cwd=SERVER_DIR,
+        env=_env(STARTUP_MODE=mode),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} startup failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="eager,background,lazy")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    import_times(args.top)
+    print(
+        f"\n{'mode':>10} {'import':>8} {'up':>8} {'light':>8} {'ready':>8} "
+        f"{'optimize':>9}"
+    )
+    for mode in args.modes.split(","):
+        t = startup(mode)
+        print(
+            f"{mode:>10} {t['import']:>7.2f}s {t['up']:>7.2f}s {t['light']:>7.2f}s "
+            f"{t['ready']:>7.2f}s {t['optimize']:>8.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
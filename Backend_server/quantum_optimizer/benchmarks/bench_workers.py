@@ -0,0 +1,313 @@
+"""
+API throughput by worker count: serve.py vs. independent uvicorn workers.
+
+    shared       python serve.py --workers N: one loader publishes the snapshot,
+                 workers map it and share results through RESULT_CACHE_DB
+    independent  uvicorn main:app --workers N: every worker loads the files,
+                 computes μ/Σ and caches results on its own (the old setup)
+
+For each mode and worker count a server is started on a free port (one
+optimizer process per worker, no data refresh) and, once every worker has
+answered /quantum/health, driven for --duration seconds per scenario by
+--clients processes of --threads keep-alive connections each:
+
+    stock    GET /stock/{ticker}, round-robin
+    cached   POST /quantum/optimize over 8 fixed baskets: after the first run
+             of each, served from a result cache
+    fresh    POST /quantum/optimize with a new risk_factor every time: always
+             runs the optimizer
+
+Reported per scenario: requests/s, p50 / p99 latency, errors, and the VQE
+runs the server performed (counted in the shared warm-start database, so
+across every process). Then the proportional set size (Pss) of each uvicorn
+worker and of the whole process tree. Throughput can only scale with the
+cores there are: the clients run on the same machine.
+
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--modes shared,independent]
+                                       [--duration 5] [--clients 2] [--threads 8]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import multiprocessing as mp
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+SERVER_DIR = Path(__file__).resolve().parents[2]  # Backend_server, where main.py lives
+TICKERS = ["TCS.NS", "NHPC.NS", "IDEA.NS", "SIEMENS.NS"]
+BASKETS = [list(c) for n in (2, 3) for c in itertools.combinations(TICKERS, n)][:8]
+SCENARIOS = ("stock", "cached", "fresh")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(scenario: str, i: int):
+    if scenario == "stock":
+        return "GET", f"/stock/{TICKERS[i % len(TICKERS)]}", None
+    if scenario == "cached":
+        return (
+            "POST",
+            "/quantum/optimize",
+            {"tickers": BASKETS[i % len(BASKETS)], "risk_factor": 0.5},
+        )
+    # unique per request: clients and threads interleave their counters
+    return (
+        "POST",
+        "/quantum/optimize",
+        {"tickers": TICKERS[:3], "risk_factor": 0.1 + i * 1e-6},
+    )
+
+
+def _client(
+    port: int, scenario: str, deadline: float, threads: int, offset: int, stride: int
+):
+    """One client process: `threads` keep-alive connections until `deadline`."""
+    results = []
+
+    def run(t):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        latencies, errors = [], 0
+        for k in itertools.count():
+            if time.time() >= deadline:
+                break
+            method, path, body = _request(scenario, (k * threads + t) * stride + offset)
+            data = json.dumps(body).encode() if body is not None else None
+            headers = {"Content-Type": "application/json"} if data else {}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+        results.append((latencies, errors))
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return [x for lat, _ in results for x in lat], sum(e for _, e in results)
+
+
+def _get(port: int, path: str):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def _wait_for_workers(
+    port: int, workers: int, proc: subprocess.Popen, timeout: float = 300.0
+) -> set:
+    """Pids of the workers seen ready (polled concurrently, so every worker accepts)."""
+    pids, deadline = set(), time.time() + timeout
+
+    def poll(_):
+        try:
+            status, body = _get(port, "/quantum/health")
+        except OSError:
+            return None
+        health = json.loads(body) if status == 200 else {}
+        return health.get("pid") if health.get("startup", {}).get("ready") else None
+
+    with ThreadPoolExecutor(max_workers=2 * workers) as pool:
+        while len(pids) < workers and time.time() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            pids.update(p for p in pool.map(poll, range(2 * workers)) if p is not None)
+            time.sleep(0.2)
+    if len(pids) < workers:
+        raise RuntimeError(f"only {len(pids)} of {workers} workers became ready")
+    return pids
+
+
+def _vqe_runs(db: Path) -> int:
+    if not db.exists():
+        return 0
+    with sqlite3.connect(db) as conn:
+        row = conn.execute(
+            "SELECT COALESCE(SUM(cold_runs + warm_runs), 0) FROM runs"
+        ).fetchone()
+    return int(row[0])
+
+
+def _pss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+    except (OSError, StopIteration):
+        return 0
+
+
+def _tree(pid: int) -> list:
+    """`pid` and its descendants (children are listed per spawning thread)."""
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return [pid] + [p for c in children for p in _tree(c)]
+
+
+def run_config(mode: str, workers: int, args, tmp: Path) -> dict:
+    port = _free_port()
+    run_dir = tmp / f"{mode}-{workers}"
+    run_dir.mkdir()
+    env = {
+        **os.environ,
+        "DATA_REFRESH_INTERVAL": "none",
+        "TIMING_LOG": "0",
+        "OPTIMIZER_WORKERS": "1",
+        "STARTUP_MODE": "eager",
+        "WARM_START_DB": str(run_dir / "warm_start.db"),
+        "SNAPSHOT_DIR": str(run_dir / "snapshot"),
+        "RESULT_CACHE_DB": str(run_dir / "results.db") if mode == "shared" else "none",
+        "SNAPSHOT_SOURCE": "local",
+    }
+    if mode == "shared":
+        command = [
+            sys.executable,
+            "serve.py",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+        ]
+    else:
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+        ]
+    log = open(run_dir / "server.log", "wb")
+    proc = subprocess.Popen(
+        command,
+        cwd=SERVER_DIR,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    out = {"scenarios": {}}
+    try:
+        pids = _wait_for_workers(port, workers, proc)
+        for scenario in SCENARIOS:
+            runs_before = _vqe_runs(run_dir / "warm_start.db")
+            deadline = time.time() + args.duration
+            with mp.Pool(args.clients) as pool:
+                parts = pool.starmap(
+                    _client,
+                    [
+                        (port, scenario, deadline, args.threads, c, args.clients)
+                        for c in range(args.clients)
+                    ],
+                )
+            latencies = np.array([x for lat, _ in parts for x in lat])
+            out["scenarios"][scenario] = {
+                "rps": len(latencies) / args.duration,
+                "p50": (
+                    np.percentile(latencies, 50) * 1000
+                    if len(latencies)
+                    else float("nan")
+                ),
+                "p99": (
+                    np.percentile(latencies, 99) * 1000
+                    if len(latencies)
+                    else float("nan")
+                ),
+                "errors": sum(e for _, e in parts),
+                "vqe_runs": _vqe_runs(run_dir / "warm_start.db") - runs_before,
+            }
+        out["pss_worker_mb"] = np.mean([_pss_kb(p) for p in pids]) / 1024
+        out["pss_total_mb"] = sum(_pss_kb(p) for p in _tree(proc.pid)) / 1024
+    except Exception:
+        log.flush()
+        sys.stderr.write((run_dir / "server.log").read_text()[-3000:])
+        raise
+    finally:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+        except ProcessLookupError:
+            pass
+        log.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--modes", default="shared,independent")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(
+        f"{os.cpu_count()} CPUs, {args.clients} client processes × {args.threads} "
+        "connections, "
+        f"{args.duration:g}s per scenario\n"
+    )
+    print(
+        f"{'mode':<12} {'workers':>7} {'scenario':<8} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} "
+        f"{'errors':>6} {'VQE runs':>8}"
+    )
+    memory = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes.split(","):
+            for workers in (int(w) for w in args.workers.split(",")):
+                result = run_config(mode, workers, args, Path(tmp))
+                for scenario, r in result["scenarios"].items():
+                    print(
+                        f"{mode:<12} {workers:>7} {scenario:<8} {r['rps']:>8.1f} "
+                        f"{r['p50']:>8.2f} "
+                        f"{r['p99']:>8.2f} {r['errors']:>6} {r['vqe_runs']:>8}"
+                    )
+                memory.append(
+                    (mode, workers, result["pss_worker_mb"], result["pss_total_mb"])
+                )
+
+    print(f"\n{'mode':<12} {'workers':>7} {'Pss/worker MB':>14} {'Pss total MB':>13}")
+    for mode, workers, per_worker, total in memory:
+        print(f"{mode:<12} {workers:>7} {per_worker:>14.1f} {total:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import numpy as np
 from tabulate import tabulate
-import yfinance as yf
-import time
+from preprocessing.fundamentals_cache import FundamentalsCache
 from preprocessing.logger import api_logger
 
 def compile_results(
@@ -10,10 +9,12 @@ def compile_results(
     mu: np.ndarray,
     cov: np.ndarray,
     risk_free_rate: float = 0.05,
+    cache: FundamentalsCache = None,
 ):
     """
     1) Compute portfolio return, risk, Sharpe ratio
-    2) Fetch each stock’s fundamentals (once)
+    2) Read each stock’s fundamentals from the fundamentals cache (only
+       stale tickers are fetched, concurrently; failures fall back to cache)
     3) Log API timings
     4) Print two tables of 8 params each
     5) Print number of params + portfolio metrics
@@ -47,12 +48,11 @@ def compile_results(
     left_fields  = all_fields[:8]
     right_fields = all_fields[8:]
 
-    # 3) Fetch fundamentals once per ticker
+    # 3) Fundamentals of all tickers in one cache lookup
+    lookup = (cache or FundamentalsCache()).get(tickers, [raw for raw, _ in all_fields])
     rows = []
     for tkr, w in zip(tickers, weights):
-        start = time.time()
-        info  = yf.Ticker(tkr).info
-        api_logger.log_call("yfinance.Ticker.info", time.time() - start)
+        info = lookup.values[tkr]
 
         # build a single “flat” row of 2 + 16 entries
         row = [tkr, f"{w:.2%}"]
@@ -64,8 +64,11 @@ def compile_results(
                 row.append(val if val else "-")
         rows.append(row)
 
-    # 4) Print API timing
-    print("\nAPI timing summary:", api_logger.summary(), "\n")
+    # 4) Print cache + API timing
+    print("\nFundamentals:", lookup.summary())
+    for tkr, error in lookup.stale.items():
+        print(f"  {tkr}: refresh failed ({error}), showing cached values")
+    print("API timing summary:", api_logger.summary(), "\n")
 
     # 5) Prepare and print the **left** table
     left_headers  = ["Ticker", "Weight"] + [lbl for _, lbl in left_fields]
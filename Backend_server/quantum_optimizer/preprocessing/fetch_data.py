@@ -1,32 +1,53 @@
-import yfinance as yf
+import logging
+
 import pandas as pd
-import time
-from .logger import api_logger
+from .fetch_engine import FetchEngine
+from .providers import YFinanceProvider
+from .price_store import DATA_DIR, EPOCH, window_start
+
+logger = logging.getLogger(__name__)
 
 
-def fetch_and_cache(tickers, outpath, period="6mo",auto_adjust=True):
+def fetch_and_cache(
+    tickers,
+    outpath=DATA_DIR / "last6m.csv",
+    period="6mo",
+    auto_adjust=True,
+    store=None,
+    engine=None,
+):
     """
-    1) Download last `period` of data for tickers
-    2) Log duration
-    3) Keep only Close (or Adj Close)
-    4) Write CSV to outpath
+    1) Download the last `period` of close prices for tickers through the
+       fetch engine (batched, rate-limited, retried; the provider's timings
+       go to api_logger)
+    2) Write CSV to outpath (default data/last6m.csv, which the next load
+       imports into the price store; None skips it)
+    3) Also merge into `store` (a PriceStore), if given
+    Tickers that failed are logged and missing from the returned frame; the
+    engine's FetchReport is in df.attrs["fetch_report"].
     """
-    start = time.time()
-    df = yf.download(tickers, period=period)
-    elapsed = time.time() - start
-    api_logger.log_call("yfinance.download", elapsed)
-
-    # reduce to Close series
-    if "Close" in df.columns:
-        df = df["Close"]
-    else:
-        df = df["Adj Close"]
-
-    df.to_csv(outpath)
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    engine = engine or FetchEngine(YFinanceProvider(auto_adjust=auto_adjust))
+    today = pd.Timestamp.today().normalize()
+    report = engine.run(
+        engine.fetch_prices(tickers, window_start(today, period) or EPOCH, today)
+    )
+    report.log_failures(logger)
+    df = report.prices
+
+    if outpath is not None:
+        df.to_csv(outpath)
+    if store is not None and not df.empty:
+        store.upsert(df)
+    df.attrs["fetch_report"] = report
     return df
 
 
 if __name__ == "__main__":
+    from .logger import api_logger
+
     tickers = ["TCS.NS", "SIEMENS.NS", "NHPC.NS", "IDEA.NS"]
-    df = fetch_and_cache(tickers, "./data/last6m.csv")
-    print("API call stats:", api_logger.summary())
\ No newline at end of file
+    df = fetch_and_cache(tickers)
+    print(df.attrs["fetch_report"].summary())
+    print("API call stats:", api_logger.summary())
@@ -0,0 +1,275 @@
+"""
+Async fetch engine for price and fundamentals jobs.
+
+Every provider call goes through the same path:
+
+  * a token bucket caps the request rate (`rate` per second, bursts of `burst`),
+  * a semaphore caps calls in flight (`concurrency`),
+  * failures are retried with exponential backoff and full jitter, except
+    `PermanentFetchError`, which fails at once.
+
+Price jobs send `batch_size` tickers per download; fundamentals are one
+`info` call per ticker. Provider calls are blocking and run on the engine's threads, so
+any `Provider` works unchanged. Each job returns a `FetchReport` with the
+data plus one `TickerFailure` per ticker that could not be fetched (price
+tickers that were answered without any rows in range are listed as `empty`).
+
+    engine = FetchEngine(StubProvider(...))
+    report = engine.run(engine.fetch_fundamentals(tickers))
+"""
+
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .logger import metrics
+from .providers import PermanentFetchError, Provider, YFinanceProvider
+
+PRICES, FUNDAMENTALS = "prices", "fundamentals"
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `capacity`; rate=None never waits."""
+
+    def __init__(
+        self,
+        rate: Optional[float],
+        capacity: Optional[float] = None,
+        clock=time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    async def acquire(self) -> None:
+        if self.rate is None:
+            return
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # asyncio locks belong to one event loop
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 4  # calls per request, including the first
+    base: float = 0.5  # seconds before the first retry (before jitter)
+    cap: float = 8.0
+
+    def delay(self, retry: int, rng: random.Random) -> float:
+        """Full jitter: uniform in [0, min(cap, base * 2**retry)]."""
+        return rng.uniform(0, min(self.cap, self.base * 2**retry))
+
+
+@dataclass
+class TickerFailure:
+    ticker: str
+    error: str
+    attempts: int
+
+
+@dataclass
+class FetchReport:
+    job: str
+    tickers: int
+    requests: int = 0  # provider calls, retries included
+    retries: int = 0
+    seconds: float = 0.0
+    prices: Optional[pd.DataFrame] = field(
+        default=None, repr=False
+    )  # price jobs: date × ticker
+    rows: Dict[str, dict] = field(
+        default_factory=dict, repr=False
+    )  # fundamentals jobs: ticker -> info
+    failures: Dict[str, TickerFailure] = field(default_factory=dict)
+    empty: List[str] = field(
+        default_factory=list
+    )  # price jobs: answered, but no rows in range
+
+    @property
+    def succeeded(self) -> List[str]:
+        if self.job == PRICES:
+            return [] if self.prices is None else list(self.prices.columns)
+        return list(self.rows)
+
+    def failure_report(self) -> List[Dict[str, Any]]:
+        return [asdict(f) for f in self.failures.values()]
+
+    def log_failures(self, logger: logging.Logger) -> None:
+        """One warning per ticker that failed or came back empty."""
+        for failure in self.failures.values():
+            logger.warning(
+                "Error fetching %r after %d attempts: %s",
+                failure.ticker,
+                failure.attempts,
+                failure.error,
+            )
+        for ticker in self.empty:
+            logger.warning("No data for %r", ticker)
+
+    def summary(self) -> str:
+        empty = f", {len(self.empty)} empty" if self.empty else ""
+        return (
+            f"{self.job}: {len(self.succeeded)}/{self.tickers} tickers, "
+            f"{self.requests} requests "
+            f"({self.retries} retries), {len(self.failures)} failed{empty}, "
+            f"{self.seconds:.2f}s"
+        )
+
+
+def _record(report: FetchReport) -> None:
+    metrics.observe("fetch_job_seconds", report.seconds, job=report.job)
+    metrics.inc(
+        "fetch_tickers_total", len(report.succeeded), job=report.job, outcome="ok"
+    )
+    metrics.inc(
+        "fetch_tickers_total", len(report.failures), job=report.job, outcome="failed"
+    )
+    metrics.inc(
+        "fetch_tickers_total", len(report.empty), job=report.job, outcome="empty"
+    )
+
+
+class _Exhausted(Exception):
+    def __init__(self, error: BaseException, attempts: int):
+        super().__init__(str(error))
+        self.error = f"{type(error).__name__}: {error}"
+        self.attempts = attempts
+
+
+class FetchEngine:
+    def __init__(
+        self,
+        provider: Optional[Provider] = None,
+        rate: Optional[float] = 5.0,
+        burst: Optional[float] = 10.0,
+        concurrency: int = 8,
+        batch_size: int = 100,
+        retry: RetryPolicy = RetryPolicy(),
+        seed: Optional[int] = None,
+    ):
+        self.provider = provider or YFinanceProvider()
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retry = retry
+        self._rng = random.Random(seed)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        # provider calls block; one thread per slot so `concurrency` is really reached
+        self._threads = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="fetch"
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """One semaphore per event loop, shared by every job running on it."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots, self._loop = asyncio.Semaphore(self.concurrency), loop
+        return self._slots
+
+    @staticmethod
+    def run(coro):
+        """Run a job from synchronous code (not from inside an event loop)."""
+        return asyncio.run(coro)
+
+    async def _call(self, report: FetchReport, fn: Callable, *args):
+        slots = self._semaphore()
+        retry = 0
+        while True:
+            async with slots:
+                await self.bucket.acquire()
+                report.requests += 1
+                metrics.inc("fetch_requests_total", job=report.job)
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self._threads, fn, *args
+                    )
+                except PermanentFetchError as e:
+                    raise _Exhausted(e, retry + 1) from None
+                except Exception as e:
+                    if retry + 1 >= self.retry.attempts:
+                        raise _Exhausted(e, retry + 1) from None
+            # back off outside the semaphore so other requests keep the slot busy
+            await asyncio.sleep(self.retry.delay(retry, self._rng))
+            retry += 1
+            report.retries += 1
+            metrics.inc("fetch_retries_total", job=report.job)
+
+    async def fetch_prices(self, tickers: Sequence[str], start, end) -> FetchReport:
+        """Close prices of `tickers`, start..end inclusive, `batch_size` per call."""
+        t0 = time.perf_counter()
+        tickers = list(dict.fromkeys(tickers))
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        report = FetchReport(PRICES, len(tickers))
+        batches = [
+            tickers[i : i + self.batch_size]
+            for i in range(0, len(tickers), self.batch_size)
+        ]
+
+        async def one(batch):
+            try:
+                df = await self._call(report, self.provider.download, batch, start, end)
+            except _Exhausted as e:
+                report.failures.update(
+                    {t: TickerFailure(t, e.error, e.attempts) for t in batch}
+                )
+                return None
+            df = df.loc[(df.index >= start) & (df.index <= end)]
+            has_rows = df.notna().any()
+            got = [t for t in batch if t in has_rows.index and has_rows[t]]
+            report.empty.extend(t for t in batch if t not in got)
+            return df[got]
+
+        frames = [
+            df
+            for df in await asyncio.gather(*(one(b) for b in batches))
+            if df is not None
+        ]
+        report.prices = (
+            pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame()
+        )
+        report.seconds = time.perf_counter() - t0
+        _record(report)
+        return report
+
+    async def fetch_fundamentals(self, tickers: Sequence[str]) -> FetchReport:
+        """Provider info dicts of `tickers`, one request each."""
+        t0 = time.perf_counter()
+        tickers = list(dict.fromkeys(tickers))
+        report = FetchReport(FUNDAMENTALS, len(tickers))
+
+        async def one(ticker):
+            try:
+                report.rows[ticker] = await self._call(
+                    report, self.provider.info, ticker
+                )
+            except _Exhausted as e:
+                report.failures[ticker] = TickerFailure(ticker, e.error, e.attempts)
+
+        await asyncio.gather(*(one(t) for t in tickers))
+        # completion order -> request order
+        report.rows = {t: report.rows[t] for t in tickers if t in report.rows}
+        report.seconds = time.perf_counter() - t0
+        _record(report)
+        return report
@@ -1,38 +1,30 @@
 # preprocessing/fetch_fundamentals.py
-import time
-import yfinance as yf
+import logging
+
 import pandas as pd
-from .logger import api_logger
+from .fetch_engine import FetchEngine
+from .fundamentals_cache import FundamentalsCache
+from .providers import FUNDAMENTAL_FIELDS, fundamentals_row
+
+logger = logging.getLogger(__name__)
+
 
+def fetch_fundamentals(tickers, outpath, engine=None, cache=None):
+    """
+    Fetch fundamentals of `tickers` concurrently through the fetch engine
+    (rate-limited, retried), write them to `outpath` and into the shared
+    fundamentals cache (`cache`, default data/fundamentals_cache.db; False
+    skips it). Tickers that still fail are logged and left out. Returns
+    the frame; the engine's FetchReport is in df.attrs["fetch_report"].
+    """
+    engine = engine or FetchEngine()
+    report = engine.run(engine.fetch_fundamentals(tickers))
+    if cache is not False and report.rows:
+        (cache or FundamentalsCache()).put(report.rows)
+    report.log_failures(logger)
 
-def fetch_fundamentals(tickers, outpath):
-    rows = []
-    for t in tickers:
-        start = time.time()
-        info = yf.Ticker(t).info
-        dur = time.time() - start
-        api_logger.log_call("yfinance.Ticker.info", dur)
-        rows.append(
-            {
-                "Ticker": t,
-                "PE": info.get("trailingPE", None),
-                "PB": info.get("priceToBook", None),
-                "ROE": info.get("returnOnEquity", None),
-                "Volume": info.get("volume", None),
-                "EarningsDate": ";".join(map(str, info.get("earningsDate", []))),
-                "EV/EBITDA":     info.get("enterpriseToEbitda",   None),
-                "Beta":          info.get("beta",                 None),
-                "MarketCap":     info.get("marketCap",            None),
-                "RevenueGrowth": info.get("revenueGrowth",       None),
-                "PEGRatio":      info.get("pegRatio",            None),
-                "NetMargin":     info.get("profitMargins",       None),
-                "FreeCF":        info.get("freeCashflow",                 None),
-                "OpMargin":      info.get("operatingMargins",             None),
-                "P/S":           info.get("priceToSalesTrailing12Months", None),
-                "Payout":        info.get("payoutRatio",                  None),
-                "CurrRatio":     info.get("currentRatio",                 None),
-            }
-        )
-    df = pd.DataFrame(rows).set_index("Ticker")
+    rows = [fundamentals_row(t, info) for t, info in report.rows.items()]
+    df = pd.DataFrame(rows, columns=["Ticker", *FUNDAMENTAL_FIELDS]).set_index("Ticker")
     df.to_csv(outpath)
+    df.attrs["fetch_report"] = report
     return df
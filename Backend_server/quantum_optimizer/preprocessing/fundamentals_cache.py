@@ -0,0 +1,269 @@
+"""
+Shared cache of per-ticker fundamentals with per-field TTLs.
+
+Values are stored per (ticker, field), keyed by the provider's info key
+("trailingPE", "beta", ...), with the time they were fetched. Market-driven
+fields (price, market cap, multiples) go stale after a day; statement fields
+(margins, ROE, growth) after a week; beta after a month.
+
+`get` returns every requested field, fetching only tickers that have a
+missing or expired field, all of them concurrently through the fetch engine.
+If a fetch fails, the expired cached values are served instead. The first
+use imports data/fundamentals.csv (timestamped with its mtime), and
+fetch_fundamentals writes everything it downloads here too.
+
+Backed by SQLite so the API, its workers and the scripts share one cache.
+
+    python -m preprocessing.fundamentals_cache [TICKER ...]    # show cache state
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .fetch_engine import FetchEngine
+from .logger import metrics
+from .providers import FUNDAMENTAL_FIELDS
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_CACHE_PATH = DATA_DIR / "fundamentals_cache.db"
+FUNDAMENTALS_CSV = DATA_DIR / "fundamentals.csv"
+
+HOUR, DAY = 3600.0, 86400.0
+DEFAULT_TTL = DAY
+FIELD_TTLS = {
+    # moves with the share price
+    "currentPrice": HOUR,
+    "volume": HOUR,
+    "marketCap": DAY,
+    "trailingPE": DAY,
+    "priceToBook": DAY,
+    "enterpriseToEbitda": DAY,
+    "priceToSalesTrailing12Months": DAY,
+    "pegRatio": DAY,
+    # change with quarterly statements
+    "returnOnEquity": 7 * DAY,
+    "debtToEquity": 7 * DAY,
+    "revenueGrowth": 7 * DAY,
+    "profitMargins": 7 * DAY,
+    "operatingMargins": 7 * DAY,
+    "freeCashflow": 7 * DAY,
+    "payoutRatio": 7 * DAY,
+    "currentRatio": 7 * DAY,
+    "earningsDate": 7 * DAY,
+    # multi-year regression
+    "beta": 30 * DAY,
+}
+
+# What put() stores from an info dict by default
+CACHED_FIELDS = list(dict.fromkeys([*FUNDAMENTAL_FIELDS.values(), *FIELD_TTLS]))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (
+    ticker TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (ticker, field)
+);
+"""
+
+
+@dataclass
+class FundamentalsLookup:
+    values: Dict[str, Dict[str, Any]]  # ticker -> field -> value (None if unknown)
+    fetched: List[str] = field(default_factory=list)  # tickers refreshed by this lookup
+    stale: Dict[str, str] = field(
+        default_factory=dict
+    )  # ticker -> fetch error; cached values served
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        cached = len(self.values) - len(self.fetched) - len(self.stale)
+        return (
+            f"{len(self.values)} tickers: {cached} from cache, {len(self.fetched)} "
+            "fetched, "
+            f"{len(self.stale)} served stale, {self.seconds:.2f}s"
+        )
+
+
+class FundamentalsCache:
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        engine: Optional[FetchEngine] = None,
+        seed_csv: Optional[Path] = FUNDAMENTALS_CSV,
+        clock=time.time,
+    ):
+        self.path = Path(path)
+        self.ttls = FIELD_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.seed_csv = seed_csv
+        self._engine = engine
+        self._clock = clock
+        self._local = threading.local()
+
+    @property
+    def engine(self) -> FetchEngine:
+        if self._engine is None:
+            self._engine = FetchEngine()
+        return self._engine
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+            (count,) = db.execute("SELECT COUNT(*) FROM fields").fetchone()
+            if (
+                count == 0
+                and self.seed_csv is not None
+                and Path(self.seed_csv).exists()
+            ):
+                self.import_csv(self.seed_csv)
+        return db
+
+    def ttl(self, name: str) -> float:
+        return self.ttls.get(name, self.default_ttl)
+
+    # ---------- Writing ----------
+
+    def put(
+        self,
+        rows: Dict[str, dict],
+        fields: Optional[Sequence[str]] = None,
+        fetched_at=None,
+    ) -> None:
+        """
+        Store provider info dicts. Every field in `fields` (default:
+        CACHED_FIELDS) is written, absent ones as None, so a known-missing
+        value is not refetched before its TTL.
+        """
+        fields = list(fields or CACHED_FIELDS)
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        self._db().executemany(
+            "INSERT OR REPLACE INTO fields (ticker, field, value, fetched_at) VALUES "
+            "(?, ?, ?, ?)",
+            [
+                (ticker, name, json.dumps(info.get(name), default=str), fetched_at)
+                for ticker, info in rows.items()
+                for name in fields
+            ],
+        )
+
+    def import_csv(self, path) -> int:
+        """Load a fundamentals.csv written by fetch_fundamentals, dated by its mtime."""
+        frame = pd.read_csv(path, index_col=0)
+        columns = {c: k for c, k in FUNDAMENTAL_FIELDS.items() if c in frame.columns}
+        rows = {}
+        for ticker, record in frame.iterrows():
+            info = {}
+            for column, key in columns.items():
+                value = record[column]
+                if pd.isna(value):
+                    continue
+                if key == "earningsDate":
+                    value = str(value).split(";")
+                info[key] = value.item() if hasattr(value, "item") else value
+            rows[str(ticker)] = info
+        self.put(rows, list(columns.values()), fetched_at=os.stat(path).st_mtime)
+        return len(rows)
+
+    # ---------- Reading ----------
+
+    def cached(self, tickers: Sequence[str], fields: Sequence[str]):
+        """(values, fetched_at) for the stored subset of tickers × fields."""
+        values = {t: {} for t in tickers}
+        stamps = {t: {} for t in tickers}
+        db = self._db()
+        for i in range(0, len(tickers), 500):  # SQLite caps bound parameters
+            chunk = list(tickers[i : i + 500])
+            marks = ",".join("?" * len(chunk))
+            field_marks = ",".join("?" * len(fields))
+            for ticker, name, value, fetched_at in db.execute(
+                f"SELECT ticker, field, value, fetched_at FROM fields "
+                f"WHERE ticker IN ({marks}) AND field IN ({field_marks})",
+                (*chunk, *fields),
+            ):
+                values[ticker][name] = json.loads(value) if value is not None else None
+                stamps[ticker][name] = fetched_at
+        return values, stamps
+
+    def stale_tickers(
+        self, tickers: Sequence[str], fields: Sequence[str], stamps=None
+    ) -> List[str]:
+        if stamps is None:
+            _, stamps = self.cached(tickers, fields)
+        now = self._clock()
+        return [
+            t
+            for t in tickers
+            if any(
+                name not in stamps[t] or now - stamps[t][name] > self.ttl(name)
+                for name in fields
+            )
+        ]
+
+    def get(self, tickers: Sequence[str], fields: Sequence[str]) -> FundamentalsLookup:
+        """Every field of every ticker, refreshing only the stale tickers."""
+        t0 = time.perf_counter()
+        tickers = list(dict.fromkeys(tickers))
+        fields = list(dict.fromkeys(fields))
+        values, stamps = self.cached(tickers, fields)
+        stale = self.stale_tickers(tickers, fields, stamps)
+        lookup = FundamentalsLookup(values={})
+
+        if stale:
+            engine = self.engine
+            report = engine.run(engine.fetch_fundamentals(stale))
+            if report.rows:
+                self.put(report.rows, list(dict.fromkeys([*CACHED_FIELDS, *fields])))
+                for ticker, info in report.rows.items():
+                    values[ticker] = {name: info.get(name) for name in fields}
+            lookup.fetched = list(report.rows)
+            lookup.stale = {t: f.error for t, f in report.failures.items()}
+
+        lookup.values = {
+            t: {name: values[t].get(name) for name in fields} for t in tickers
+        }
+        lookup.seconds = time.perf_counter() - t0
+        metrics.inc(
+            "fundamentals_cache_tickers_total", len(tickers) - len(stale), result="hit"
+        )
+        metrics.inc(
+            "fundamentals_cache_tickers_total", len(lookup.fetched), result="fetched"
+        )
+        metrics.inc(
+            "fundamentals_cache_tickers_total", len(lookup.stale), result="stale"
+        )
+        return lookup
+
+
+if __name__ == "__main__":
+    cache = FundamentalsCache()
+    names = sys.argv[1:] or [
+        r[0] for r in cache._db().execute("SELECT DISTINCT ticker FROM fields")
+    ]
+    fields = list(FUNDAMENTAL_FIELDS.values())
+    _, stamps = cache.cached(names, fields)
+    stale = set(cache.stale_tickers(names, fields, stamps))
+    for t in names:
+        newest = max(stamps[t].values(), default=None)
+        age = "never" if newest is None else f"{(time.time() - newest) / 3600:.1f}h old"
+        print(
+            f"{t:>14}  {len(stamps[t])}/{len(fields)} fields, "
+            f"{age}{', stale' if t in stale else ''}"
+        )
@@ -0,0 +1,337 @@
+"""
+Compact, typed fundamentals table: memory-mapped column files plus a JSON manifest.
+
+In data/fundamentals_table:
+
+    manifest.json       {"generation", "rows", "key", "columns", "source", ...}
+    <column>-<gen>.npy  float32 | int64 | int32 codes ("category")
+    tickers-<gen>.npy   int32 codes of the key column
+    strings-<gen>.npy   uint8, every distinct string, UTF-8, back to back
+    offsets-<gen>.npy   int64, string i is strings[offsets[i]:offsets[i + 1]]
+    missing-<gen>.npy   uint8, one packed bit per (column, row); 1 = missing
+
+Columns are typed when the table is compiled from fundamentals.csv: integers
+(volumes, counts; also "123.0" as pandas writes them next to NaNs) become
+int64, other numbers float32, anything else a category coded into the shared
+string dictionary, which also holds the tickers. Missing values are only in
+the bitmap; their slots hold NaN / 0 / -1.
+
+`FundamentalsTable.load(csv)` maps the compiled files, recompiling first if
+the CSV changed. The files are mapped read-only, so every process serving
+the API (uvicorn workers included) shares one copy of the pages through the
+OS page cache. Each write produces a new generation and swaps the manifest
+with an atomic rename, as in the price store.
+
+    python -m preprocessing.fundamentals_table [CSV]    # compile, print the footprint
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .generations import MANIFEST, next_generation, read_manifest, save_atomic, sweep
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+FUNDAMENTALS_CSV = DATA_DIR / "fundamentals.csv"
+TABLE_DIR = "fundamentals_table"
+FORMAT_VERSION = 1
+
+FLOAT, INT, CATEGORY = "float32", "int64", "category"
+_INTEGER = re.compile(r"^[+-]?\d+(\.0*)?$")
+
+
+def _column_kind(texts: pd.Series) -> str:
+    present = texts.dropna()
+    if len(present) and present.str.fullmatch(_INTEGER).all():
+        numbers = pd.to_numeric(present)
+        if numbers.abs().max() < 2**53:
+            return INT
+    if pd.to_numeric(present, errors="coerce").notna().all():
+        return FLOAT
+    return CATEGORY
+
+
+class FundamentalsTable:
+    def __init__(
+        self,
+        key: str,
+        tickers: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        kinds: Dict[str, str],
+        strings: Sequence[str],
+        missing: np.ndarray,
+        order: Sequence[str],
+    ):
+        self.key = key
+        self.codes = tickers  # int32 codes into strings
+        self.columns = columns
+        self.kinds = kinds
+        self.strings = tuple(sys.intern(s) for s in strings)
+        self.missing_bits = (
+            missing  # uint8 (n_columns, ceil(rows / 8)), little bit order
+        )
+        self.order = tuple(order)  # CSV column order, key included
+        self.fields = tuple(c for c in self.order if c != key)
+        self.tickers = tuple(self.strings[c] for c in tickers.tolist())
+        self.index: Dict[str, int] = {}
+        for row, ticker in enumerate(self.tickers):
+            self.index.setdefault(ticker, row)  # first row wins
+        self._position = {name: i for i, name in enumerate(self.fields)}
+        self.path: Optional[Path] = None  # directory of the files when mapped by open()
+        self.source = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # ---------- Building ----------
+
+    @classmethod
+    def from_csv(cls, path) -> "FundamentalsTable":
+        frame = pd.read_csv(path, dtype=str)
+        return cls.from_frame(
+            frame, key=frame.columns[0] if len(frame.columns) else "Ticker"
+        )
+
+    @classmethod
+    def from_frame(
+        cls, frame: pd.DataFrame, key: str = "Ticker"
+    ) -> "FundamentalsTable":
+        """Type the columns of a CSV read as str, dropping the rows without a key."""
+        if key not in frame.columns:
+            frame = pd.DataFrame({key: pd.Series(dtype=str)})
+        frame = frame[frame[key].notna()].reset_index(drop=True)
+        rows = len(frame)
+        strings: Dict[str, int] = {}
+
+        def intern(values) -> np.ndarray:
+            return np.fromiter(
+                (strings.setdefault(str(v), len(strings)) for v in values),
+                dtype=np.int32,
+                count=len(values),
+            )
+
+        tickers = intern(frame[key])
+        fields = [str(c) for c in frame.columns if c != key]
+        columns, kinds = {}, {}
+        missing = np.zeros((len(fields), rows), dtype=bool)
+        for i, name in enumerate(fields):
+            texts = frame[name]
+            kind = _column_kind(texts)
+            absent = texts.isna().to_numpy()
+            if kind == INT:
+                values = np.zeros(rows, dtype=np.int64)
+                values[~absent] = pd.to_numeric(texts[~absent]).astype(np.int64)
+            elif kind == FLOAT:
+                values = pd.to_numeric(texts, errors="coerce").to_numpy(
+                    dtype=np.float32
+                )
+                absent |= np.isnan(values)
+            else:
+                values = np.full(rows, -1, dtype=np.int32)
+                values[~absent] = intern(texts[~absent].tolist())
+            columns[name], kinds[name] = values, kind
+            missing[i] = absent
+
+        blobs = [s.encode() for s in strings]
+        return cls(
+            key=str(key),
+            tickers=tickers,
+            columns=columns,
+            kinds=kinds,
+            strings=list(strings),
+            missing=np.packbits(missing, axis=1, bitorder="little"),
+            order=[str(c) for c in frame.columns],
+        )._with_blob(blobs)
+
+    def _with_blob(self, blobs: List[bytes]) -> "FundamentalsTable":
+        self._blob = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        self._offsets = np.concatenate(
+            ([0], np.cumsum([len(b) for b in blobs]))
+        ).astype(np.int64)
+        return self
+
+    # ---------- Files ----------
+
+    def save(self, path, source: Optional[Path] = None) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        generation = next_generation(read_manifest(path, FORMAT_VERSION))
+        files = {name: f"{_safe(name)}-{generation}.npy" for name in self.fields}
+        manifest = {
+            "format": FORMAT_VERSION,
+            "generation": generation,
+            "rows": len(self),
+            "key": self.key,
+            "order": list(self.order),
+            "columns": [
+                {"name": n, "kind": self.kinds[n], "file": files[n]}
+                for n in self.fields
+            ],
+            "tickers": f"tickers-{generation}.npy",
+            "strings": f"strings-{generation}.npy",
+            "offsets": f"offsets-{generation}.npy",
+            "missing": f"missing-{generation}.npy",
+            "source": _source_stamp(source) if source is not None else None,
+            "updated_at": time.time(),
+        }
+        arrays = {
+            manifest["tickers"]: self.codes,
+            manifest["strings"]: self._blob,
+            manifest["offsets"]: self._offsets,
+            manifest["missing"]: self.missing_bits,
+        }
+        arrays.update({files[n]: self.columns[n] for n in self.fields})
+        for name, values in arrays.items():
+            save_atomic(path / name, values)
+        save_atomic(path / MANIFEST, manifest)
+        sweep(path, generation)
+
+    @classmethod
+    def open(cls, path) -> "FundamentalsTable":
+        """Map a compiled table read-only."""
+        path = Path(path)
+        manifest = read_manifest(path, FORMAT_VERSION)
+        if manifest is None:
+            raise FileNotFoundError(f"No fundamentals table in {path}")
+
+        def mapped(name):
+            return np.load(path / name, mmap_mode="r")
+
+        blob, offsets = mapped(manifest["strings"]), mapped(manifest["offsets"])
+        raw, bounds = bytes(blob), offsets.tolist()
+        strings = [raw[a:b].decode() for a, b in zip(bounds, bounds[1:])]
+        table = cls(
+            key=manifest["key"],
+            tickers=mapped(manifest["tickers"]),
+            columns={c["name"]: mapped(c["file"]) for c in manifest["columns"]},
+            kinds={c["name"]: c["kind"] for c in manifest["columns"]},
+            strings=strings,
+            missing=mapped(manifest["missing"]),
+            order=manifest["order"],
+        )
+        table._blob, table._offsets = blob, offsets
+        table.path, table.source = path, manifest.get("source")
+        return table
+
+    @classmethod
+    def load(cls, csv_path=FUNDAMENTALS_CSV, path=None) -> "FundamentalsTable":
+        """
+        The compiled table of `csv_path` (next to it by default), recompiled
+        if the CSV changed.
+        """
+        csv_path = Path(csv_path)
+        path = Path(path) if path is not None else csv_path.parent / TABLE_DIR
+        manifest = read_manifest(path, FORMAT_VERSION)
+        if manifest is None or manifest.get("source") != _source_stamp(csv_path):
+            cls.from_csv(csv_path).save(path, source=csv_path)
+        try:
+            return cls.open(path)
+        except FileNotFoundError:
+            # another process compiled a newer generation between our manifest read
+            # and the maps
+            return cls.open(path)
+
+    # ---------- Reading ----------
+
+    def rows(self, tickers: Sequence[str]) -> np.ndarray:
+        missing = [t for t in tickers if t not in self.index]
+        if missing:
+            raise KeyError(f"No fundamentals for {missing}")
+        return np.fromiter(
+            (self.index[t] for t in tickers), dtype=np.intp, count=len(tickers)
+        )
+
+    def is_missing(self, field: str, rows: np.ndarray) -> np.ndarray:
+        bits = self.missing_bits[self._position[field]]
+        return ((bits[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def numeric(
+        self, fields: Sequence[str], rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """float64 (len(rows), len(fields)); NaN where missing or not numeric."""
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        out = np.full((len(rows), len(fields)), np.nan)
+        for j, name in enumerate(fields):
+            if self.kinds[name] == CATEGORY:
+                continue
+            values = self.columns[name][rows]
+            # via the shortest decimal form: float32 25.703009 widens to 25.703009,
+            # not 25.7030086517334
+            values = (
+                values.astype(str).astype(np.float64)
+                if self.kinds[name] == FLOAT
+                else values.astype(np.float64)
+            )
+            values[self.is_missing(name, rows)] = np.nan
+            out[:, j] = values
+        return out
+
+    def text(self, field: str, rows: np.ndarray) -> List[str]:
+        """`rows` as the listing routes print them: "" if missing, else str(value)."""
+        if field == self.key:
+            return [self.tickers[r] for r in rows]
+        values = self.columns[field][rows]
+        absent = self.is_missing(field, rows)
+        if self.kinds[field] == CATEGORY:
+            return ["" if a else self.strings[v] for v, a in zip(values, absent)]
+        # numpy scalars print their shortest round-trip form: float32 reads as written
+        return ["" if a else str(v) for v, a in zip(values, absent)]
+
+    def records(self) -> List[Dict[str, str]]:
+        """Every row as {column: text} in CSV column order."""
+        rows = np.arange(len(self))
+        columns = {name: self.text(name, rows) for name in self.order}
+        return [{name: columns[name][r] for name in self.order} for r in rows]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the column data, ticker codes, string dictionary and bitmap."""
+        arrays = [
+            self.codes,
+            self._blob,
+            self._offsets,
+            self.missing_bits,
+            *self.columns.values(),
+        ]
+        return sum(a.nbytes for a in arrays)
+
+    def footprint(self) -> Dict[str, int]:
+        out = {
+            f"{name} ({self.kinds[name]})": self.columns[name].nbytes
+            for name in self.fields
+        }
+        out["tickers (codes)"] = self.codes.nbytes
+        out["string dictionary"] = self._blob.nbytes + self._offsets.nbytes
+        out["missing bitmap"] = self.missing_bits.nbytes
+        return out
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _source_stamp(csv_path: Path) -> Optional[list]:
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else FUNDAMENTALS_CSV
+    table = FundamentalsTable.load(source)
+    frame = pd.read_csv(source)
+    print(f"{len(table)} rows × {len(table.fields)} fields from {source}")
+    for part, size in table.footprint().items():
+        print(f"  {part:<28} {size:>10,} B")
+    print(
+        f"  {'total':<28} {table.nbytes:>10,} B   (DataFrame: "
+        f"{frame.memory_usage(deep=True).sum():,} B)"
+    )
@@ -0,0 +1,80 @@
+"""
+Generation files: the on-disk layout shared by the price store, the
+fundamentals table and the published market snapshots (services.shared_snapshot).
+
+    <dir>/manifest.json     {"format", "generation", ...}, naming the current files
+    <dir>/<name>-<gen>.npy  one array of generation <gen>
+
+A write saves the arrays of the next generation, then swaps the manifest
+with one atomic rename, so a reader maps either the old files or the new
+ones, never a mix. The files of older generations are swept afterwards.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+
+
+def read_manifest(directory: Path, format_version: int) -> Optional[dict]:
+    """The manifest in `directory`; None if missing, unreadable or of another format."""
+    try:
+        with open(Path(directory) / MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == format_version else None
+
+
+def next_generation(previous: Optional[dict]) -> int:
+    return previous["generation"] + 1 if previous else 1
+
+
+def save_atomic(target: Path, content) -> None:
+    """
+    Write next to `target`, then rename over it: readers map either the old
+    file or the new one.
+    """
+    target = Path(target)
+    suffix = ".json" if isinstance(content, dict) else ".npy"
+    fd, tmp = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.stem}-", suffix=suffix
+    )
+    with os.fdopen(fd, "wb") as f:
+        if isinstance(content, dict):
+            f.write(json.dumps(content, indent=1).encode())
+        else:
+            np.save(f, np.asarray(content))
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, target)
+
+
+def remove(directory: Path, names: Iterable[str]) -> None:
+    for name in names:
+        try:
+            os.remove(Path(directory) / name)
+        except OSError:
+            pass  # gone, or still mapped elsewhere (Windows): a later sweep() retries
+
+
+def sweep(
+    directory: Path, generation: int, names: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Remove the `<name>-<gen>.npy` files of every generation before
+    `generation` (only those `names`, if given), including files an earlier
+    sweep could not remove.
+    """
+    names = None if names is None else set(names)
+    stale = []
+    # ".<name>-*" is a write in progress
+    for path in Path(directory).glob("[!.]*-*.npy"):
+        name, _, gen = path.stem.rpartition("-")
+        if gen.isdigit() and int(gen) < generation and (names is None or name in names):
+            stale.append(path.name)
+    remove(directory, stale)
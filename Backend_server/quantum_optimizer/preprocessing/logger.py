@@ -1,32 +1,425 @@
-import time, threading
+"""
+Process-wide metrics: counters, gauges and streaming timing histograms.
 
+Every series is a metric name plus a label set:
 
-class APILogger:
+    metrics.inc("result_cache_requests_total", result="hit")
+    metrics.observe("fetch_job_seconds", report.seconds, job="prices")
+
+    with metrics.timer("hamiltonian_build_seconds"):
+        ...
+
+    @metrics.timer("vqe_run_seconds", solver="vqe")
+    def run(...): ...
+
+Histograms are HDR-style: values land in log-spaced buckets (BUCKETS_PER_OCTAVE
+per power of two, ~1% relative error on quantiles) kept in a sparse dict,
+so memory is bounded by the bucket range no matter how many values are
+observed, and two histograms merge by adding bucket counts. Count, sum, min
+and max are exact.
+
+Worker processes `drain()` their series and ship them back with each result;
+the API process `merge()`s them, then serves everything at GET /metrics in
+the Prometheus text format (histograms as summaries with 0.5/0.9/0.99
+quantiles).
+
+`api_logger` is the old provider-call timer, now a view over the
+`external_call_seconds` histograms.
+
+Per-request stage timing: while a `Trace` is active (the API middleware
+starts one per request, optimizer workers one per job), `span(name)` adds
+the time spent in its block to that trace; without one it does nothing.
+"""
+
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+BUCKETS_PER_OCTAVE = 32
+MIN_EXPONENT, MAX_EXPONENT = -30, 40  # ~1ns .. ~1e12; values outside are clamped
+QUANTILES = (0.5, 0.9, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.zeros = 0  # values <= 0
+        self.buckets: Dict[int, int] = {}
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        index = math.floor(math.log2(value) * BUCKETS_PER_OCTAVE)
+        return min(
+            max(index, MIN_EXPONENT * BUCKETS_PER_OCTAVE),
+            MAX_EXPONENT * BUCKETS_PER_OCTAVE,
+        )
+
+    def observe(self, value: float) -> None:
+        value = float(value)
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+            if value <= 0:
+                self.zeros += 1
+            else:
+                index = self._bucket(value)
+                self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1): the midpoint of its bucket, within [min, max]."""
+        with self._lock:
+            if self.count == 0:
+                return math.nan
+            rank = q * (self.count - 1)
+            seen = self.zeros
+            if rank < seen:
+                return min(max(0.0, self.min), self.max)
+            for index in sorted(self.buckets):
+                seen += self.buckets[index]
+                if rank < seen:
+                    value = 2 ** ((index + 0.5) / BUCKETS_PER_OCTAVE)
+                    return min(max(value, self.min), self.max)
+            return self.max
+
+    def state(self) -> dict:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "zeros": self.zeros,
+            "buckets": dict(self.buckets),
+        }
+
+    def take(self) -> Optional[dict]:
+        """State since the last take, then reset; None if nothing was observed."""
+        with self._lock:
+            state = self._state() if self.count else None
+            self.reset()
+            return state
+
+    def merge(self, state: dict) -> None:
+        with self._lock:
+            self.count += state["count"]
+            self.sum += state["sum"]
+            self.min = min(self.min, state["min"])
+            self.max = max(self.max, state["max"])
+            self.zeros += state["zeros"]
+            for index, n in state["buckets"].items():
+                self.buckets[index] = self.buckets.get(index, 0) + n
+
+
+class Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def take(self) -> Optional[float]:
+        with self._lock:
+            value, self.value = self.value, 0.0
+            return value or None
+
+    def merge(self, state: float) -> None:
+        self.inc(state)
+
+
+class Gauge:
+    """A set value, or `fn()` read at render time."""
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.fn = fn
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    @property
+    def value(self) -> float:
+        return float(self.fn()) if self.fn is not None else self._value
+
+
+class Timer:
+    """Observes elapsed seconds into a histogram; a context manager or a decorator."""
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self._starts = threading.local()
+
+    def __enter__(self):
+        self._starts.__dict__.setdefault("stack", []).append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._starts.stack.pop())
+        return False
+
+    def __call__(self, fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def timed_async(*args, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.histogram.observe(time.perf_counter() - t0)
+
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - t0)
+
+        return timed
+
+
+class Metrics:
     def __init__(self):
-        self.lock = threading.Lock()
-        self.calls = []
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Labels], object] = {}
+        self._kinds: Dict[str, type] = {}
+
+    def _get(self, kind: type, name: str, labels: Dict[str, object]):
+        key = (name, _label_key(labels))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                if self._kinds.setdefault(name, kind) is not kind:
+                    raise ValueError(
+                        f"Metric '{name}' is a {self._kinds[name].__name__}"
+                    )
+                series = self._series.setdefault(key, kind())
+        return series
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._get(Histogram, name, labels)
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def gauge(
+        self, name: str, fn: Optional[Callable[[], float]] = None, **labels
+    ) -> Gauge:
+        gauge = self._get(Gauge, name, labels)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def timer(self, name: str, **labels) -> Timer:
+        return Timer(self.histogram(name, **labels))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        self.histogram(name, **labels).observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        self.counter(name, **labels).inc(amount)
+
+    def series(self, name: str) -> List[Tuple[Dict[str, str], object]]:
+        return [
+            (dict(labels), s)
+            for (n, labels), s in list(self._series.items())
+            if n == name
+        ]
+
+    # ---------- Worker processes ----------
+
+    def drain(self) -> list:
+        """
+        Counter and histogram states since the last drain (picklable), then
+        reset them.
+        """
+        out = []
+        for (name, labels), series in list(self._series.items()):
+            state = None if isinstance(series, Gauge) else series.take()
+            if state is not None:
+                out.append((type(series).__name__, name, labels, state))
+        return out
+
+    def merge(self, drained: Iterable) -> None:
+        kinds = {"Histogram": Histogram, "Counter": Counter}
+        for kind, name, labels, state in drained:
+            self._get(kinds[kind], name, dict(labels)).merge(state)
+
+    # ---------- Exposition ----------
+
+    def render(self) -> str:
+        """All series in the Prometheus text format (0.0.4)."""
+        by_name: Dict[str, list] = {}
+        for (name, labels), series in sorted(
+            self._series.items(), key=lambda kv: kv[0]
+        ):
+            by_name.setdefault(name, []).append((labels, series))
+        lines = []
+        for name, entries in by_name.items():
+            kind = self._kinds[name]
+            lines.append(
+                f"# TYPE {name} "
+                + {Histogram: "summary", Counter: "counter", Gauge: "gauge"}[kind]
+            )
+            for labels, series in entries:
+                if kind is Histogram:
+                    for q in QUANTILES:
+                        lines.append(
+                            f"{name}{_format_labels(labels + (('quantile', str(q)),))} "
+                            f"{_format_value(series.quantile(q))}"
+                        )
+                    lines.append(
+                        f"{name}_sum{_format_labels(labels)} "
+                        f"{_format_value(series.sum)}"
+                    )
+                    lines.append(f"{name}_count{_format_labels(labels)} {series.count}")
+                else:
+                    try:
+                        value = series.value
+                    except (
+                        Exception
+                    ):  # a gauge callback failing must not break the scrape
+                        continue
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for _, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+metrics = Metrics()
+
+
+class APILogger:
+    """Provider call timings, recorded as `external_call_seconds{call=...}`."""
+
+    def __init__(self, registry: Metrics = metrics):
+        self.metrics = registry
 
     def log_call(self, name: str, duration: float):
         """Register one API call name and its duration (s)."""
-        with self.lock:
-            self.calls.append((name, duration))
+        self.metrics.observe("external_call_seconds", duration, call=name)
 
     def summary(self):
-        """Return count + 10/25/50/75/100-percentile timings."""
-        times = sorted(d for _, d in self.calls)
-
-        def pct(p):
-            idx = min(len(times) - 1, int(len(times) * p / 100))
-            return times[idx]
-
+        """Return count + 10/25/50/75/100-percentile timings over all calls."""
+        combined = Histogram()
+        for _, series in self.metrics.series("external_call_seconds"):
+            combined.merge(series.state())
+        if combined.count == 0:
+            return {"count": 0}
         return {
-            "count": len(times),
-            "10%": pct(10),
-            "25%": pct(25),
-            "50%": pct(50),
-            "75%": pct(75),
-            "100%": pct(100),
+            "count": combined.count,
+            "10%": combined.quantile(0.10),
+            "25%": combined.quantile(0.25),
+            "50%": combined.quantile(0.50),
+            "75%": combined.quantile(0.75),
+            "100%": combined.max,
         }
 
 
 api_logger = APILogger()
+
+
+# ---------- Per-request stages ----------
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    """Seconds spent per named stage of one request; repeated stages add up."""
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile  # whether stages should also capture a cProfile report
+        self.stages: Dict[str, List] = {}  # name -> [seconds, description]
+        self.profiles: Dict[str, str] = {}  # where it ran -> pstats text
+
+    def add(self, name: str, seconds: float, desc: Optional[str] = None) -> None:
+        stage = self.stages.setdefault(name, [0.0, None])
+        stage[0] += seconds
+        if desc is not None:
+            stage[1] = desc
+
+    def extend(self, stages: Sequence[Tuple[str, float, Optional[str]]]) -> None:
+        """Stages recorded elsewhere (an optimizer worker), as `export()` gives them."""
+        for name, seconds, desc in stages:
+            self.add(name, seconds, desc)
+
+    def export(self) -> List[Tuple[str, float, Optional[str]]]:
+        return [(name, seconds, desc) for name, (seconds, desc) in self.stages.items()]
+
+    def activate(self) -> contextvars.Token:
+        return _current_trace.set(self)
+
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class span:
+    """
+    `with span("hamiltonian"):` times a stage of the active trace; set `.desc`
+    to annotate it.
+    """
+
+    __slots__ = ("name", "desc", "_trace", "_t0")
+
+    def __init__(self, name: str, desc: Optional[str] = None):
+        self.name = name
+        self.desc = desc
+
+    def __enter__(self):
+        self._trace = _current_trace.get()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._trace is not None:
+            self._trace.add(self.name, time.perf_counter() - self._t0, self.desc)
+        return False
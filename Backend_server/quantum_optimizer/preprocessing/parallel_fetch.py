@@ -1,22 +1,42 @@
-import concurrent.futures
-from .fetch_data import fetch_and_cache
+import logging
 
+import pandas as pd
+from .fetch_engine import FetchEngine
+from .price_store import EPOCH, window_start
 
-def parallel_fetch(ticker_groups, outpaths, period="6mo", max_workers=4):
+logger = logging.getLogger(__name__)
+
+
+def parallel_fetch(
+    ticker_groups, outpaths=None, period="6mo", max_workers=4, store=None, engine=None
+):
     """
-    Run fetch_and_cache() on each ticker group in parallel.
+    Fetch every ticker group through one fetch engine run (batched downloads,
+    at most `max_workers` in flight), write each group's CSV to its outpath
+    and, with a `store` (a PriceStore), merge all of it into the store in one
+    write. Results are keyed by outpath, or by tuple(group) without outpaths;
+    a group none of whose tickers came back is left out, and every failed
+    ticker is logged.
     """
+    if outpaths is None:
+        outpaths = [None] * len(ticker_groups)
+    engine = engine or FetchEngine(concurrency=max_workers)
+    today = pd.Timestamp.today().normalize()
+    tickers = [t for grp in ticker_groups for t in grp]
+    report = engine.run(
+        engine.fetch_prices(tickers, window_start(today, period) or EPOCH, today)
+    )
+    report.log_failures(logger)
+
     results = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as exe:
-        futures = {
-            exe.submit(fetch_and_cache, grp, path, period): (grp, path)
-            for grp, path in zip(ticker_groups, outpaths)
-        }
-        for fut in concurrent.futures.as_completed(futures):
-            grp, path = futures[fut]
-            try:
-                df = fut.result()
-                results[path] = df
-            except Exception as e:
-                print(f"Error fetching {grp!r}: {e}")
+    for grp, path in zip(ticker_groups, outpaths):
+        got = [t for t in grp if t in report.prices.columns]
+        if not got:
+            continue
+        df = report.prices[got]
+        if path is not None:
+            df.to_csv(path)
+        results[path if path is not None else tuple(grp)] = df
+    if results and store is not None:
+        store.upsert(report.prices)
     return results
@@ -0,0 +1,325 @@
+"""
+Columnar price-history store: memory-mapped .npy files plus a JSON manifest.
+
+In data/prices:
+
+    manifest.json     {"generation", "tickers", "prices", "dates", "imported", ...}
+    prices-<gen>.npy  float64 (n_tickers, n_dates), one contiguous row per ticker
+    dates-<gen>.npy   datetime64[ns] (n_dates,), ascending
+
+Reads map the files instead of parsing text, and a ticker/date projection
+only touches the rows and columns it selects. Rolling windows ("6mo",
+"1y", ...) are resolved against the last stored date at read time, so the
+store itself only ever grows. Every write produces a new generation and then
+swaps the manifest with one atomic rename, so readers never see a
+half-written store.
+
+The store is generated, not versioned: `sync_csv` builds it from the price
+CSVs on first use, and from then on it is the source of prices. last6m.csv
+is imported again whenever it changes (the manifest keeps the mtime of each
+CSV it imported).
+
+    python -m preprocessing.price_store migrate    # import data/*.csv now
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .generations import MANIFEST, next_generation, read_manifest, save_atomic, sweep
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_STORE_DIR = DATA_DIR / "prices"
+FORMAT_VERSION = 1
+
+EPOCH = pd.Timestamp("1970-01-01")  # start of a "max" download
+
+_WINDOW = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_WINDOW_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+
+def window_start(last_date, window: Optional[str]) -> Optional[pd.Timestamp]:
+    """
+    First date of a yfinance-style window ("5d", "4wk", "6mo", "1y"; "max"
+    or None = everything) ending at `last_date`.
+    """
+    if window is None or window == "max":
+        return None
+    match = _WINDOW.match(window)
+    if match is None:
+        raise ValueError(
+            f"Invalid window '{window}', expected e.g. 5d, 4wk, 6mo, 1y or max"
+        )
+    count, unit = int(match.group(1)), _WINDOW_UNITS[match.group(2)]
+    return pd.Timestamp(last_date) - pd.DateOffset(**{unit: count})
+
+
+@dataclass(frozen=True)
+class PricePanel:
+    """A (possibly projected) read of the store."""
+
+    tickers: tuple
+    dates: np.ndarray  # datetime64[ns], (n_dates,)
+    values: np.ndarray  # float64, (n_tickers, n_dates); read-only
+
+    def frame(self) -> pd.DataFrame:
+        """Date × ticker DataFrame, the layout the CSVs had."""
+        return pd.DataFrame(
+            self.values.T,
+            index=pd.DatetimeIndex(self.dates, name="Date"),
+            columns=list(self.tickers),
+            copy=False,
+        )
+
+
+class PriceStore:
+    def __init__(self, path=DEFAULT_STORE_DIR):
+        self.path = Path(path)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / MANIFEST
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def manifest(self) -> dict:
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def mtime_ns(self) -> int:
+        """Changes on every write; used to detect a new generation."""
+        return os.stat(self.manifest_path).st_mtime_ns
+
+    # ---------- Reading ----------
+
+    def read(
+        self,
+        tickers: Optional[Sequence[str]] = None,
+        start=None,
+        end=None,
+        window: Optional[str] = None,
+    ) -> PricePanel:
+        """
+        Memory-mapped read. `tickers` projects rows (KeyError if unknown),
+        `start` / `end` (inclusive) project dates, and `window` (e.g. "6mo")
+        sets `start` relative to the last stored date. With no ticker
+        projection the values are the mapped file itself; otherwise only the
+        selection is copied.
+        """
+        manifest = self.manifest()
+        all_tickers = manifest["tickers"]
+        values = np.load(self.path / manifest["prices"], mmap_mode="r")
+        dates = np.load(self.path / manifest["dates"], mmap_mode="r")
+        if window is not None and len(dates):
+            start = window_start(dates[-1], window)
+
+        lo, hi = 0, len(dates)
+        if start is not None:
+            lo = int(
+                np.searchsorted(
+                    dates, np.datetime64(pd.Timestamp(start), "ns"), side="left"
+                )
+            )
+        if end is not None:
+            hi = int(
+                np.searchsorted(
+                    dates, np.datetime64(pd.Timestamp(end), "ns"), side="right"
+                )
+            )
+
+        if tickers is None:
+            names = tuple(all_tickers)
+            values = values[:, lo:hi]
+        else:
+            index = {t: i for i, t in enumerate(all_tickers)}
+            missing = [t for t in tickers if t not in index]
+            if missing:
+                raise KeyError(f"No price history for {missing}")
+            names = tuple(tickers)
+            values = np.ascontiguousarray(values[[index[t] for t in tickers], lo:hi])
+            values.flags.writeable = False
+        return PricePanel(names, np.asarray(dates[lo:hi]), np.asarray(values))
+
+    def frame(
+        self,
+        tickers: Optional[Sequence[str]] = None,
+        start=None,
+        end=None,
+        window: Optional[str] = None,
+    ) -> pd.DataFrame:
+        return self.read(tickers, start, end, window).frame()
+
+    def last_dates(self) -> Dict[str, Optional[pd.Timestamp]]:
+        """Last date with a price, per ticker (None if it has none)."""
+        panel = self.read()
+        finite = np.isfinite(panel.values)
+        has_any = finite.any(axis=1)
+        last = finite.shape[1] - 1 - np.argmax(finite[:, ::-1], axis=1)
+        return {
+            t: pd.Timestamp(panel.dates[i]) if ok else None
+            for t, i, ok in zip(panel.tickers, last, has_any)
+        }
+
+    # ---------- Writing ----------
+
+    def write(
+        self, frame: pd.DataFrame, imported: Optional[Dict[str, int]] = None
+    ) -> None:
+        """Replace the store with a date × ticker price frame."""
+        frame = frame.sort_index()
+        dates = (
+            pd.DatetimeIndex(frame.index)
+            .tz_localize(None)
+            .to_numpy(dtype="datetime64[ns]")
+        )
+        values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64).T)
+        self._write([str(t) for t in frame.columns], dates, values, imported)
+
+    def _write(
+        self,
+        tickers: Sequence[str],
+        dates: np.ndarray,
+        values: np.ndarray,
+        imported: Optional[
+            Dict[str, int]
+        ] = None,  # CSV name -> mtime_ns merged by this write
+    ) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        previous = read_manifest(self.path, FORMAT_VERSION)
+        generation = next_generation(previous)
+        manifest = {
+            "format": FORMAT_VERSION,
+            "generation": generation,
+            "tickers": list(tickers),
+            "prices": f"prices-{generation}.npy",
+            "dates": f"dates-{generation}.npy",
+            "first_date": str(dates[0])[:10] if len(dates) else None,
+            "last_date": str(dates[-1])[:10] if len(dates) else None,
+            "updated_at": time.time(),
+            "imported": {**(previous or {}).get("imported", {}), **(imported or {})},
+        }
+        save_atomic(self.path / manifest["prices"], values)
+        save_atomic(self.path / manifest["dates"], dates)
+        save_atomic(self.manifest_path, manifest)
+        sweep(self.path, generation, ("prices", "dates"))
+
+    def upsert(
+        self, frame: pd.DataFrame, imported: Optional[Dict[str, int]] = None
+    ) -> pd.DataFrame:
+        """
+        Merge a date × ticker frame into the store: new tickers and dates are
+        added, and where both have a price the new one wins. Returns the merged
+        frame. `imported` records the CSV files (name -> mtime_ns) it came from.
+        """
+        frame = frame.copy()
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        if not self.exists():
+            frame.index.name = "Date"
+            self.write(frame, imported)
+            return frame
+
+        # Merge on the arrays: align both onto the union of tickers and dates,
+        # then let every finite new price overwrite the stored one
+        old = self.read()
+        new_tickers = [str(t) for t in frame.columns]
+        tickers = list(old.tickers) + [
+            t for t in dict.fromkeys(new_tickers) if t not in set(old.tickers)
+        ]
+        new_dates = frame.index.to_numpy(dtype="datetime64[ns]")
+        dates = np.union1d(old.dates, new_dates)
+        row = {t: i for i, t in enumerate(tickers)}
+
+        values = np.full((len(tickers), len(dates)), np.nan)
+        values[: len(old.tickers), np.searchsorted(dates, old.dates)] = old.values
+        incoming = frame.to_numpy(dtype=np.float64).T
+        rows = np.fromiter(
+            (row[t] for t in new_tickers), dtype=np.intp, count=len(new_tickers)
+        )
+        cols = np.searchsorted(dates, new_dates)
+        target = values[rows[:, None], cols]
+        values[rows[:, None], cols] = np.where(np.isfinite(incoming), incoming, target)
+
+        self._write(tickers, dates, values, imported)
+        return PricePanel(tuple(tickers), dates, values).frame()
+
+
+def _read_price_csv(path: Path) -> pd.DataFrame:
+    frame = pd.read_csv(path, index_col=0, parse_dates=True)
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+    return frame.apply(pd.to_numeric, errors="coerce")
+
+
+def migrate_csv(
+    store: PriceStore,
+    csv_paths: Optional[Iterable[Path]] = None,
+    data_dir: Path = DATA_DIR,
+) -> pd.DataFrame:
+    """
+    One-shot import of CSV price files into `store`. By default: every
+    per-ticker `data/*.csv` first, then `last6m.csv`, so the newer combined
+    file wins on overlapping dates. fundamentals.csv is not price data.
+    """
+    if csv_paths is None:
+        per_ticker = sorted(
+            p
+            for p in Path(data_dir).glob("*.csv")
+            if p.name not in ("last6m.csv", "fundamentals.csv")
+        )
+        combined = Path(data_dir) / "last6m.csv"
+        csv_paths = per_ticker + ([combined] if combined.exists() else [])
+    merged, imported = None, {}
+    for path in csv_paths:
+        path = Path(path)
+        imported[path.name] = os.stat(path).st_mtime_ns
+        frame = _read_price_csv(path)
+        merged = frame if merged is None else frame.combine_first(merged)
+    if merged is None:
+        raise FileNotFoundError(f"No price CSVs found in {data_dir}")
+    return store.upsert(merged, imported)
+
+
+def sync_csv(store: PriceStore, data_dir: Path = DATA_DIR) -> bool:
+    """
+    Bring the price CSVs into `store`: all of them (migrate_csv) while the
+    store does not exist yet, and afterwards `last6m.csv` whenever its mtime
+    differs from the one last imported, its prices winning on overlapping
+    dates. True if anything was imported.
+    """
+    combined = Path(data_dir) / "last6m.csv"
+    if not store.exists():
+        try:
+            migrate_csv(store, data_dir=data_dir)
+        except FileNotFoundError:
+            return False
+        return True
+    if not combined.exists():
+        return False
+    stamp = os.stat(combined).st_mtime_ns
+    last = store.manifest().get("imported", {}).get(combined.name)
+    # a store written before imports were recorded: only a CSV newer than it
+    if stamp != last and (last is not None or stamp > store.mtime_ns()):
+        migrate_csv(store, [combined])
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["migrate"]:
+        sys.exit("usage: python -m preprocessing.price_store migrate [csv ...]")
+    store = PriceStore()
+    paths = [Path(p) for p in sys.argv[2:]] or None
+    merged = migrate_csv(store, paths)
+    print(
+        f"Migrated {merged.shape[1]} tickers × {merged.shape[0]} dates "
+        f"({merged.index[0].date()} .. {merged.index[-1].date()}) into {store.path}"
+    )
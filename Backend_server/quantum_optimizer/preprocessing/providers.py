@@ -0,0 +1,149 @@
+"""
+Market-data providers behind the fetch engine.
+
+A provider answers two kinds of request, both blocking:
+
+    download(tickers, start, end) -> date × ticker close prices (one batched call)
+    info(ticker)                  -> yfinance-style info dict (one call per ticker)
+
+`YFinanceProvider` is the real one. `StubProvider` serves local DataFrames
+with optional latency and injected failures, for offline runs and benchmarks.
+"""
+
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+from .logger import api_logger
+
+# fundamentals.csv column -> yfinance info key
+FUNDAMENTAL_FIELDS = {
+    "PE": "trailingPE",
+    "PB": "priceToBook",
+    "ROE": "returnOnEquity",
+    "Volume": "volume",
+    "EarningsDate": "earningsDate",
+    "EV/EBITDA": "enterpriseToEbitda",
+    "Beta": "beta",
+    "MarketCap": "marketCap",
+    "RevenueGrowth": "revenueGrowth",
+    "PEGRatio": "pegRatio",
+    "NetMargin": "profitMargins",
+    "FreeCF": "freeCashflow",
+    "OpMargin": "operatingMargins",
+    "P/S": "priceToSalesTrailing12Months",
+    "Payout": "payoutRatio",
+    "CurrRatio": "currentRatio",
+}
+
+
+def fundamentals_row(ticker: str, info: dict) -> dict:
+    """One fundamentals.csv row from a provider info dict."""
+    row = {"Ticker": ticker}
+    for column, key in FUNDAMENTAL_FIELDS.items():
+        if column == "EarningsDate":
+            row[column] = ";".join(map(str, info.get(key, [])))
+        else:
+            row[column] = info.get(key, None)
+    return row
+
+
+class PermanentFetchError(Exception):
+    """A failure that retrying will not fix (unknown ticker, bad request)."""
+
+
+class Provider(ABC):
+    @abstractmethod
+    def download(
+        self, tickers: Sequence[str], start: pd.Timestamp, end: pd.Timestamp
+    ) -> pd.DataFrame:
+        """Date × ticker close prices for `start` <= date <= `end`."""
+
+    @abstractmethod
+    def info(self, ticker: str) -> dict:
+        """Fundamentals of one ticker, keyed like yfinance's `Ticker.info`."""
+
+
+class YFinanceProvider(Provider):
+    def __init__(self, auto_adjust: bool = True):
+        self.auto_adjust = auto_adjust
+
+    def download(self, tickers, start, end):
+        import yfinance as yf
+
+        t0 = time.time()
+        # yfinance's end is exclusive
+        df = yf.download(
+            list(tickers),
+            start=start.strftime("%Y-%m-%d"),
+            end=(end + pd.Timedelta(days=1)).strftime("%Y-%m-%d"),
+            auto_adjust=self.auto_adjust,
+            progress=False,
+        )
+        api_logger.log_call("yfinance.download", time.time() - t0)
+        if df.empty:
+            return pd.DataFrame(columns=list(tickers), dtype="float64")
+        df = df["Close"] if "Close" in df.columns else df["Adj Close"]
+        if isinstance(df, pd.Series):
+            df = df.to_frame(name=tickers[0])
+        df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+        return df
+
+    def info(self, ticker):
+        import yfinance as yf
+
+        t0 = time.time()
+        info = yf.Ticker(ticker).info
+        api_logger.log_call("yfinance.Ticker.info", time.time() - t0)
+        if not info:
+            raise PermanentFetchError(f"No info for {ticker}")
+        return info
+
+
+class StubProvider(Provider):
+    """
+    Serves slices of local frames. `latency` seconds are spent per call,
+    and a `failure_rate` fraction of calls raise a transient ConnectionError.
+    Tickers missing from the frames are permanent failures for `info` and
+    simply absent from `download`, like yfinance.
+    """
+
+    def __init__(
+        self,
+        prices: Optional[pd.DataFrame] = None,
+        fundamentals: Optional[Dict[str, dict]] = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.prices = prices.sort_index() if prices is not None else pd.DataFrame()
+        self.fundamentals = fundamentals or {}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("stub: transient failure")
+
+    def download(self, tickers, start, end):
+        self._call()
+        known = [t for t in tickers if t in self.prices.columns]
+        return self.prices.loc[start:end, known]
+
+    def info(self, ticker):
+        self._call()
+        if ticker not in self.fundamentals:
+            raise PermanentFetchError(f"No info for {ticker}")
+        return dict(self.fundamentals[ticker])
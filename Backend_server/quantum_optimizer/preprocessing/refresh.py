@@ -0,0 +1,119 @@
+"""
+Incremental price refresh: fetch only the dates each ticker is missing.
+
+The last stored date of every ticker is read from the price store; tickers
+that share a start date are downloaded together for [last, today] through
+the fetch engine (batched, rate-limited, retried), and the rows are merged
+(deduplicated on date, the new price winning) into the store. The last
+stored day is fetched again because it may hold an intraday price from an
+earlier refresh. Tickers not yet in the store get `history` ("1y") of
+backfill. A daily refresh therefore moves two rows per ticker instead of
+the whole window.
+
+The engine's provider is pluggable, so a `StubProvider` over a local
+DataFrame can stand in for yfinance when there is no network.
+
+    python -m preprocessing.refresh [TICKER ...]    # default: tickers already stored
+"""
+
+import asyncio
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .fetch_engine import FetchEngine
+from .price_store import EPOCH, PriceStore, window_start
+from .providers import Provider
+
+
+@dataclass
+class RefreshReport:
+    tickers: int = 0
+    requests: int = 0
+    retries: int = 0
+    bytes: int = 0  # price payload received (float64 values + date index)
+    rows: Dict[str, int] = field(default_factory=dict)  # new dates stored per ticker
+    up_to_date: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.tickers} tickers, {len(self.up_to_date)} already current, "
+            f"{sum(self.rows.values())} rows in {self.requests} requests "
+            f"({self.bytes / 1024:.1f} KiB), {len(self.failed)} failed, "
+            f"{self.seconds:.2f}s"
+        )
+
+
+def refresh_prices(
+    tickers: Optional[Sequence[str]] = None,
+    store: Optional[PriceStore] = None,
+    provider: Optional[Provider] = None,
+    history: str = "1y",
+    today=None,
+    engine: Optional[FetchEngine] = None,
+) -> RefreshReport:
+    """
+    Bring `tickers` (default: everything in the store) up to `today` in
+    `store` (default data/prices), downloading through `engine` (default: a
+    FetchEngine over `provider`, itself yfinance by default). Tickers that
+    fail after retries are reported and skipped; whatever did arrive is stored.
+    """
+    t0 = time.perf_counter()
+    store = store or PriceStore()
+    engine = engine or FetchEngine(provider)
+    today = pd.Timestamp(
+        today if today is not None else pd.Timestamp.today()
+    ).normalize()
+    last = store.last_dates() if store.exists() else {}
+    tickers = list(dict.fromkeys(tickers if tickers is not None else last))
+    report = RefreshReport(tickers=len(tickers))
+
+    backfill = window_start(today, history) or EPOCH
+    by_start = defaultdict(list)
+    for t in tickers:
+        start = last[t] if last.get(t) is not None else backfill
+        if start > today:
+            report.up_to_date.append(t)
+        else:
+            by_start[start].append(t)
+
+    async def fetch_all():
+        return await asyncio.gather(
+            *(
+                engine.fetch_prices(group, start, today)
+                for start, group in sorted(by_start.items())
+            )
+        )
+
+    frames = []
+    for fetched in (engine.run(fetch_all()) if by_start else []):
+        report.requests += fetched.requests
+        report.retries += fetched.retries
+        report.failed.update({t: f.error for t, f in fetched.failures.items()})
+        report.rows.update({t: 0 for t in fetched.empty})
+        df = fetched.prices
+        if not df.empty:
+            report.bytes += df.size * 8 + len(df.index) * 8
+            for t in df.columns:
+                # the refetched last day is not a new row
+                new = df[t] if last.get(t) is None else df[t][df.index > last[t]]
+                report.rows[t] = int(new.notna().sum())
+            frames.append(df)
+
+    if frames:
+        store.upsert(pd.concat(frames, axis=1))
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+if __name__ == "__main__":
+    report = refresh_prices(sys.argv[1:] or None)
+    print(report.summary())
+    for ticker, error in report.failed.items():
+        print(f"  {ticker}: {error}")
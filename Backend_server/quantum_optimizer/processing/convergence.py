@@ -0,0 +1,117 @@
+"""
+Convergence control for VQE: optimizer choice, early stopping and a
+wall-clock budget.
+
+`ConvergenceMonitor` sees every energy evaluation. It groups evaluations
+into iterations (an SPSA step costs two, a COBYLA step one, an L-BFGS-B
+step one plus a finite-difference gradient) and raises `ConvergenceStop`
+when either
+
+  * the best energy improved by less than `rtol` (relative) over the last
+    `window` iterations, or
+  * `time_budget` seconds have passed since the run started.
+
+run_vqe catches the stop and reports the best point seen so far.
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+from qiskit_algorithms.optimizers import COBYLA, L_BFGS_B, SPSA
+
+OPTIMIZERS = ("spsa", "cobyla", "l-bfgs-b")
+
+# Optimizers that need the cheap statevector estimator (many evaluations per step)
+STATEVECTOR_ONLY = ("l-bfgs-b",)
+
+# Evaluations SPSA spends calibrating its learning rate / perturbation (25 steps × 2)
+SPSA_CALIBRATION_EVALS = 50
+
+STOP_MAXITER = "maxiter"  # ran the optimizer's full iteration count
+STOP_OPTIMIZER = "optimizer"  # optimizer's own convergence criterion
+STOP_CONVERGED = "converged"  # energy plateaued over the sliding window
+STOP_TIME_BUDGET = "time_budget"
+
+
+class ConvergenceStop(Exception):
+    """Raised from the energy callback to end the optimization early."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def make_optimizer(
+    name: str, maxiter: int, num_parameters: int, calibrate: bool = False
+):
+    """
+    The qiskit optimizer for `name`. SPSA keeps the historical fixed
+    learning rate / perturbation unless `calibrate` is set. L-BFGS-B
+    evaluates its finite-difference gradient as one batch.
+    """
+    if name == "spsa":
+        if calibrate:
+            return SPSA(maxiter=maxiter)
+        return SPSA(maxiter=maxiter, learning_rate=0.01, perturbation=0.01)
+    if name == "cobyla":
+        return COBYLA(maxiter=maxiter)
+    if name == "l-bfgs-b":
+        return L_BFGS_B(maxiter=maxiter, max_evals_grouped=num_parameters)
+    raise ValueError(f"Unknown optimizer '{name}', expected one of {OPTIMIZERS}")
+
+
+def evaluations_per_iteration(name: str, num_parameters: int) -> int:
+    return {"spsa": 2, "cobyla": 1, "l-bfgs-b": num_parameters + 1}[name]
+
+
+class ConvergenceMonitor:
+    def __init__(
+        self,
+        evals_per_iteration: int = 1,
+        window: int = 10,
+        rtol: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        warmup_evals: int = 0,
+    ):
+        self.evals_per_iteration = evals_per_iteration
+        self.window = window
+        self.rtol = rtol
+        self.time_budget = time_budget
+        self.warmup_evals = warmup_evals
+        self.started = time.perf_counter()
+        self.evaluations = 0
+        self.best_energy = np.inf
+        self.best_point: Optional[np.ndarray] = None
+        # best energy at the end of every completed iteration
+        self._history = []
+
+    @property
+    def iterations(self) -> int:
+        return len(self._history)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def update(self, point, energy: float) -> None:
+        """Record one evaluation; raises ConvergenceStop when the run should end."""
+        self.evaluations += 1
+        if energy < self.best_energy:
+            self.best_energy = float(energy)
+            self.best_point = np.array(point, dtype=np.float64)
+
+        if self.time_budget is not None and self.elapsed >= self.time_budget:
+            raise ConvergenceStop(STOP_TIME_BUDGET)
+
+        counted = self.evaluations - self.warmup_evals
+        if counted <= 0 or counted % self.evals_per_iteration:
+            return
+        self._history.append(self.best_energy)
+        if self.rtol is not None and len(self._history) > self.window:
+            before = self._history[-1 - self.window]
+            improvement = (before - self.best_energy) / max(
+                abs(self.best_energy), 1e-12
+            )
+            if improvement < self.rtol:
+                raise ConvergenceStop(STOP_CONVERGED)
@@ -0,0 +1,267 @@
+"""
+Statevector estimator specialised for diagonal (Z-only) Hamiltonians.
+
+The reference `qiskit.primitives.Estimator` binds parameters into a new
+circuit and simulates it from scratch for every evaluation. This estimator
+compiles each circuit once into a short list of NumPy operations (batched RY
+rotations, basis permutations for CX chains, sign flips), runs all parameter
+sets of a call together, and takes
+
+    <H> = |ψ|² · diag(H)
+
+with diag(H) computed once per observable. Circuits with unsupported gates
+and non-diagonal observables fall back to exact Statevector simulation.
+"""
+
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qiskit.circuit import Parameter, QuantumCircuit
+from qiskit.primitives import BaseEstimator, EstimatorResult
+from qiskit.primitives.primitive_job import PrimitiveJob
+from qiskit.primitives.utils import _circuit_key, _observable_key, init_observable
+from qiskit.quantum_info import SparsePauliOp, Statevector
+
+from .solvers import EXACT_CHUNK, _spins, ising_energies
+
+_SKIP = {"barrier", "delay", "id"}
+_PERMUTATIONS = {"cx", "x", "swap"}
+_FIXED = {
+    "h": np.array([[1.0, 1.0], [1.0, -1.0]]) / np.sqrt(2.0),
+    "z": np.array([[1.0, 0.0], [0.0, -1.0]]),
+}
+
+
+class _ImmediateJob(PrimitiveJob):
+    """Runs in the caller's thread: no executor round-trip per evaluation."""
+
+    def submit(self):
+        future = Future()
+        try:
+            future.set_result(self._function(*self._args, **self._kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        self._future = future
+
+
+def _apply_1q(state: np.ndarray, n: int, qubit: int, m00, m01, m10, m11) -> np.ndarray:
+    """Apply a real 2x2 gate (scalars or per-batch arrays) to `qubit`."""
+    view = state.reshape(len(state), 1 << (n - 1 - qubit), 2, 1 << qubit)
+    a0, a1 = view[:, :, 0, :], view[:, :, 1, :]
+    out = np.empty_like(view)
+    out[:, :, 0, :] = m00 * a0 + m01 * a1
+    out[:, :, 1, :] = m10 * a0 + m11 * a1
+    return out.reshape(state.shape)
+
+
+class _CompiledCircuit:
+    """A parameterized circuit reduced to batched real NumPy operations."""
+
+    def __init__(self, circuit: QuantumCircuit):
+        self.circuit = circuit  # simulated as is when `ops` ends up None
+        self.num_qubits = n = circuit.num_qubits
+        self.parameters = list(circuit.parameters)
+        index = {p: i for i, p in enumerate(self.parameters)}
+        self.ops: Optional[list] = []
+        perm = np.arange(1 << n)
+        basis = np.arange(1 << n)
+
+        def flush():
+            nonlocal perm
+            if not np.array_equal(perm, basis):
+                self.ops.append(("perm", perm))
+                perm = basis.copy()
+
+        flat = circuit
+        while any(
+            inst.operation.name
+            not in _SKIP | _PERMUTATIONS | set(_FIXED) | {"ry", "cz"}
+            and inst.operation.definition is not None
+            for inst in flat.data
+        ):
+            flat = flat.decompose()
+
+        for inst in flat.data:
+            op = inst.operation
+            qubits = [flat.find_bit(q).index for q in inst.qubits]
+            if op.name in _SKIP:
+                continue
+            if op.name in _PERMUTATIONS:
+                # new_state[i] = state[src(i)], composed into one gather
+                if op.name == "x":
+                    src = basis ^ (1 << qubits[0])
+                elif op.name == "cx":
+                    c, t = qubits
+                    src = np.where(basis >> c & 1, basis ^ (1 << t), basis)
+                else:
+                    a, b = qubits
+                    differ = (basis >> a & 1) != (basis >> b & 1)
+                    src = np.where(differ, basis ^ (1 << a) ^ (1 << b), basis)
+                perm = perm[src]
+                continue
+            flush()
+            if op.name == "ry":
+                (theta,) = op.params
+                if isinstance(theta, Parameter) and theta in index:
+                    self.ops.append(("ry", qubits[0], index[theta], None))
+                elif not getattr(theta, "parameters", None):
+                    self.ops.append(("ry", qubits[0], None, float(theta)))
+                else:
+                    self.ops = None  # parameter expressions: use the fallback
+                    return
+            elif op.name == "cz":
+                a, b = qubits
+                self.ops.append(
+                    ("sign", np.where((basis >> a & 1) & (basis >> b & 1), -1.0, 1.0))
+                )
+            elif op.name in _FIXED:
+                self.ops.append(("fixed", qubits[0], _FIXED[op.name]))
+            else:
+                self.ops = None
+                return
+        flush()
+
+    def statevectors(self, values: np.ndarray) -> np.ndarray:
+        """Real statevectors, shape (B, 2^n), for a batch of parameter sets."""
+        n = self.num_qubits
+        state = np.zeros((len(values), 1 << n))
+        state[:, 0] = 1.0
+        for op in self.ops:
+            kind = op[0]
+            if kind == "perm":
+                state = state[:, op[1]]
+            elif kind == "sign":
+                state = state * op[1]
+            elif kind == "ry":
+                _, qubit, param, fixed = op
+                half = (
+                    values[:, param]
+                    if param is not None
+                    else np.full(len(values), fixed)
+                ) / 2
+                c, s = np.cos(half)[:, None, None], np.sin(half)[:, None, None]
+                state = _apply_1q(state, n, qubit, c, -s, s, c)
+            else:
+                m = op[2]
+                state = _apply_1q(state, n, op[1], m[0, 0], m[0, 1], m[1, 0], m[1, 1])
+        return state
+
+
+class _CompiledObservable:
+    """Diagonal of a Z-only observable, or a sparse matrix otherwise."""
+
+    def __init__(self, observable: SparsePauliOp):
+        self.observable = observable
+        self.diagonal: Optional[np.ndarray] = None
+        self.matrix = None
+        if not observable.paulis.x.any():
+            self.diagonal = _z_diagonal(observable)
+        else:
+            self.matrix = observable.to_matrix(sparse=True)
+
+    def expectation(self, states: np.ndarray) -> np.ndarray:
+        if self.diagonal is not None:
+            return np.abs(states) ** 2 @ self.diagonal
+        return np.real(np.einsum("bi,bi->b", states.conj(), (self.matrix @ states.T).T))
+
+
+def _z_diagonal(observable: SparsePauliOp) -> np.ndarray:
+    """diag(H) over all basis states, for H made of I / Z / ZZ... terms."""
+    n = observable.num_qubits
+    z = observable.paulis.z
+    coeffs = np.real(observable.coeffs)
+    weight = z.sum(axis=1)
+    total = 1 << n
+    if weight.max(initial=0) <= 2:
+        # Ising form: offset + h·s + Σ J_qr s_q s_r over spins of every basis state
+        offset = coeffs[weight == 0].sum()
+        h = np.zeros(n)
+        J = np.zeros((n, n))
+        for term, c in zip(z[weight == 1], coeffs[weight == 1]):
+            h[np.flatnonzero(term)[0]] += c
+        for term, c in zip(z[weight == 2], coeffs[weight == 2]):
+            q, r = np.flatnonzero(term)
+            J[q, r] += c
+        diagonal = np.empty(total)
+        for start in range(0, total, EXACT_CHUNK):
+            stop = min(start + EXACT_CHUNK, total)
+            diagonal[start:stop] = ising_energies(
+                offset, h, J, _spins(np.arange(start, stop), n)
+            )
+        return diagonal
+    basis = np.arange(total)
+    diagonal = np.zeros(total)
+    for term, c in zip(z, coeffs):
+        parity = np.zeros(total, dtype=np.int64)
+        for q in np.flatnonzero(term):
+            parity ^= basis >> q & 1
+        diagonal += c * (1 - 2 * parity)
+    return diagonal
+
+
+class DiagonalStatevectorEstimator(BaseEstimator[PrimitiveJob[EstimatorResult]]):
+    """
+    Exact (shot-free) estimator; drop-in replacement for
+    `qiskit.primitives.Estimator()` in VQE.
+    """
+
+    def __init__(self, *, options: Optional[dict] = None):
+        super().__init__(options=options)
+        self._compiled_circuits: Dict[tuple, _CompiledCircuit] = {}
+        self._compiled_observables: Dict[tuple, _CompiledObservable] = {}
+
+    def _circuit(self, circuit: QuantumCircuit) -> _CompiledCircuit:
+        key = _circuit_key(circuit)
+        compiled = self._compiled_circuits.get(key)
+        if compiled is None:
+            compiled = self._compiled_circuits[key] = _CompiledCircuit(circuit)
+        return compiled
+
+    def _observable(self, observable) -> _CompiledObservable:
+        observable = init_observable(observable)
+        key = _observable_key(observable)
+        compiled = self._compiled_observables.get(key)
+        if compiled is None:
+            compiled = self._compiled_observables[key] = _CompiledObservable(observable)
+        return compiled
+
+    def _run(self, circuits, observables, parameter_values, **run_options):
+        compiled = [
+            (self._circuit(c), self._observable(o))
+            for c, o in zip(circuits, observables)
+        ]
+        job = _ImmediateJob(self._call, compiled, parameter_values)
+        job.submit()
+        return job
+
+    def _call(
+        self,
+        compiled: List[Tuple[_CompiledCircuit, _CompiledObservable]],
+        parameter_values: Sequence[Sequence[float]],
+    ) -> EstimatorResult:
+        values = np.zeros(len(compiled))
+        groups: Dict[tuple, List[int]] = {}
+        for i, (circ, obs) in enumerate(compiled):
+            groups.setdefault((id(circ), id(obs)), []).append(i)
+
+        for members in groups.values():
+            circ, obs = compiled[members[0]]
+            batch = np.array([parameter_values[i] for i in members], dtype=np.float64)
+            batch = batch.reshape(len(members), len(circ.parameters))
+            if circ.ops is not None:
+                states = circ.statevectors(batch)
+            else:
+                states = np.array(
+                    [
+                        Statevector(
+                            circ.circuit.assign_parameters(
+                                dict(zip(circ.parameters, row))
+                            )
+                        ).data
+                        for row in batch
+                    ]
+                )
+            values[members] = obs.expectation(states)
+
+        return EstimatorResult(values, [{} for _ in compiled])
@@ -0,0 +1,259 @@
+"""
+Classical mean-variance (Markowitz) efficient frontier, for a whole ticker set
+in one call.
+
+Every frontier point solves, for a trade-off t ≥ 0,
+
+    maximize  t·μᵀw − ½·wᵀΣw   subject to  Σ_i w_i = 1  (and w ≥ 0 when long-only)
+
+t = 0 is the minimum-variance portfolio and, long-only, a large enough t is
+the single highest-return asset. All points are solved together:
+
+    long-only   accelerated projected gradient (FISTA) on a (K, n) batch of
+                weights, projecting each row onto the simplex
+    shorting    closed form through Σ⁻¹ (the two-fund theorem)
+
+Long-only weights are piecewise linear in t, so after a first pass over a
+grid of t the second pass re-solves at the t values of (close to) evenly
+spaced returns, warm-started from interpolated weights. The maximum-Sharpe
+portfolio is refined the same way, on two finer grids around the best point.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_POINTS = 50
+MAX_ITERATIONS = 5000
+TOLERANCE = 1e-9  # largest weight change of an iteration at convergence
+CHECK_EVERY = 10
+ZOOM_POINTS = 16  # per refinement of the maximum-Sharpe portfolio
+
+
+@dataclass
+class Frontier:
+    """Frontier points (rows) with the two portfolios every plot marks."""
+
+    weights: np.ndarray  # (K, n), rows sum to 1, by increasing return
+    returns: np.ndarray
+    risks: np.ndarray
+    sharpe: np.ndarray
+    min_variance: np.ndarray  # (n,) weights
+    max_sharpe: np.ndarray
+    iterations: int = 0  # projected-gradient iterations, over every pass
+    converged: bool = True
+
+
+def project_simplex(v: np.ndarray) -> np.ndarray:
+    """Euclidean projection of each row of `v` (K, n) onto {w : w ≥ 0, Σ w = 1}."""
+    n = v.shape[1]
+    u = np.sort(v, axis=1)[:, ::-1]
+    css = np.cumsum(u, axis=1)
+    css -= 1.0
+    # number of positive entries: the last k with u_k > (css_k / k)
+    rho = np.count_nonzero(u * np.arange(1, n + 1) > css, axis=1)
+    theta = css[np.arange(len(v)), rho - 1] / rho
+    return np.maximum(v - theta[:, None], 0.0)
+
+
+def _fista(mu, cov, t, w0, lipschitz, tol=TOLERANCE, max_iter=MAX_ITERATIONS):
+    """Solve the long-only problem for every t at once, from the rows of w0."""
+    step = 1.0 / lipschitz
+    pull = step * t[:, None] * mu  # the (constant) return part of each gradient step
+    w = y = w0
+    momentum = np.ones(len(t))
+    for it in range(1, max_iter + 1):
+        w_next = project_simplex(y + pull - step * (y @ cov))
+        next_momentum = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * momentum * momentum))
+        beta = (momentum - 1.0) / next_momentum
+        # a row that moved against its last step restarts its momentum
+        restart = np.einsum("ki,ki->k", y - w_next, w_next - w) > 0
+        beta[restart], next_momentum[restart] = 0.0, 1.0
+        y = w_next + beta[:, None] * (w_next - w)
+        momentum = next_momentum
+        if it % CHECK_EVERY == 0 and np.max(np.abs(w_next - w)) < tol:
+            return w_next, it, True
+        w = w_next
+    return w, max_iter, False
+
+
+def _largest_trade_off(mu: np.ndarray, cov: np.ndarray) -> float:
+    """Smallest t at which the highest-return asset alone is optimal (long-only)."""
+    top = int(np.argmax(mu))
+    gap = mu[top] - mu
+    below = gap > 1e-12 * max(1.0, abs(mu[top]))
+    if not below.any():
+        return 1.0  # every return equal: the frontier is the minimum-variance point
+    # KKT at w = e_top: t·(μ_top − μ_i) ≥ Σ_top,top − Σ_top,i for every other asset
+    return (
+        float(max(np.max((cov[top, top] - cov[top, below]) / gap[below]), 0.0)) * 1.0001
+        + 1e-12
+    )
+
+
+def _metrics(weights, mu, cov, risk_free_rate):
+    returns = weights @ mu
+    risks = np.sqrt(np.maximum(np.einsum("ki,ij,kj->k", weights, cov, weights), 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(risks > 0, (returns - risk_free_rate) / risks, np.nan)
+    return returns, risks, sharpe
+
+
+def _at_returns(targets, t, returns, weights):
+    """t and warm-start weights of target returns, interpolated from solved points."""
+    # returns are non-decreasing in t; drop the flat stretches np.interp can't invert
+    keep = np.concatenate(([True], np.diff(returns) > 0))
+    t_k, r_k, w_k = t[keep], returns[keep], weights[keep]
+    if len(r_k) == 1:
+        return np.full(len(targets), t_k[0]), np.repeat(w_k, len(targets), axis=0)
+    pos = np.clip(np.searchsorted(r_k, targets) - 1, 0, len(r_k) - 2)
+    frac = np.clip((targets - r_k[pos]) / (r_k[pos + 1] - r_k[pos]), 0.0, 1.0)
+    t_new = t_k[pos] + frac * (t_k[pos + 1] - t_k[pos])
+    w_new = w_k[pos] + frac[:, None] * (w_k[pos + 1] - w_k[pos])
+    return t_new, w_new
+
+
+def _zoom(t, weights, sharpe, size=ZOOM_POINTS):
+    """t and interpolated warm starts spanning the neighbours of the best Sharpe."""
+    k = int(np.nanargmax(sharpe))
+    lo, hi = max(k - 1, 0), min(k + 1, len(t) - 1)
+    frac = np.linspace(0.0, 1.0, size)
+    return t[lo] + frac * (t[hi] - t[lo]), weights[lo] + frac[:, None] * (
+        weights[hi] - weights[lo]
+    )
+
+
+def _long_only(mu, cov, points, risk_free_rate, tol, max_iter) -> Frontier:
+    n = len(mu)
+    lipschitz = float(np.linalg.eigvalsh(cov)[-1]) or 1.0
+    t_max = _largest_trade_off(mu, cov)
+
+    # pass 1: the shape of the returns curve. Most of it lies at small t (the top
+    # asset can need a huge t when another return is close to its own), so the grid
+    # is geometric
+    t = np.concatenate(([0.0], np.geomspace(t_max * 1e-4, t_max, points - 1)))
+    weights, iterations, converged = _fista(
+        mu, cov, t, np.full((points, n), 1.0 / n), lipschitz, tol, max_iter
+    )
+    returns = weights @ mu
+
+    # pass 2: evenly spaced returns, from the minimum-variance one up to the top asset
+    targets = np.linspace(returns[0], returns[-1], points)
+    t, warm = _at_returns(targets, t, returns, weights)
+    weights, it, ok = _fista(mu, cov, t, warm, lipschitz, tol, max_iter)
+    iterations, converged = iterations + it, converged and ok
+    returns, risks, sharpe = _metrics(weights, mu, cov, risk_free_rate)
+
+    # max Sharpe: unimodal along the frontier; zoom in twice around the best point
+    best_t, best_w, best_sharpe = t, weights, sharpe
+    for _ in range(2):
+        if not np.isfinite(best_sharpe).any():
+            break
+        best_t, best_w = _zoom(best_t, best_w, best_sharpe)
+        best_w, it, ok = _fista(mu, cov, best_t, best_w, lipschitz, tol, max_iter)
+        iterations, converged = iterations + it, converged and ok
+        best_sharpe = _metrics(best_w, mu, cov, risk_free_rate)[2]
+    k = int(np.nanargmax(best_sharpe)) if np.isfinite(best_sharpe).any() else 0
+
+    return Frontier(
+        weights,
+        returns,
+        risks,
+        sharpe,
+        min_variance=weights[0],
+        max_sharpe=best_w[k],
+        iterations=iterations,
+        converged=converged,
+    )
+
+
+def _unconstrained(mu, cov, points, risk_free_rate) -> Frontier:
+    n = len(mu)
+    ones = np.ones(n)
+    inv_mu, inv_ones = np.linalg.solve(cov, np.column_stack([mu, ones])).T
+    min_variance = inv_ones / inv_ones.sum()
+    # every frontier portfolio is min-variance + t·(Σ⁻¹μ − (1ᵀΣ⁻¹μ)·min-variance)
+    direction = inv_mu - inv_mu.sum() * min_variance
+    r_min, r_top = float(min_variance @ mu), float(np.max(mu))
+    slope = float(direction @ mu)
+    if slope > 1e-12 and r_top > r_min:
+        t = np.linspace(0.0, (r_top - r_min) / slope, points)
+    else:
+        t = np.zeros(points)
+    weights = min_variance + t[:, None] * direction
+    returns, risks, sharpe = _metrics(weights, mu, cov, risk_free_rate)
+
+    excess = inv_mu - risk_free_rate * inv_ones  # Σ⁻¹(μ − r_f·1)
+    if excess.sum() > 0:
+        max_sharpe = excess / excess.sum()
+    else:
+        # r_f at or above the minimum-variance return: no tangency portfolio,
+        # report the best point of the frontier instead
+        max_sharpe = (
+            weights[int(np.nanargmax(sharpe))]
+            if np.isfinite(sharpe).any()
+            else min_variance
+        )
+    return Frontier(
+        weights,
+        returns,
+        risks,
+        sharpe,
+        min_variance=min_variance,
+        max_sharpe=max_sharpe,
+    )
+
+
+def efficient_frontier(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    points: int = DEFAULT_POINTS,
+    risk_free_rate: float = 0.0,
+    long_only: bool = True,
+    tol: float = TOLERANCE,
+    max_iter: int = MAX_ITERATIONS,
+) -> Frontier:
+    """
+    `points` frontier portfolios of the assets with mean returns `mu` and
+    covariance `cov` (same units as `risk_free_rate`), evenly spaced in
+    return from the minimum-variance portfolio up to the highest-return asset.
+    """
+    mu = np.asarray(mu, dtype=np.float64).ravel()
+    cov = np.asarray(cov, dtype=np.float64)
+    if cov.shape != (len(mu), len(mu)):
+        raise ValueError(f"cov has shape {cov.shape}, expected {(len(mu), len(mu))}")
+    if not (np.isfinite(mu).all() and np.isfinite(cov).all()):
+        raise ValueError("mu and cov must be finite")
+    if points < 2:
+        raise ValueError("points must be at least 2")
+    if long_only:
+        return _long_only(mu, cov, points, risk_free_rate, tol, max_iter)
+    try:
+        return _unconstrained(mu, cov, points, risk_free_rate)
+    except np.linalg.LinAlgError:
+        raise ValueError(
+            "Covariance matrix is singular: the frontier with short sales is undefined"
+        )
+
+
+def portfolio_metrics(
+    weights: np.ndarray,
+    mu: np.ndarray,
+    cov: np.ndarray,
+    risk_free_rate: float = 0.0,
+    frontier: Optional[Frontier] = None,
+) -> dict:
+    """Return, risk and Sharpe ratio of one portfolio; with `frontier`, also the
+    efficient return at the same risk (what the portfolio leaves on the table)."""
+    weights = np.asarray(weights, dtype=np.float64)
+    ret, risk, sharpe = (
+        float(x[0]) for x in _metrics(weights[None], mu, cov, risk_free_rate)
+    )
+    out = {"return": ret, "risk": risk, "sharpe": sharpe}
+    if frontier is not None:
+        order = np.argsort(frontier.risks, kind="stable")
+        out["efficient_return"] = float(
+            np.interp(risk, frontier.risks[order], frontier.returns[order])
+        )
+    return out
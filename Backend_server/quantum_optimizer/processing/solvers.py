@@ -0,0 +1,184 @@
+"""
+Classical solvers for the portfolio Ising Hamiltonian.
+
+The Hamiltonian from `create_hamiltonian` only has Z and ZZ terms, so it is
+diagonal in the computational basis:
+
+    E(s) = offset + Σ_i h_i s_i + Σ_{i<j} J_ij s_i s_j,   s_i = ±1
+
+and can be minimized without a quantum circuit. Spin s_i = +1 (qubit |0>)
+means asset i is selected; the selected assets share the budget equally.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+SOLVERS = ("vqe", "exact", "annealing", "auto")
+
+# stop_reason of the classical solvers: every state enumerated / annealing schedule
+# run to its end
+STOP_EXACT = "exact"
+STOP_ANNEALING = "annealing"
+
+# Largest basket solved by full enumeration (2^20 states)
+EXACT_MAX_ASSETS = 20
+EXACT_CHUNK = 1 << 16
+
+ANNEALING_SWEEPS = 300
+ANNEALING_REPLICAS = 32
+
+
+@dataclass
+class SolverResult:
+    """Mirrors the fields of a VQE result that callers read."""
+
+    eigenvalue: float
+    bitstring: str  # qubit values in label order: character i is asset i
+    selection: np.ndarray
+    cost_function_evals: int
+    optimizer_time: float
+    solver: str
+    iterations: int = 0
+    stop_reason: str = "maxiter"
+    optimal_point: Optional[np.ndarray] = field(default=None, repr=False)
+    # the optimum selected no asset; the weights are the equal-weight fallback
+    empty_selection: bool = False
+
+
+def choose_solver(n: int) -> str:
+    """Solver used for `solver="auto"`: exact enumeration while it is cheap."""
+    return "exact" if n <= EXACT_MAX_ASSETS else "annealing"
+
+
+def ising_energies(
+    offset: float, h: np.ndarray, J: np.ndarray, spins: np.ndarray
+) -> np.ndarray:
+    """Energies of a batch of spin configurations, shape (B, n) -> (B,)."""
+    return offset + spins @ h + np.einsum("bi,bi->b", spins @ J, spins)
+
+
+def _spins(states: np.ndarray, n: int) -> np.ndarray:
+    # bit i of the state index -> asset i; bit 0 -> spin +1
+    bits = (states[:, None] >> np.arange(n)) & 1
+    return 1.0 - 2.0 * bits
+
+
+def solve_exact(offset, h, J, callback: Optional[Callable[[int, float], None]] = None):
+    """Minimize by evaluating every spin configuration, in chunks."""
+    n = len(h)
+    if n > EXACT_MAX_ASSETS:
+        raise ValueError(
+            f"Exact solver supports at most {EXACT_MAX_ASSETS} assets, got {n}"
+        )
+    total = 1 << n
+    best_energy, best_spins = np.inf, None
+    for start in range(0, total, EXACT_CHUNK):
+        spins = _spins(
+            np.arange(start, min(start + EXACT_CHUNK, total), dtype=np.int64), n
+        )
+        energies = ising_energies(offset, h, J, spins)
+        k = int(np.argmin(energies))
+        if energies[k] < best_energy:
+            best_energy, best_spins = float(energies[k]), spins[k]
+        if callback is not None:
+            callback(min(start + EXACT_CHUNK, total), best_energy)
+    return best_spins, best_energy, total
+
+
+def solve_annealing(
+    offset,
+    h,
+    J,
+    seed: Optional[int] = None,
+    sweeps: int = ANNEALING_SWEEPS,
+    replicas: int = ANNEALING_REPLICAS,
+    callback: Optional[Callable[[int, float], None]] = None,
+):
+    """
+    Simulated annealing with single-spin Metropolis updates, run on
+    `replicas` independent chains at once. Returns the best state seen.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(h)
+    Jsym = J + J.T
+    spins = rng.choice([-1.0, 1.0], size=(replicas, n))
+    fields = h + spins @ Jsym  # dE/ds_i for every replica
+
+    scale = float(np.max(np.abs(h) + np.abs(Jsym).sum(axis=1))) or 1.0
+    betas = np.geomspace(0.1 / scale, 10.0 / scale, sweeps)
+
+    energies = ising_energies(offset, h, J, spins)
+    best = int(np.argmin(energies))
+    best_energy, best_spins = float(energies[best]), spins[best].copy()
+    rows = np.arange(replicas)
+    for sweep, beta in enumerate(betas, start=1):
+        for i in rng.permutation(n):
+            delta = -2.0 * spins[:, i] * fields[:, i]
+            flip = (delta <= 0) | (
+                rng.random(replicas) < np.exp(-beta * np.maximum(delta, 0))
+            )
+            if flip.any():
+                flipped = rows[flip]
+                fields[flipped] -= 2.0 * spins[flipped, i, None] * Jsym[i]
+                spins[flipped, i] *= -1.0
+                energies[flipped] += delta[flipped]
+        k = int(np.argmin(energies))
+        if energies[k] < best_energy:
+            best_energy, best_spins = float(energies[k]), spins[k].copy()
+        if callback is not None:
+            callback(sweep * replicas * n, best_energy)
+    return best_spins, best_energy, sweeps * replicas * n
+
+
+def selection_weights(spins: np.ndarray) -> np.ndarray:
+    """
+    Equal weights across selected assets. If none is selected this falls back
+    to all assets; callers report that through `SolverResult.empty_selection`.
+    """
+    selected = spins > 0
+    if not selected.any():
+        selected = np.ones_like(selected)
+    return selected / selected.sum()
+
+
+def solve_classical(
+    offset,
+    h,
+    J,
+    solver: str = "auto",
+    seed: Optional[int] = None,
+    callback: Optional[Callable[[int, float], None]] = None,
+):
+    """Run a classical solver; returns (weights, SolverResult) like `run_vqe`."""
+    if solver == "auto":
+        solver = choose_solver(len(h))
+    start = time.perf_counter()
+    if solver == "exact":
+        spins, energy, evals = solve_exact(offset, h, J, callback=callback)
+        iterations, stop_reason = (
+            0,
+            STOP_EXACT,
+        )  # not iterative: `evals` states enumerated
+    elif solver == "annealing":
+        spins, energy, evals = solve_annealing(
+            offset, h, J, seed=seed, callback=callback
+        )
+        iterations, stop_reason = ANNEALING_SWEEPS, STOP_ANNEALING
+    else:
+        raise ValueError(f"Unknown classical solver '{solver}'")
+    selection = spins > 0
+    result = SolverResult(
+        eigenvalue=energy,
+        bitstring="".join("0" if s else "1" for s in selection),
+        selection=selection,
+        cost_function_evals=evals,
+        optimizer_time=time.perf_counter() - start,
+        solver=solver,
+        iterations=iterations,
+        stop_reason=stop_reason,
+        empty_selection=not selection.any(),
+    )
+    return selection_weights(spins), result
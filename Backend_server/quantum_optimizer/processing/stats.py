@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ..preprocessing.logger import metrics
+except ImportError:  # scripts run with quantum_optimizer/ as the top-level directory
+    from preprocessing.logger import metrics
+
+TRADING_DAYS = 252
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+class ReturnStats:
+    """
+    Daily returns of a whole price matrix, computed once.
+
+    μ and Σ for any ticker subset are sliced out of a full-universe covariance
+    (per window), and the annualized results are kept in an LRU keyed by
+    (tickers, window, annualization). Results match
+    `prices[tickers].pct_change().dropna()` followed by `.mean()` / `.cov()`.
+    """
+
+    def __init__(
+        self,
+        prices: np.ndarray,
+        tickers: Sequence[str],
+        cache_size: int = 256,
+        returns: Optional[np.ndarray] = None,
+        finite: Optional[np.ndarray] = None,
+        universe: Optional[dict] = None,
+    ):
+        # returns / finite / universe (window -> (row mask, μ, Σ)) computed elsewhere,
+        # e.g. mapped from a snapshot another process published, replace deriving
+        # them from prices
+        self.tickers = tuple(tickers)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        if returns is None:
+            prices = np.asarray(prices, dtype=np.float64)
+            returns = prices[1:] / prices[:-1] - 1.0
+        self.returns = _readonly(returns)
+        self.finite = _readonly(np.isfinite(self.returns) if finite is None else finite)
+        self._universe = dict(universe or {})  # window -> (row mask, μ, Σ)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, prices: pd.DataFrame, **kwargs) -> "ReturnStats":
+        return cls(prices.to_numpy(dtype=np.float64), list(prices.columns), **kwargs)
+
+    def _rows(self, window: Optional[int]) -> slice:
+        return slice(None) if not window else slice(-window, None)
+
+    def universe_moments(self, window: Optional[int]):
+        """(row mask, μ, Σ) of every ticker over `window`, built once per window."""
+        cached = self._universe.get(window)
+        if cached is None:
+            metrics.inc("stats_universe_builds_total")
+            rows = self._rows(window)
+            mask = self.finite[rows].all(axis=1)
+            valid = self.returns[rows][mask]
+            cached = (
+                mask,
+                _readonly(valid.mean(axis=0)),
+                _readonly(np.atleast_2d(np.cov(valid, rowvar=False))),
+            )
+            self._universe[window] = cached
+        return cached
+
+    def _compute(self, tickers: tuple, window: Optional[int], annualization: float):
+        missing = [t for t in tickers if t not in self.index]
+        if missing:
+            raise KeyError(f"No price history for {missing}")
+        cols = np.fromiter(
+            (self.index[t] for t in tickers), dtype=np.intp, count=len(tickers)
+        )
+        rows = self._rows(window)
+        mask, mu_all, cov_all = self.universe_moments(window)
+        subset_mask = self.finite[rows][:, cols].all(axis=1)
+
+        if np.array_equal(mask, subset_mask):
+            mu = mu_all[cols]
+            cov = cov_all[np.ix_(cols, cols)]
+        else:
+            # Another ticker has gaps this basket doesn't: drop only our own NaN rows
+            valid = self.returns[rows][subset_mask][:, cols]
+            mu = valid.mean(axis=0)
+            cov = np.atleast_2d(np.cov(valid, rowvar=False))
+        return _readonly(mu * annualization), _readonly(cov * annualization)
+
+    def moments(
+        self,
+        tickers: Sequence[str],
+        window: Optional[int] = None,
+        annualization: float = 1.0,
+    ):
+        """
+        Mean vector μ and covariance Σ of daily returns for `tickers`, over the
+        last `window` return observations (all of them if None), scaled by
+        `annualization` (e.g. TRADING_DAYS). Returned arrays are read-only.
+        """
+        key = (tuple(tickers), window, annualization)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                metrics.inc("stats_cache_requests_total", result="hit")
+                return hit
+            metrics.inc("stats_cache_requests_total", result="miss")
+            with metrics.timer("stats_moments_seconds"):
+                result = self._compute(*key)
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return result
@@ -2,12 +2,38 @@ import numpy as np
 import pandas as pd
 
 
-def load_returns(path_csv: str) -> pd.DataFrame:
+def load_prices(
+    path=None, tickers=None, start=None, end=None, window=None
+) -> pd.DataFrame:
     """
-    Read a CSV of prices (indexed by date), compute daily %
+    Date × ticker prices from the price store at `path` (default
+    data/prices), projected to `tickers` and the `start`..`end` dates, or to
+    a trailing `window` such as "6mo" / "1y". A `.csv` path is still read as text.
+    """
+    if path is not None and str(path).endswith(".csv"):
+        from preprocessing.price_store import window_start
+
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df = df if tickers is None else df[list(tickers)]
+        if window is not None and len(df):
+            start = window_start(df.index[-1], window)
+        return df.loc[start:end]
+    from preprocessing.price_store import DEFAULT_STORE_DIR, PriceStore, sync_csv
+
+    store = PriceStore(path or DEFAULT_STORE_DIR)
+    if path is None:
+        sync_csv(store)  # built from the CSVs on first use
+    return store.frame(tickers, start, end, window)
+
+
+def load_returns(
+    path=None, tickers=None, start=None, end=None, window=None
+) -> pd.DataFrame:
+    """
+    Read prices (indexed by date), compute daily %
     returns, drop NaNs, and return.
     """
-    df = pd.read_csv(path_csv, index_col=0, parse_dates=True)
+    df = load_prices(path, tickers, start, end, window)
     returns = df.pct_change().dropna()
     return returns
 
@@ -26,8 +52,13 @@ def annualize(returns: pd.DataFrame):
 def load_features(returns_csv, fund_csv):
     import pandas as pd
 
-    # loads a date×ticker return table, stacks to rows, then merges fundamentals
-    r = pd.read_csv(returns_csv, index_col=0, parse_dates=True)
+    # loads a date×ticker return table (a CSV / price-store path, or a
+    # DataFrame), stacks to rows, then merges fundamentals
+    r = (
+        returns_csv
+        if isinstance(returns_csv, pd.DataFrame)
+        else load_prices(returns_csv)
+    )
     f = pd.read_csv(fund_csv, index_col=0)
     stacked = r.stack().rename("Return").reset_index()
     stacked.columns = ["Date", "Ticker", "Return"]
@@ -1,60 +1,138 @@
+import contextlib
+import threading
+import time
 import numpy as np
-from qiskit.quantum_info import SparsePauliOp
+from qiskit.quantum_info import PauliList, SparsePauliOp
 from qiskit.circuit.library import RealAmplitudes
 from qiskit_algorithms import VQE
-from qiskit_algorithms.optimizers import SPSA
+from qiskit_algorithms.minimum_eigensolvers import VQEResult
 from qiskit.primitives import Estimator
-from typing import Dict
+from qiskit_algorithms.utils import algorithm_globals
+from typing import Callable, Optional, Sequence
 
-def create_hamiltonian(mu, cov, fundamentals, risk_factor, budget):
-    """Create Hamiltonian with guaranteed real coefficients"""
+from .convergence import (
+    OPTIMIZERS, SPSA_CALIBRATION_EVALS, STATEVECTOR_ONLY, STOP_MAXITER, STOP_OPTIMIZER,
+    ConvergenceMonitor, ConvergenceStop, evaluations_per_iteration, make_optimizer,
+)
+from .fast_estimator import DiagonalStatevectorEstimator
+from .solvers import SOLVERS, solve_classical
+from .warm_start import WarmStartStore, ansatz_key
+
+try:
+    from ..preprocessing.logger import metrics, span
+except ImportError:  # scripts run with quantum_optimizer/ as the top-level directory
+    from preprocessing.logger import metrics, span
+
+# "reference": qiskit's Estimator; "statevector": the batched diagonal
+# estimator in fast_estimator.py (same energies, far less overhead)
+ESTIMATORS = ("reference", "statevector")
+
+# SPSA draws perturbations from the global algorithm RNG; seeded runs hold
+# this lock so concurrent runs in one process can't interleave draws.
+_SEED_LOCK = threading.Lock()
+
+
+class OptimizationCancelled(Exception):
+    """Raised from a `run_vqe` callback to abandon the optimization."""
+
+
+def _record_run(solver: str, result, seconds: float) -> None:
+    metrics.observe("vqe_run_seconds", seconds, solver=solver)
+    metrics.inc("vqe_runs_total", solver=solver, stop_reason=result.stop_reason)
+    metrics.inc("vqe_iterations_total", result.iterations, solver=solver)
+    metrics.inc("vqe_evaluations_total", result.cost_function_evals, solver=solver)
+
+
+def ising_coefficients(mu, cov, fundamentals, risk_factor, budget):
+    """
+    Merged coefficients of the portfolio Hamiltonian, indexed by asset:
+      offset            identity term
+      h[i]              Z_i     (risk on Σ_ii, return weighted by P/E, budget)
+      J[i, j], i < j    Z_i Z_j (risk on Σ_ij); zero on and below the diagonal
+    """
+    mu = np.real(np.asarray(mu, dtype=np.float64)).ravel()
+    cov = np.real(np.asarray(cov, dtype=np.float64))
     n = len(mu)
-    terms = []
-    
-    # Clean and order fundamentals
-    tickers = sorted(fundamentals.keys())
-    pe_ratios = np.array([
-        float(fundamentals[t].get('PE', 1.0)) if not np.isnan(fundamentals[t].get('PE', 1.0))
-        else 1.0  # Default value for NaN
-        for t in tickers
-    ])
-    
-    # Quadratic terms (risk)
-    for i in range(n):
-        for j in range(i, n):
-            pauli = ['I']*n
-            pauli[i] = 'Z'
-            pauli[j] = 'Z'
-            coeff = float(np.real(risk_factor * cov[i,j]))  # Force real
-            terms.append((''.join(pauli), coeff))
-    
-    # Linear terms (return)
-    for i in range(n):
-        pauli = ['I']*n
-        pauli[i] = 'Z'
-        coeff = float(np.real(-mu[i] * pe_ratios[i]))  # Force real
-        terms.append((''.join(pauli), coeff))
-    
-    # Budget constraint
-    for i in range(n):
-        pauli = ['I']*n
-        pauli[i] = 'Z'
-        terms.append((''.join(pauli), float(0.1 * budget)))
-    
-    # Identity term
-    terms.append(('I'*n, float(0.5 * n)))
-    
-    # Final validation
-    for p, c in terms:
-        if not isinstance(c, float):
-            raise ValueError(f"Coefficient {c} for {p} is not float")
-        if np.iscomplex(c):
-            raise ValueError(f"Complex coefficient {c} detected")
-    
-    return SparsePauliOp.from_list(terms)
-
-def run_vqe(mu, cov, fundamentals, budget, risk_factor, maxiter=50):
-    """Robust VQE implementation with complete error handling"""
+
+    # P/E per asset, taken from fundamentals in sorted-ticker order (NaN -> 1.0)
+    pe_ratios = np.array(
+        [fundamentals[t].get('PE', 1.0) for t in sorted(fundamentals.keys())],
+        dtype=np.float64,
+    )[:n]
+    pe_ratios[np.isnan(pe_ratios)] = 1.0
+
+    h = risk_factor * np.diag(cov) - mu * pe_ratios + 0.1 * budget
+    J = np.triu(risk_factor * cov, k=1)
+    offset = 0.5 * n
+
+    if not (np.isfinite(h).all() and np.isfinite(J).all()):
+        raise ValueError("Hamiltonian coefficients must be finite real numbers")
+    return float(offset), h, J
+
+
+@metrics.timer("hamiltonian_build_seconds")
+def create_hamiltonian(mu, cov, fundamentals, risk_factor, budget):
+    """
+    Create Hamiltonian with guaranteed real coefficients.
+    Built directly as symplectic Z/X bit arrays: one identity term, one Z
+    term per asset and one ZZ term per asset pair. Asset i sits at label
+    position i, i.e. qubit n-1-i.
+    """
+    offset, h, J = ising_coefficients(mu, cov, fundamentals, risk_factor, budget)
+    n = len(h)
+    iu, ju = np.triu_indices(n, k=1)
+    num_terms = 1 + n + len(iu)
+
+    z = np.zeros((num_terms, n), dtype=bool)
+    z[1 + np.arange(n), n - 1 - np.arange(n)] = True
+    pairs = 1 + n + np.arange(len(iu))
+    z[pairs, n - 1 - iu] = True
+    z[pairs, n - 1 - ju] = True
+
+    coeffs = np.concatenate(([offset], h, J[iu, ju])).astype(np.complex128)
+    paulis = PauliList.from_symplectic(z, np.zeros_like(z))
+    return SparsePauliOp(paulis, coeffs, ignore_pauli_phase=True, copy=False)
+
+
+def run_vqe(mu, cov, fundamentals, budget, risk_factor, maxiter=50,
+            seed: Optional[int] = None,
+            callback: Optional[Callable[[int, float], None]] = None,
+            solver: str = "vqe", estimator: str = "reference",
+            warm_start: Optional[WarmStartStore] = None,
+            tickers: Optional[Sequence[str]] = None, optimizer: str = "spsa",
+            calibrate: bool = False, time_budget: Optional[float] = None,
+            stop_window: int = 10, stop_rtol: Optional[float] = None):
+    """
+    Robust VQE implementation with complete error handling.
+    With `seed` set, the initial point and SPSA perturbations are seeded and
+    identical inputs give identical results. `callback(eval_count, energy)`
+    is called after every energy evaluation; raising OptimizationCancelled
+    from it aborts the run.
+    `solver` selects "vqe", a classical "exact" / "annealing" minimizer of
+    the same Hamiltonian, or "auto" (classical, picked by basket size).
+    All return (weights, result) with `eigenvalue` / `cost_function_evals`.
+    `estimator` picks the VQE energy backend, one of ESTIMATORS.
+    With a `warm_start` store, VQE saves its optimal point for the basket
+    (`tickers`, in mu order) and risk_factor; unseeded runs start from the
+    point saved at the nearest risk_factor. Seeded runs never do, so their
+    result depends on the inputs and the seed alone.
+    Convergence: `optimizer` is one of OPTIMIZERS ("l-bfgs-b" needs the
+    statevector estimator), `calibrate` lets SPSA calibrate its step sizes,
+    and the run stops early once `time_budget` seconds pass or the best
+    energy improves by less than `stop_rtol` over `stop_window` iterations.
+    Results carry `iterations` and `stop_reason`.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+    if estimator not in ESTIMATORS:
+        raise ValueError(
+            f"Unknown estimator '{estimator}', expected one of {ESTIMATORS}")
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(
+            f"Unknown optimizer '{optimizer}', expected one of {OPTIMIZERS}")
+    if optimizer in STATEVECTOR_ONLY and estimator != "statevector":
+        raise ValueError(f"Optimizer '{optimizer}' requires estimator='statevector'")
+    t0 = time.perf_counter()
     try:
         # Input validation
         mu = np.array(mu, dtype=np.float64).flatten()
@@ -62,38 +140,117 @@ def run_vqe(mu, cov, fundamentals, budget, risk_factor, maxiter=50):
         n = len(mu)
         
         # Clean fundamentals
+        def clean(t, name, default):
+            value = fundamentals[t].get(name, default)
+            return default if np.isnan(value) else float(value)
+
         clean_fundamentals = {
-            t: {
-                'PE': float(fundamentals[t].get('PE', 1.0)) if not np.isnan(fundamentals[t].get('PE', 1.0)) else 1.0,
-                'PB': float(fundamentals[t].get('PB', 1.0)) if not np.isnan(fundamentals[t].get('PB', 1.0)) else 1.0,
-                'ROE': float(fundamentals[t].get('ROE', 0.1)) if not np.isnan(fundamentals[t].get('ROE', 0.1)) else 0.1
-            }
+            t: {'PE': clean(t, 'PE', 1.0), 'PB': clean(t, 'PB', 1.0),
+                'ROE': clean(t, 'ROE', 0.1)}
             for t in fundamentals
         }
         
+        if solver != "vqe":
+            with span("hamiltonian"):
+                offset, h, J = ising_coefficients(mu, cov, clean_fundamentals,
+                                                  risk_factor, budget)
+            with span("solve") as stage:
+                weights, result = solve_classical(offset, h, J, solver=solver,
+                                                  seed=seed, callback=callback)
+                stage.desc = (f"{result.solver}, "
+                              f"{result.cost_function_evals} evaluations")
+            # result.solver: "auto" resolved
+            _record_run(result.solver, result, time.perf_counter() - t0)
+            return weights, result
+
         # Build Hamiltonian
-        H = create_hamiltonian(mu, cov, clean_fundamentals, risk_factor, budget)
+        with span("hamiltonian"):
+            H = create_hamiltonian(mu, cov, clean_fundamentals, risk_factor, budget)
         
         # Quantum circuit setup
-        ansatz = RealAmplitudes(n, reps=1, entanglement='linear', insert_barriers=True)
-        optimizer = SPSA(maxiter=maxiter, learning_rate=0.01, perturbation=0.01)
-        
-        # Run VQE
-        vqe = VQE(
-            estimator=Estimator(),
-            ansatz=ansatz,
-            optimizer=optimizer,
-            initial_point=np.random.rand(ansatz.num_parameters)
+        with span("ansatz"):
+            ansatz = RealAmplitudes(n, reps=1, entanglement='linear',
+                                    insert_barriers=True)
+            num_parameters = ansatz.num_parameters
+        monitor = ConvergenceMonitor(
+            evaluations_per_iteration(optimizer, num_parameters),
+            window=stop_window,
+            rtol=stop_rtol,
+            time_budget=time_budget,
+            warmup_evals=(SPSA_CALIBRATION_EVALS
+                          if optimizer == "spsa" and calibrate else 0),
         )
-        result = vqe.compute_minimum_eigenvalue(H)
+
+        def on_evaluation(count, params, energy, meta):
+            if callback is not None:
+                callback(count, float(energy))
+            monitor.update(params, float(energy))
+
+        # Run VQE (seeded runs fix the initial point and SPSA's RNG)
+        start_from = None
+        if warm_start is not None:
+            basket = tickers if tickers is not None else sorted(fundamentals)
+            store_key = ansatz_key(n, basket, reps=1, entanglement='linear')
+            if seed is None:
+                start_from = warm_start.lookup(store_key, risk_factor,
+                                               ansatz.num_parameters)
+        if seed is not None:
+            initial_point = np.random.default_rng(seed).random(ansatz.num_parameters)
+        elif start_from is not None:
+            initial_point = start_from.point
+        else:
+            initial_point = np.random.rand(ansatz.num_parameters)
+        rng_guard = _SEED_LOCK if seed is not None else contextlib.nullcontext()
+        with rng_guard, span("vqe") as stage:
+            if seed is not None:
+                algorithm_globals.random_seed = seed
+            vqe = VQE(
+                estimator=(DiagonalStatevectorEstimator() if estimator == "statevector"
+                           else Estimator()),
+                ansatz=ansatz,
+                optimizer=make_optimizer(optimizer, maxiter, num_parameters, calibrate),
+                initial_point=initial_point,
+                callback=on_evaluation,
+            )
+            try:
+                result = vqe.compute_minimum_eigenvalue(H)
+                # includes finite-difference gradient evaluations, which nfev leaves out
+                result.cost_function_evals = monitor.evaluations
+                nit = getattr(result.optimizer_result, "nit", None)
+                result.iterations = nit if nit is not None else monitor.iterations
+                result.stop_reason = (
+                    STOP_MAXITER if optimizer == "spsa" or result.iterations >= maxiter
+                    else STOP_OPTIMIZER
+                )
+            except ConvergenceStop as stop:
+                result = VQEResult()
+                result.eigenvalue = result.optimal_value = monitor.best_energy
+                result.optimal_point = monitor.best_point
+                result.optimal_parameters = dict(zip(ansatz.parameters,
+                                                     monitor.best_point))
+                result.cost_function_evals = monitor.evaluations
+                result.optimizer_time = monitor.elapsed
+                result.iterations = monitor.iterations
+                result.stop_reason = stop.reason
+            stage.desc = (f"{result.iterations} iterations, "
+                          f"{result.cost_function_evals} evaluations")
+
+        if warm_start is not None:
+            warm_start.save(store_key, risk_factor, result.optimal_point,
+                            float(result.eigenvalue.real))
+            warm_start.record_run(store_key, start_from is not None,
+                                  result.cost_function_evals, result.optimizer_time)
         
         # Process results
         theta = np.real(result.optimal_point)  # Force real
         weights = np.sin(theta[:n])**2
         weights = np.real(weights / np.sum(weights))  # Normalize and ensure real
+        _record_run(solver, result, time.perf_counter() - t0)
         
         return weights, result
         
+    except OptimizationCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"VQE failed: {str(e)}\n"
                          f"mu: {mu}\n"
@@ -0,0 +1,163 @@
+"""
+Persistent store of VQE optimal points, reused as initial points.
+
+Points are keyed by (n, ansatz config, tickers) and the risk_factor they
+were found at; a later run with the same basket starts from the point of
+the nearest stored risk_factor. Tickers are kept in request order: the
+ansatz parameters are positional, so a reordered basket is a different key.
+
+Backed by SQLite so every optimizer worker process shares one store. Each
+run is also logged as warm or cold, which gives the iterations and time
+saved per key (mean cold run minus mean warm run).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    key TEXT NOT NULL,
+    risk_factor REAL NOT NULL,
+    point TEXT NOT NULL,
+    energy REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (key, risk_factor)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    cold_runs INTEGER NOT NULL DEFAULT 0,
+    cold_evaluations INTEGER NOT NULL DEFAULT 0,
+    cold_seconds REAL NOT NULL DEFAULT 0,
+    warm_runs INTEGER NOT NULL DEFAULT 0,
+    warm_evaluations INTEGER NOT NULL DEFAULT 0,
+    warm_seconds REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def ansatz_key(
+    n: int, tickers: Sequence[str], ansatz: str = "RealAmplitudes", **config: Any
+) -> str:
+    """Store key for one basket under one ansatz configuration."""
+    return json.dumps([n, ansatz, sorted(config.items()), list(tickers)])
+
+
+@dataclass
+class WarmStart:
+    point: np.ndarray
+    risk_factor: float
+    energy: Optional[float]
+
+
+class WarmStartStore:
+    def __init__(self, path, max_distance: float = 0.25):
+        self.path = Path(path)
+        # Largest |risk_factor difference| for which a stored point is reused
+        self.max_distance = max_distance
+        self._local = threading.local()
+
+    # Sent to worker processes in the payload; connections are per process/thread
+    def __getstate__(self):
+        return {"path": self.path, "max_distance": self.max_distance}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_distance"])
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def lookup(
+        self, key: str, risk_factor: float, num_parameters: int
+    ) -> Optional[WarmStart]:
+        """Point stored for `key` at the nearest risk_factor, if close enough."""
+        row = (
+            self._db()
+            .execute(
+                "SELECT risk_factor, point, energy FROM points WHERE key = ? "
+                "AND ABS(risk_factor - ?) <= ? ORDER BY ABS(risk_factor - ?) LIMIT 1",
+                (key, risk_factor, self.max_distance, risk_factor),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        point = np.array(json.loads(row[1]), dtype=np.float64)
+        if point.shape != (num_parameters,):
+            return None
+        return WarmStart(point, row[0], row[2])
+
+    def save(
+        self,
+        key: str,
+        risk_factor: float,
+        point: np.ndarray,
+        energy: Optional[float] = None,
+    ) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO points (key, risk_factor, point, energy, "
+            "updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                key,
+                float(risk_factor),
+                json.dumps(np.asarray(point, dtype=np.float64).tolist()),
+                energy,
+                time.time(),
+            ),
+        )
+
+    def record_run(
+        self, key: str, warm: bool, evaluations: int, seconds: float
+    ) -> None:
+        kind = "warm" if warm else "cold"
+        self._db().execute(
+            f"INSERT INTO runs (key, {kind}_runs, {kind}_evaluations, {kind}_seconds) "
+            f"VALUES (?, 1, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+            f"{kind}_runs = {kind}_runs + 1, "
+            f"{kind}_evaluations = {kind}_evaluations + excluded.{kind}_evaluations, "
+            f"{kind}_seconds = {kind}_seconds + excluded.{kind}_seconds",
+            (key, int(evaluations), float(seconds)),
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Run counts, and the evaluations / seconds saved by warm runs, each
+        measured against the mean cold run of the same key.
+        """
+        db = self._db()
+        (points,) = db.execute("SELECT COUNT(*) FROM points").fetchone()
+        totals = dict(
+            cold_runs=0, warm_runs=0, evaluations_saved=0.0, seconds_saved=0.0
+        )
+        for cold_n, cold_e, cold_s, warm_n, warm_e, warm_s in db.execute(
+            "SELECT cold_runs, cold_evaluations, cold_seconds, "
+            "warm_runs, warm_evaluations, warm_seconds FROM runs"
+        ):
+            totals["cold_runs"] += cold_n
+            totals["warm_runs"] += warm_n
+            if cold_n and warm_n:
+                totals["evaluations_saved"] += warm_n * cold_e / cold_n - warm_e
+                totals["seconds_saved"] += warm_n * cold_s / cold_n - warm_s
+        runs = totals["cold_runs"] + totals["warm_runs"]
+        return {
+            "points": points,
+            **totals,
+            "hit_rate": totals["warm_runs"] / runs if runs else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._db().executescript("DELETE FROM points; DELETE FROM runs;")
@@ -1,11 +1,16 @@
 import os
+import sys
 import time
 import pandas as pd
 import numpy as np
 from typing import List, Dict  # Add this import at the top
 
 from preprocessing.fetch_data import fetch_and_cache   
-from processing.utils import load_returns, load_features, annualize
+from preprocessing.logger import Trace, span
+from preprocessing.price_store import PriceStore, sync_csv
+from preprocessing.refresh import refresh_prices
+from processing.utils import load_features
+from processing.stats import ReturnStats, TRADING_DAYS
 from processing.vqe_portfolio import run_vqe
 from postprocessing.analyze import compile_results
 from postprocessing.visualize import plot_weights
@@ -24,23 +29,26 @@ def load_fundamentals_as_dict(tickers: List[str], csv_path: str) -> Dict[str, Di
 
 if __name__ == "__main__":
     TICKERS = ["TCS.NS", "SIEMENS.NS", "NHPC.NS", "IDEA.NS"]
-    CSV_PATH = "data/last6m.csv"
     FUND_CSV = "data/fundamentals.csv"
 
     t0 = time.time()
+    # stage timings of this run (the VQE call adds hamiltonian / ansatz / vqe)
+    trace = Trace()
+    trace.activate()
     
     # ── Prices ────────────────────────────────────────────────
-    if os.path.exists(CSV_PATH):
-        print(f"⏩ Loading cached prices from {CSV_PATH}")
-        df = pd.read_csv(CSV_PATH, index_col=0, parse_dates=True)
+    store = PriceStore()
+    if sync_csv(store):
+        print(f"⏩ Imported cached CSV prices into {store.path}")
+    if store.exists():
+        print(f"⏩ Loading cached prices from {store.path}")
     else:
         print("⏳ Cache miss – fetching prices …")
-        from preprocessing.parallel_fetch import parallel_fetch
-        groups = [[t] for t in TICKERS]
-        outpaths = [f"data/{t}.csv" for t in TICKERS]
-        fetched = parallel_fetch(groups, outpaths, period="6mo", max_workers=4)
-        df = pd.concat(fetched.values(), axis=1)
-        df.to_csv(CSV_PATH)
+    if "--offline" not in sys.argv:
+        # only the dates after each ticker's last cached one are downloaded
+        report = refresh_prices(TICKERS, store, history="6mo")
+        print("Price refresh:", report.summary())
+    df = store.frame(TICKERS, window="6mo")
     print("Prices shape:", df.shape)
 
     # ── Fundamentals ─────────────────────────────────────────
@@ -54,8 +62,11 @@ if __name__ == "__main__":
         fundamentals = load_fundamentals_as_dict(TICKERS, FUND_CSV)
 
     # build your features & stats
-    features = load_features(CSV_PATH, FUND_CSV)
-    mu, cov = annualize(load_returns(CSV_PATH))
+    features = load_features(df, FUND_CSV)
+    # daily returns + covariance computed once for the whole price table
+    with span("moments"):
+        stats = ReturnStats.from_frame(df)
+        mu, cov = stats.moments(TICKERS, annualization=TRADING_DAYS)
     t1 = time.time()
 # Add this right before VQE call:
     print("\nData Validation:")
@@ -92,4 +103,6 @@ if __name__ == "__main__":
     print(f"\nTiming Summary:")
     print(f"Fetch + preprocess : {t1-t0:.2f}s")
     print(f"VQE run            : {t2-t1:.2f}s")
-    print(f"Postproc + display : {t3-t2:.2f}s")
\ No newline at end of file
+    print(f"Postproc + display : {t3-t2:.2f}s")
+    for name, seconds, desc in trace.export():
+        print(f"  {name:<17}: {seconds:.3f}s" + (f"  ({desc})" if desc else ""))
@@ -0,0 +1,73 @@
+"""
+Multi-worker server: one loader plus N uvicorn workers.
+
+This process is the loader. It loads the market data, computes returns and
+μ/Σ, publishes them to SNAPSHOT_DIR (services.shared_snapshot) and, every
+DATA_REFRESH_INTERVAL, fetches new prices and publishes the next snapshot.
+The uvicorn workers it starts run with SNAPSHOT_SOURCE=shared: they map the
+published arrays instead of loading files, and share optimization results
+through the SQLite result cache (RESULT_CACHE_DB, result_cache.db unless
+set; "none" turns it off). Each worker starts its own OPTIMIZER_WORKERS
+optimizer processes.
+
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import logging
+import os
+import threading
+
+import uvicorn
+
+from services.config import settings
+from services.market_data import MarketDataStore
+from services.refresher import DataRefresher
+from services.shared_snapshot import SnapshotPublisher
+
+logger = logging.getLogger("serve")
+
+RESULT_CACHE_DB = "result_cache.db"  # the workers' shared result cache, unless RESULT_CACHE_DB is set
+
+
+def _refresh_loop(refresher: DataRefresher, stop: threading.Event) -> None:
+    while not stop.wait(refresher.interval):
+        refresher.run_once()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 2)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     [loader] %(message)s")
+
+    # The loader always reads the files itself, whatever SNAPSHOT_SOURCE says
+    store = MarketDataStore(window=settings.price_window, reload_on_change=False)
+    publisher = SnapshotPublisher(settings.snapshot_dir)
+    publisher.publish(store.load())
+    refresher = DataRefresher(
+        settings.data_refresh_interval,
+        market=store,
+        catalog=None,  # each worker builds its own listing catalog
+        fetch_enabled=settings.data_refresh_fetch,
+        publish=publisher.publish,
+    )
+    stop = threading.Event()
+    if refresher.interval is not None:
+        threading.Thread(target=_refresh_loop, args=(refresher, stop), daemon=True,
+                         name="snapshot-loader").start()
+
+    # read by the workers' settings when they import main
+    os.environ["SNAPSHOT_SOURCE"] = "shared"
+    os.environ["SNAPSHOT_DIR"] = str(publisher.directory)
+    os.environ.setdefault("RESULT_CACHE_DB", RESULT_CACHE_DB)
+    try:
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        stop.set()
+        publisher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Listing data behind /stock, /stocks and /stocks/fundamentals.
+
+A `Catalog` is one immutable load of the fundamentals table (compiled from
+fundamentals.csv, memory-mapped) and tickers_with_names.csv, together with
+the pre-encoded indexes built from them. `CatalogStore` publishes a new catalog (next version) by swapping a
+single reference, so a request that already holds the old one finishes
+against it.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from quantum_optimizer.preprocessing.fundamentals_table import FundamentalsTable
+
+from .market_data import DATA_DIR, FUNDAMENTALS_FILE
+from .stock_index import FundamentalsColumns, StockIndex, StockList
+
+TICKERS_FILE = Path(__file__).resolve().parent.parent / "tickers_with_names.csv"
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    loaded_at: float
+    mtimes: tuple
+    fundamentals: FundamentalsTable
+    listing: pd.DataFrame  # tickers_with_names.csv
+    stock_index: StockIndex
+    stock_list: StockList
+    fundamentals_columns: FundamentalsColumns
+
+
+def _read_listing(path: Path) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path)
+    except Exception as e:
+        print("❌ Failed to load the ticker listing:", e)
+        return pd.DataFrame()
+
+
+class CatalogStore:
+    def __init__(self, paths=(DATA_DIR / FUNDAMENTALS_FILE, TICKERS_FILE)):
+        self.paths = tuple(Path(p) for p in paths)
+        self._lock = threading.Lock()
+        self._catalog: Optional[Catalog] = None
+        self._version = 0
+
+    def _mtimes(self) -> tuple:
+        return tuple(os.stat(p).st_mtime_ns if p.exists() else 0 for p in self.paths)
+
+    def load(self) -> Catalog:
+        """Read the files, build the indexes and publish the result."""
+        with self._lock:
+            return self._load(self._mtimes())
+
+    def _load(self, mtimes: tuple) -> Catalog:
+        fundamentals = FundamentalsTable.load(self.paths[0])
+        listing = _read_listing(self.paths[1])
+        catalog = Catalog(
+            version=self._version + 1,
+            loaded_at=time.time(),
+            mtimes=mtimes,
+            fundamentals=fundamentals,
+            listing=listing,
+            stock_index=StockIndex.from_table(fundamentals),
+            stock_list=StockList.from_frame(listing),
+            fundamentals_columns=FundamentalsColumns(fundamentals),
+        )
+        self._version = catalog.version
+        self._catalog = catalog
+        return catalog
+
+    def refresh(self) -> bool:
+        """Rebuild if either file changed since the current catalog; True if it did."""
+        with self._lock:
+            mtimes = self._mtimes()
+            if self._catalog is not None and self._catalog.mtimes == mtimes:
+                return False
+            self._load(mtimes)
+            return True
+
+    def peek(self) -> Optional[Catalog]:
+        """The published catalog, or None before the first load; never loads."""
+        return self._catalog
+
+    def current(self) -> Catalog:
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:  # first use: one thread loads, the others wait for it
+                catalog = self._catalog or self._load(self._mtimes())
+        return catalog
+
+
+catalog_store = CatalogStore()
@@ -0,0 +1,136 @@
+"""
+Runtime settings for the API process, read from the environment.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    if value is None or value.strip().lower() in ("", "none"):
+        return None
+    return int(value)
+
+
+def _optional_float(value: Optional[str]) -> Optional[float]:
+    if value is None or value.strip().lower() in ("", "none"):
+        return None
+    return float(value)
+
+
+def _flag(value: Optional[str], default: bool) -> bool:
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+def _optional_str(value: Optional[str]) -> Optional[str]:
+    if value is None or value.strip().lower() in ("", "none"):
+        return None
+    return value
+
+
+def _default_snapshot_dir() -> str:
+    # tmpfs on Linux: published snapshots live in memory, not on disk
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "quantum-optimizer-snapshot")
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Seed for deterministic VQE runs; VQE_SEED=none restores random starts
+    vqe_seed: Optional[int] = 42
+    # VQE energy backend: "statevector" (fast, exact) or "reference" (qiskit Estimator)
+    vqe_estimator: str = "statevector"
+    # Early stopping: stop once the best energy improves by less than VQE_STOP_RTOL
+    # (relative) over VQE_STOP_WINDOW iterations; VQE_STOP_RTOL=none runs every iteration
+    vqe_stop_window: int = 10
+    vqe_stop_rtol: Optional[float] = 1e-4
+    # Default wall-clock budget (seconds) of one VQE run; requests may set their own
+    vqe_time_budget: Optional[float] = 30.0
+    result_cache_size: int = 256
+    result_cache_ttl: float = 600.0
+    # SQLite file of optimization results (relative to the data dir) shared by all worker
+    # processes and kept across restarts. Off by default (results stay in process memory);
+    # serve.py sets it for its workers
+    result_cache_db: Optional[str] = None
+    # Process pool running the optimizer, and how much work may wait for it
+    optimizer_workers: int = 2
+    optimizer_queue_size: int = 16
+    optimizer_timeout: float = 120.0
+    # Jobs kept by the in-memory job store
+    job_store_size: int = 1000
+    # SQLite file of VQE warm-start points (relative to the data dir); off by default.
+    # Only unseeded runs (VQE_SEED=none) start from stored points
+    warm_start_db: Optional[str] = None
+    warm_start_max_distance: float = 0.25
+    # Cache-Control max-age (seconds) of GET /stocks pages
+    stock_list_max_age: int = 300
+    # Trailing window of price history behind μ/Σ ("6mo", "1y", ...; "max" = all stored)
+    price_window: Optional[str] = "6mo"
+    # Background data refresh every DATA_REFRESH_INTERVAL seconds; off by default (files are
+    # then re-read on the first request after they change), set it in deployment to download
+    # prices in the background. DATA_REFRESH_FETCH=0 only picks up files written by someone
+    # else instead of downloading new prices.
+    data_refresh_interval: Optional[float] = None
+    data_refresh_fetch: bool = True
+    # X-Admin-Token that unlocks ?profile=1 on any route; "none" (default) disables profiling
+    admin_token: Optional[str] = None
+    # One JSON line per request (stage timings) on the "quantum.timing" logger
+    timing_log: bool = True
+    # When data loads and optimizer workers start: "eager" (before serving), "background"
+    # (after; /quantum/ready is 503 until done) or "lazy" (on first use)
+    startup_mode: str = "eager"
+    # Each optimizer worker runs a tiny VQE after importing qiskit, before taking jobs
+    warmup_vqe: bool = True
+    # "local": this process loads the data files itself; "shared": map the snapshots a
+    # loader process publishes in SNAPSHOT_DIR (multi-worker mode, see serve.py)
+    snapshot_source: str = "local"
+    snapshot_dir: str = _default_snapshot_dir()
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            vqe_seed=_optional_int(os.getenv("VQE_SEED", str(cls.vqe_seed))),
+            vqe_estimator=os.getenv("VQE_ESTIMATOR", cls.vqe_estimator),
+            vqe_stop_window=int(os.getenv("VQE_STOP_WINDOW", cls.vqe_stop_window)),
+            vqe_stop_rtol=_optional_float(os.getenv("VQE_STOP_RTOL", str(cls.vqe_stop_rtol))),
+            vqe_time_budget=_optional_float(os.getenv("VQE_TIME_BUDGET", str(cls.vqe_time_budget))),
+            result_cache_size=int(os.getenv("RESULT_CACHE_SIZE", cls.result_cache_size)),
+            result_cache_ttl=float(os.getenv("RESULT_CACHE_TTL", cls.result_cache_ttl)),
+            result_cache_db=_optional_str(os.getenv("RESULT_CACHE_DB", cls.result_cache_db)),
+            optimizer_workers=int(os.getenv("OPTIMIZER_WORKERS", cls.optimizer_workers)),
+            optimizer_queue_size=int(os.getenv("OPTIMIZER_QUEUE_SIZE", cls.optimizer_queue_size)),
+            optimizer_timeout=float(os.getenv("OPTIMIZER_TIMEOUT", cls.optimizer_timeout)),
+            job_store_size=int(os.getenv("JOB_STORE_SIZE", cls.job_store_size)),
+            warm_start_db=_optional_str(os.getenv("WARM_START_DB", cls.warm_start_db)),
+            warm_start_max_distance=float(
+                os.getenv("WARM_START_MAX_DISTANCE", cls.warm_start_max_distance)
+            ),
+            stock_list_max_age=int(os.getenv("STOCK_LIST_MAX_AGE", cls.stock_list_max_age)),
+            price_window=_optional_str(os.getenv("PRICE_WINDOW", cls.price_window)),
+            data_refresh_interval=_optional_float(
+                os.getenv("DATA_REFRESH_INTERVAL", str(cls.data_refresh_interval))
+            ),
+            data_refresh_fetch=_flag(os.getenv("DATA_REFRESH_FETCH"), cls.data_refresh_fetch),
+            admin_token=_optional_str(os.getenv("ADMIN_TOKEN")),
+            timing_log=_flag(os.getenv("TIMING_LOG"), cls.timing_log),
+            startup_mode=os.getenv("STARTUP_MODE", cls.startup_mode).strip().lower(),
+            warmup_vqe=_flag(os.getenv("WARMUP_VQE"), cls.warmup_vqe),
+            snapshot_source=os.getenv("SNAPSHOT_SOURCE", cls.snapshot_source).strip().lower(),
+            snapshot_dir=os.getenv("SNAPSHOT_DIR", cls.snapshot_dir),
+        )
+
+    def run_options(self) -> Dict[str, Any]:
+        """run_vqe keyword arguments every request gets (and that key the result cache)."""
+        return {
+            "seed": self.vqe_seed,
+            "estimator": self.vqe_estimator,
+            "stop_window": self.vqe_stop_window,
+            "stop_rtol": self.vqe_stop_rtol,
+            "time_budget": self.vqe_time_budget,
+        }
+
+
+settings = Settings.from_env()
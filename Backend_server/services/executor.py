@@ -0,0 +1,301 @@
+"""
+Process-pool executor for CPU-bound optimizer runs.
+
+VQE runs in worker processes so the event loop keeps serving other routes.
+Workers import qiskit once when they start; the number of jobs that may wait
+for a worker is bounded, and each job has a timeout and a cancel flag the
+worker polls between energy evaluations. Workers can also report every
+energy evaluation back to the API process through a shared progress queue.
+"""
+import asyncio
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from quantum_optimizer.preprocessing.logger import Trace, metrics
+
+from .config import settings
+
+
+class QueueFullError(Exception):
+    """All workers are busy and the wait queue is full."""
+
+
+class JobTimeoutError(Exception):
+    """A job did not finish within its timeout."""
+
+
+class JobCancelledError(Exception):
+    """A job was cancelled before it finished."""
+
+
+# ---------- Worker side ----------
+
+def _warm_worker(run_vqe_once: bool = False):
+    """
+    Pool initializer: pay the qiskit import cost once per worker and, with
+    `run_vqe_once`, the first-run setup of a tiny VQE on both estimators.
+    """
+    from quantum_optimizer.processing.vqe_portfolio import ESTIMATORS, run_vqe
+
+    if run_vqe_once:
+        fundamentals = {t: {"PE": 10.0, "PB": 2.0, "ROE": 0.1} for t in ("A", "B")}
+        for estimator in ESTIMATORS:
+            run_vqe([0.1, 0.2], [[0.04, 0.01], [0.01, 0.09]], fundamentals, 1.0, 0.5,
+                    maxiter=3, seed=0, estimator=estimator)
+        metrics.drain()  # not real work: keep it out of the API's metrics
+
+
+def _wait_ready(barrier):
+    # Every warm-up task blocks until all workers hold one, which forces the
+    # pool to start its full complement of processes up front.
+    barrier.wait(timeout=120)
+
+
+def _profile_report(profiler, limit: int = 40) -> str:
+    import io
+    import pstats
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def run_optimization(
+    payload: Dict[str, Any], cancel_event=None, progress=None, job_id: Optional[int] = None,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run one optimization inside a worker process. The worker's metrics since
+    its last job travel back under "metrics" and are merged by the API process;
+    its stage timings come back under "stages", and with `profile` a cProfile
+    report of the run under "profile".
+    """
+    from quantum_optimizer.processing.vqe_portfolio import OptimizationCancelled, run_vqe
+
+    # the cancel flag lives in the manager process; poll it at most every 50ms
+    next_check = [0.0]
+
+    def on_evaluation(eval_count, energy):
+        now = time.monotonic()
+        if cancel_event is not None and now >= next_check[0]:
+            next_check[0] = now + 0.05
+            if cancel_event.is_set():
+                raise OptimizationCancelled(f"cancelled after {eval_count} evaluations")
+        if progress is not None:
+            progress.put(("progress", job_id, eval_count, energy))
+
+    if progress is not None:
+        progress.put(("started", job_id, 0, None))
+    trace = Trace()
+    token = trace.activate()
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        weights, result = run_vqe(callback=on_evaluation, **payload)
+    except OptimizationCancelled as e:
+        raise JobCancelledError(str(e)) from None
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        Trace.deactivate(token)
+        if progress is not None:
+            progress.put(("finished", job_id, 0, None))
+    return {
+        "weights": weights,
+        "energy": float(result.eigenvalue.real),
+        "evaluations": result.cost_function_evals,
+        "iterations": result.iterations,
+        "stop_reason": result.stop_reason,
+        "empty_selection": getattr(result, "empty_selection", False),
+        "seconds": time.perf_counter() - start,
+        "metrics": metrics.drain(),
+        "stages": trace.export(),
+        "profile": _profile_report(profiler) if profiler is not None else None,
+    }
+
+
+# ---------- API side ----------
+
+@dataclass
+class JobHandle:
+    id: int
+    future: Future
+    cancel_event: Any
+    submitted_at: float = field(default_factory=time.monotonic)
+
+    def cancel(self) -> None:
+        """Drop the job if still queued, otherwise ask the worker to stop."""
+        if not self.future.cancel():
+            self.cancel_event.set()
+
+
+class OptimizerExecutor:
+    def __init__(self, workers: int = 2, max_queue: int = 16, timeout: float = 120.0,
+                 warmup_vqe: bool = False):
+        self.workers = workers
+        self.warmup_vqe = warmup_vqe
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, JobHandle] = {}
+        self._progress = None
+        self._listeners: Dict[int, Callable[[str, Dict[str, Any]], None]] = {}
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        return len(self._jobs)
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def start(self) -> None:
+        """Spawn and pre-warm the worker processes (blocking, idempotent)."""
+        with self._lock:
+            if self._pool is not None:
+                return
+            ctx = multiprocessing.get_context("spawn")
+            self._manager = ctx.Manager()
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=ctx,
+                initializer=_warm_worker, initargs=(self.warmup_vqe,),
+            )
+            barrier = self._manager.Barrier(self.workers)
+            for f in [pool.submit(_wait_ready, barrier) for _ in range(self.workers)]:
+                f.result()
+            self._progress = self._manager.Queue()
+            threading.Thread(
+                target=self._drain_progress, args=(self._progress,),
+                name="optimizer-progress", daemon=True,
+            ).start()
+            self._pool = pool
+
+    async def ensure_started(self) -> None:
+        """`start()` without blocking the event loop."""
+        if self._pool is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.start)
+
+    def _drain_progress(self, queue) -> None:
+        """Forward worker progress messages to the listener of each job."""
+        while True:
+            try:
+                message = queue.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            kind, job_id, eval_count, energy = message
+            if kind == "finished":
+                self._listeners.pop(job_id, None)
+                continue
+            listener = self._listeners.get(job_id)
+            if listener is not None:
+                data = {} if energy is None else {"evaluation": eval_count, "energy": energy}
+                listener(kind, data)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for job in list(self._jobs.values()):
+                job.cancel()
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+                try:
+                    self._progress.put(None)
+                except (EOFError, OSError):
+                    pass  # the manager is gone already (Ctrl+C reaches the whole process group)
+                self._progress = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+
+    def submit(
+        self,
+        payload: Dict[str, Any],
+        listener: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        profile: bool = False,
+    ) -> JobHandle:
+        """
+        Queue a job, or raise QueueFullError when at capacity. `listener`, if
+        given, is called from a background thread with ("started", {}) and
+        ("progress", {"evaluation", "energy"}) events. `profile` has the worker
+        cProfile the run.
+        """
+        if self.pending >= self.capacity:
+            raise QueueFullError(
+                f"Optimizer busy: {self.pending} jobs pending (capacity {self.capacity})"
+            )
+        self.start()
+        job_id = next(self._ids)
+        cancel_event = self._manager.Event()
+        if listener is None:
+            future = self._pool.submit(run_optimization, payload, cancel_event, profile=profile)
+        else:
+            self._listeners[job_id] = listener
+            future = self._pool.submit(
+                run_optimization, payload, cancel_event, self._progress, job_id, profile
+            )
+        job = JobHandle(job_id, future, cancel_event)
+        self._jobs[job_id] = job
+        future.add_done_callback(lambda f: self._job_done(job_id, f))
+        return job
+
+    def _job_done(self, job_id: int, future: Future) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            # queue wait included
+            metrics.observe("optimizer_job_seconds", time.monotonic() - job.submitted_at)
+        if not future.cancelled() and future.exception() is None:
+            # runs before any other done callback, so callers never see the raw worker metrics
+            metrics.merge(future.result().pop("metrics", ()))
+        if future.cancelled():
+            # never reached a worker, so no "finished" message will follow
+            self._listeners.pop(job_id, None)
+
+    def cancel(self, job_id: int) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    async def run(
+        self,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+        listener: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        profile: bool = False,
+    ) -> Dict[str, Any]:
+        """Submit a job and await its result; time spent queued counts toward the timeout."""
+        await self.ensure_started()
+        job = self.submit(payload, listener, profile)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job.future), timeout)
+        except asyncio.TimeoutError:
+            job.cancel()
+            raise JobTimeoutError(f"Optimization exceeded {timeout:g}s") from None
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+
+optimizer_executor = OptimizerExecutor(
+    settings.optimizer_workers, settings.optimizer_queue_size, settings.optimizer_timeout,
+    warmup_vqe=settings.warmup_vqe,
+)
+metrics.gauge("optimizer_queue_depth", fn=lambda: optimizer_executor.pending)
+metrics.gauge("optimizer_queue_capacity", fn=lambda: optimizer_executor.capacity)
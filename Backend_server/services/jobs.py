@@ -0,0 +1,244 @@
+"""
+Asynchronous optimization jobs.
+
+A job is submitted, runs in the optimizer process pool, and is polled or
+streamed by id. Job state lives in a `JobStore`; the in-memory store is the
+default and other backends only need to implement its four methods.
+"""
+import asyncio
+import inspect
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import settings
+from .executor import JobCancelledError, OptimizerExecutor, optimizer_executor
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Cap on stored energy points per job
+MAX_PROGRESS_POINTS = 10_000
+
+
+@dataclass
+class Job:
+    id: str
+    request: Dict[str, Any]
+    status: str = QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    progress: List[Dict[str, float]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self, include_progress: bool = False) -> Dict[str, Any]:
+        body = asdict(self)
+        if not include_progress:
+            body.pop("progress")
+        body["evaluations"] = len(self.progress)
+        body["energy"] = self.progress[-1]["energy"] if self.progress else None
+        return body
+
+
+class JobStore(ABC):
+    """Where job state is kept."""
+
+    @abstractmethod
+    def save(self, job: Job) -> None: ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]: ...
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    def list(self) -> List[Job]: ...
+
+    def append_progress(self, job_id: str, point: Dict[str, float], limit: int) -> bool:
+        """Add `point` to a job's progress unless it holds `limit` already; True if added."""
+        job = self.get(job_id)
+        if job is None or len(job.progress) >= limit:
+            return False
+        job.progress.append(point)
+        job.updated_at = time.time()
+        self.save(job)
+        return True
+
+
+class InMemoryJobStore(JobStore):
+    """Keeps the most recent `maxsize` jobs; finished jobs are evicted first."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        if len(self._jobs) > self.maxsize:
+            for job_id, stored in self._jobs.items():
+                if stored.finished:
+                    del self._jobs[job_id]
+                    break
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def delete(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+
+    def list(self) -> List[Job]:
+        return list(self._jobs.values())
+
+    def append_progress(self, job_id: str, point: Dict[str, float], limit: int) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or len(job.progress) >= limit:
+            return False
+        job.progress.append(point)  # in place: the stored job is this object
+        job.updated_at = time.time()
+        return True
+
+
+class JobManager:
+    """Runs jobs on the optimizer executor and records their progress in a store."""
+
+    def __init__(self, store: JobStore, executor: OptimizerExecutor):
+        self.store = store
+        self.executor = executor
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._signals: Dict[str, asyncio.Event] = {}
+
+    def submit(
+        self,
+        request: Dict[str, Any],
+        payload: Dict[str, Any],
+        finalize: Callable[[Dict[str, Any]], Dict[str, Any]],
+        on_success: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> Job:
+        """
+        Create a job for `payload`. `finalize` turns the worker output into
+        the job result; `on_success` receives that result (e.g. to cache it)
+        and may be a coroutine function.
+        Raises QueueFullError when the executor is at capacity.
+        """
+        job = Job(id=uuid.uuid4().hex, request=request)
+        loop = asyncio.get_running_loop()
+
+        def listener(kind: str, data: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(self._on_event, job.id, kind, data)
+
+        # Reserve a slot now so a full queue is reported to the caller
+        handle = self.executor.submit(payload, listener)
+        self.store.save(job)
+        self._tasks[job.id] = asyncio.ensure_future(
+            self._watch(job.id, handle, finalize, on_success)
+        )
+        return job
+
+    def complete(self, request: Dict[str, Any], result: Dict[str, Any]) -> Job:
+        """Record a job whose result was already available (e.g. cached)."""
+        job = Job(id=uuid.uuid4().hex, request=request, status=SUCCEEDED, result=result)
+        self.store.save(job)
+        return job
+
+    async def _watch(self, job_id, handle, finalize, on_success) -> None:
+        try:
+            output = await asyncio.wait_for(
+                asyncio.wrap_future(handle.future), self.executor.timeout
+            )
+            result = finalize(output)
+            self._update(job_id, status=SUCCEEDED, result=result)
+            if on_success is not None:
+                outcome = on_success(result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+        except asyncio.TimeoutError:
+            handle.cancel()
+            self._update(
+                job_id, status=FAILED,
+                error=f"Optimization exceeded {self.executor.timeout:g}s",
+            )
+        except (asyncio.CancelledError, JobCancelledError):
+            handle.cancel()
+            self._update(job_id, status=CANCELLED)
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=str(e))
+        finally:
+            self._tasks.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def _on_event(self, job_id: str, kind: str, data: Dict[str, Any]) -> None:
+        if kind == "started":
+            job = self.store.get(job_id)
+            if job is not None and not job.finished:
+                self._update(job_id, status=RUNNING)
+        elif self.store.append_progress(job_id, data, MAX_PROGRESS_POINTS):
+            self._notify(job_id)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        job = self.store.get(job_id)
+        if job is None:
+            return
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = time.time()
+        self.store.save(job)
+        self._notify(job_id)
+
+    def _notify(self, job_id: str) -> None:
+        signal = self._signals.pop(job_id, None)
+        if signal is not None:
+            signal.set()
+
+    def changed(self, job_id: str) -> asyncio.Event:
+        """Event set the next time the job is updated."""
+        return self._signals.setdefault(job_id, asyncio.Event())
+
+    async def events(self, job_id: str, keepalive: float = 15.0):
+        """
+        Server-sent events for a job: one `progress` event per energy
+        evaluation, then a final event named after the job's end status.
+        """
+        sent = 0
+        while True:
+            changed = self.changed(job_id)
+            job = self.store.get(job_id)
+            if job is None:
+                self._signals.pop(job_id, None)
+                return
+            for point in job.progress[sent:]:
+                yield _sse("progress", point)
+            sent = len(job.progress)
+            if job.finished:
+                self._signals.pop(job_id, None)
+                yield _sse(job.status, job.to_dict())
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+job_manager = JobManager(InMemoryJobStore(settings.job_store_size), optimizer_executor)
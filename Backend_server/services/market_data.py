@@ -0,0 +1,300 @@
+"""
+Process-wide market-data store.
+
+Prices (the memory-mapped price store in `data/prices`) and fundamentals (the typed table compiled from
+`fundamentals.csv`, see preprocessing.fundamentals_table) are mapped once
+into read-only NumPy arrays with a ticker -> column/row index. Endpoints
+take a `MarketSnapshot` and work against views of those arrays instead of
+re-reading the files. The store keeps the full history; μ/Σ use the
+trailing PRICE_WINDOW of it.
+
+The price store is the source of prices. It is not versioned: the first
+load builds it from the price CSVs, and a `last6m.csv` written after the
+store is imported into it (its prices winning) before the next load. Only
+if the store cannot be written are prices read from `last6m.csv` directly.
+
+A new snapshot (next version, stats already computed) replaces the current
+one in a single reference swap, either from the background refresher
+(services.refresher) or, when that is off, from a reload thread that the
+first request after a file changed starts. Requests keep getting the current
+snapshot until the new one is published, so none of them waits for a reload.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from quantum_optimizer.preprocessing.fundamentals_table import FundamentalsTable
+from quantum_optimizer.preprocessing.price_store import PriceStore, sync_csv, window_start
+from quantum_optimizer.processing.stats import ReturnStats
+
+from .config import settings
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "quantum_optimizer" / "data"
+PRICES_DIR = "prices"
+PRICES_FILE = "last6m.csv"  # imported into the price store (read directly only if that fails)
+FUNDAMENTALS_FILE = "fundamentals.csv"
+
+logger = logging.getLogger(__name__)
+
+# Defaults used by the optimizer when a fundamental is missing
+FUNDAMENTAL_DEFAULTS = {"PE": 1.0, "PB": 1.0, "ROE": 0.1}
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Immutable view of one load of the market data files."""
+
+    version: int
+    loaded_at: float
+    mtimes: tuple
+    dates: np.ndarray  # datetime64[ns], (n_days,)
+    prices: np.ndarray  # float64, (n_days, n_tickers), column-major (mapped store rows)
+    tickers: tuple
+    index: Dict[str, int]
+    fundamentals: FundamentalsTable  # float32/int64 columns, memory-mapped
+    window: Optional[str] = None  # trailing price window behind moments(); None = all
+    # returns / μ / Σ computed by another process (services.shared_snapshot); None = build here
+    precomputed: Optional[ReturnStats] = field(default=None, repr=False, compare=False)
+
+    @property
+    def data_version(self) -> str:
+        """Content version of the source files (and window), stable across processes."""
+        version = "-".join(f"{m:x}" for m in self.mtimes)
+        return version if self.window is None else f"{version}-{self.window}"
+
+    @cached_property
+    def stats(self) -> ReturnStats:
+        """Return/covariance engine for this snapshot, built on first use."""
+        if self.precomputed is not None:
+            return self.precomputed
+        return ReturnStats(self.prices, self.tickers)
+
+    @cached_property
+    def window_rows(self) -> Optional[int]:
+        """Daily returns inside `window`, counted back from the last date."""
+        start = window_start(self.dates[-1], self.window) if len(self.dates) else None
+        if start is None:
+            return None
+        first = int(np.searchsorted(self.dates, np.datetime64(start, "ns"), side="left"))
+        return max(len(self.dates) - first - 1, 1)
+
+    def moments(self, tickers: Sequence[str], annualization: float = 1.0):
+        """μ and Σ of `tickers` over the snapshot's price window."""
+        return self.stats.moments(tickers, window=self.window_rows, annualization=annualization)
+
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was loaded."""
+        return time.time() - self.loaded_at
+
+    def prepare(self) -> "MarketSnapshot":
+        """Compute the returns and universe μ/Σ now rather than on the first request."""
+        if self.tickers and len(self.dates) > 1:
+            self.moments(self.tickers[:1])
+        return self
+
+    def columns(self, tickers: Sequence[str]) -> np.ndarray:
+        """Column positions of `tickers` in the price matrix."""
+        missing = [t for t in tickers if t not in self.index]
+        if missing:
+            raise KeyError(f"No price history for {missing}")
+        return np.fromiter((self.index[t] for t in tickers), dtype=np.intp, count=len(tickers))
+
+    def price_column(self, ticker: str) -> np.ndarray:
+        """Zero-copy view of a single ticker's price series."""
+        return self.prices[:, self.columns([ticker])[0]]
+
+    def price_frame(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Prices as a date-indexed DataFrame. The full universe is a zero-copy
+        wrapper around the cached matrix; a subset gathers only its columns.
+        """
+        if tickers is None:
+            values, names = self.prices, list(self.tickers)
+        else:
+            values, names = self.prices[:, self.columns(tickers)], list(tickers)
+        return pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(self.dates, name="Date"),
+            columns=names,
+            copy=False,
+        )
+
+    def fundamentals_frame(self, tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Numeric fundamentals indexed by ticker."""
+        table = self.fundamentals
+        if tickers is None:
+            rows, names = None, list(table.tickers)
+        else:
+            rows, names = table.rows(tickers), list(tickers)
+        return pd.DataFrame(
+            table.numeric(table.fields, rows),
+            index=pd.Index(names, name="Ticker"),
+            columns=list(table.fields),
+            copy=False,
+        )
+
+    def fundamentals_for(self, tickers: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        """Fundamentals in the `{ticker: {"PE", "PB", "ROE"}}` shape run_vqe expects."""
+        table = self.fundamentals
+        rows = table.rows(tickers)
+        names = [name for name in FUNDAMENTAL_DEFAULTS if name in table.fields]
+        values = table.numeric(names, rows)
+        result = {}
+        for t, row in zip(tickers, values):
+            found = {name: float(v) for name, v in zip(names, row) if not np.isnan(v)}
+            result[t] = {name: found.get(name, default) for name, default in FUNDAMENTAL_DEFAULTS.items()}
+        return result
+
+
+def _read_price_store(store: PriceStore):
+    panel = store.read()
+    # (tickers, dates) C-order rows transpose to a (dates, tickers) column-major view
+    return panel.dates, panel.values.T, panel.tickers
+
+
+def _read_prices(path: Path):
+    frame = pd.read_csv(path, index_col=0, parse_dates=True)
+    prices = np.asfortranarray(frame.to_numpy(dtype=np.float64))
+    prices.flags.writeable = False
+    dates = frame.index.to_numpy(dtype="datetime64[ns]")
+    dates.flags.writeable = False
+    return dates, prices, tuple(frame.columns)
+
+
+class MarketDataStore:
+    """Loads the market data files once and reloads them when their mtime changes."""
+
+    def __init__(self, data_dir: Path = DATA_DIR, window: Optional[str] = None, reload_on_change: bool = True):
+        window_start(pd.Timestamp(0), window)  # reject a malformed window up front
+        self.data_dir = Path(data_dir)
+        self.window = window
+        # False when a background refresher owns reloading: requests never stat or parse files
+        self.reload_on_change = reload_on_change
+        self.price_store = PriceStore(self.data_dir / PRICES_DIR)
+        self.prices_path = self.data_dir / PRICES_FILE
+        self.fundamentals_path = self.data_dir / FUNDAMENTALS_FILE
+        self._lock = threading.Lock()
+        self._reloading = threading.Lock()  # held by the reload thread
+        self._failed_mtimes: Optional[tuple] = None  # of the last reload that raised
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._version = 0
+
+    def _mtimes(self) -> tuple:
+        # (price store, last6m.csv, fundamentals); 0 for a file that doesn't exist
+        paths = (self.price_store.manifest_path, self.prices_path, self.fundamentals_path)
+        return tuple(os.stat(p).st_mtime_ns if p.exists() else 0 for p in paths)
+
+    def _sync_prices(self) -> bool:
+        """Import the price CSVs into the store (see sync_csv); False if the store can't be written."""
+        try:
+            if sync_csv(self.price_store, self.data_dir):
+                logger.info("Imported price CSVs from %s into %s", self.data_dir, self.price_store.path)
+            return self.price_store.exists()
+        except OSError as e:
+            logger.warning("Price store %s not writable (%s); reading %s directly",
+                           self.price_store.path, e, self.prices_path)
+            return False
+
+    def load(self) -> MarketSnapshot:
+        """Parse both files and publish a new snapshot."""
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> MarketSnapshot:
+        if self._sync_prices():
+            mtimes = self._mtimes()  # after any import
+            dates, prices, tickers = _read_price_store(self.price_store)
+        else:
+            mtimes = self._mtimes()
+            dates, prices, tickers = _read_prices(self.prices_path)
+        fundamentals = FundamentalsTable.load(self.fundamentals_path)
+        snapshot = MarketSnapshot(
+            version=self._version + 1,
+            loaded_at=time.time(),
+            mtimes=mtimes,
+            dates=dates,
+            prices=prices,
+            tickers=tickers,
+            index={t: i for i, t in enumerate(tickers)},
+            fundamentals=fundamentals,
+            window=self.window,
+        ).prepare()
+        self._version = snapshot.version
+        self._snapshot = snapshot
+        return snapshot
+
+    def refresh(self) -> bool:
+        """Load a new snapshot if either file changed since the current one; True if it did."""
+        with self._lock:
+            mtimes = self._mtimes()
+            if self._snapshot is not None and self._snapshot.mtimes == mtimes:
+                return False
+            self._load()
+            return True
+
+    def snapshot(self) -> MarketSnapshot:
+        """
+        Current snapshot; loaded here only the first time. When a file changed
+        on disk (and reload_on_change), a reload starts in a thread and this
+        snapshot is still returned until the new one is published.
+        """
+        current = self._snapshot
+        if current is None:
+            with self._lock:
+                return self._snapshot or self._load()
+        if self.reload_on_change:
+            mtimes = self._mtimes()
+            if mtimes != current.mtimes and mtimes != self._failed_mtimes:
+                self._reload_in_background()
+        return current
+
+    def _reload_in_background(self) -> None:
+        if not self._reloading.acquire(blocking=False):
+            return  # a reload is already running
+        threading.Thread(target=self._reload, daemon=True, name="market-data-reload").start()
+
+    def _reload(self) -> None:
+        try:
+            mtimes = self._mtimes()
+            try:
+                self.refresh()
+            except Exception:
+                self._failed_mtimes = mtimes  # retried once a file changes again
+                logger.exception("Reloading market data failed; still serving snapshot %s",
+                                 self._snapshot.version)
+        finally:
+            self._reloading.release()
+
+    def peek(self) -> Optional[MarketSnapshot]:
+        """The published snapshot as is: never loads or reloads (None before the first load)."""
+        return self._snapshot
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.snapshot().tickers)
+
+
+def _market_store():
+    local = MarketDataStore(
+        window=settings.price_window,
+        reload_on_change=settings.data_refresh_interval is None,
+    )
+    if settings.snapshot_source == "local":
+        return local
+    if settings.snapshot_source != "shared":
+        raise ValueError(f"Unknown SNAPSHOT_SOURCE '{settings.snapshot_source}', expected local or shared")
+    from .shared_snapshot import SharedSnapshotStore  # imports this module
+
+    return SharedSnapshotStore(settings.snapshot_dir, local)
+
+
+market_store = _market_store()
@@ -0,0 +1,228 @@
+"""
+Steps shared by every optimize-style endpoint: turning a market snapshot
+into a worker payload, and a worker result into a response body. Also the
+classical efficient frontier, which is solved in the web process.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+from quantum_optimizer.preprocessing.logger import current_trace, metrics, span
+from quantum_optimizer.processing.frontier import efficient_frontier, portfolio_metrics
+from quantum_optimizer.processing.stats import TRADING_DAYS
+from quantum_optimizer.processing.warm_start import WarmStartStore
+
+from .config import settings
+from .executor import optimizer_executor
+from .market_data import DATA_DIR, MarketSnapshot
+from .result_cache import optimization_cache, optimization_key
+
+# Optimal points of earlier VQE runs, shared by all workers through SQLite
+warm_start_store = (
+    WarmStartStore(DATA_DIR / settings.warm_start_db, settings.warm_start_max_distance)
+    if settings.warm_start_db else None
+)
+
+
+def build_payload(
+    snapshot: MarketSnapshot,
+    tickers: Sequence[str],
+    risk_factor: float,
+    budget: float,
+    seed: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """Keyword arguments for `run_vqe`, taken from the cached μ/Σ and fundamentals."""
+    with span("moments"):
+        mu, cov = snapshot.moments(tickers)
+    with span("load"):
+        fundamentals = snapshot.fundamentals_for(tickers)
+    return dict(
+        mu=mu,
+        cov=cov,
+        fundamentals=fundamentals,
+        budget=budget,
+        risk_factor=risk_factor,
+        seed=seed,
+        tickers=list(tickers),
+        warm_start=warm_start_store,
+        **options,
+    )
+
+
+@metrics.timer("serialization_seconds", kind="optimize_result")
+def format_result(
+    tickers: Sequence[str],
+    weights: np.ndarray,
+    cov: np.ndarray,
+    output: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Response body; `output` (the worker result) adds how the optimizer ran."""
+    body = {
+        "tickers": list(tickers),
+        "weights": {t: float(w) for t, w in zip(tickers, weights)},
+        "risk": float(np.sqrt(weights @ cov @ weights.T)),
+    }
+    if output is not None:
+        body.update({k: output[k] for k in ("evaluations", "iterations", "stop_reason", "empty_selection")})
+    return body
+
+
+async def optimize_cached(
+    snapshot: MarketSnapshot,
+    tickers: Sequence[str],
+    risk_factor: float,
+    budget: float,
+    seed: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    One optimization through the result cache: identical requests against the
+    same data share a single run in the optimizer pool. `options` (e.g.
+    `solver`) are passed to run_vqe and are part of the cache key.
+    Stage timings go to the request's trace; a profiled request always runs
+    (bypassing the cache) so its report covers the optimizer too.
+    """
+    key = optimization_key(snapshot.data_version, tickers, risk_factor, budget, seed=seed, **options)
+    trace = current_trace()
+    profile = trace is not None and trace.profile
+
+    async def compute():
+        payload = build_payload(snapshot, tickers, risk_factor, budget, seed=seed, **options)
+        sent = time.perf_counter()
+        result = await optimizer_executor.run(payload, profile=profile)
+        if trace is not None:
+            # everything but the run itself: waiting for a worker, pickling both ways
+            trace.add("queue", max(0.0, time.perf_counter() - sent - result["seconds"]))
+            trace.extend(result["stages"])
+            if result["profile"]:
+                trace.profiles["optimizer worker"] = result["profile"]
+        with span("serialize"):
+            return format_result(tickers, result["weights"], payload["cov"], result)
+
+    if profile:
+        return await compute()
+    return await optimization_cache.get_or_compute(key, compute)
+
+
+async def optimize_batch(
+    snapshot: MarketSnapshot,
+    specs: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    **defaults: Any,
+) -> AsyncIterator[str]:
+    """
+    Run many (tickers, risk_factor, budget) specs against one snapshot and
+    yield an NDJSON line per spec as soon as it finishes. `defaults` (e.g.
+    seed, estimator) apply to every spec; a spec's own options override them. At most
+    `concurrency` items (default: one per worker) occupy the pool at a time,
+    so a large sweep doesn't push other requests out of the queue.
+    """
+    limit = asyncio.Semaphore(concurrency or optimizer_executor.workers)
+
+    async def run_one(index: int, spec: Dict[str, Any]) -> Dict[str, Any]:
+        line = {"index": index, **spec}
+        options = {**defaults, **{k: v for k, v in spec.items()
+                                  if k not in ("tickers", "risk_factor", "budget")}}
+        try:
+            async with limit:
+                line["result"] = await optimize_cached(
+                    snapshot, spec["tickers"], spec["risk_factor"], spec["budget"], **options
+                )
+        except Exception as e:
+            line["error"] = str(e) or type(e).__name__
+        return line
+
+    tasks = [asyncio.ensure_future(run_one(i, spec)) for i, spec in enumerate(specs)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            line = await finished
+            with metrics.timer("serialization_seconds", kind="batch_line"):
+                body = json.dumps(line) + "\n"
+            yield body
+    finally:
+        # client went away: stop feeding the pool (runs already shared via the cache continue)
+        for task in tasks:
+            task.cancel()
+
+
+def _portfolio(tickers: Sequence[str], weights: np.ndarray, mu, cov, risk_free_rate, frontier=None):
+    return {
+        "weights": {t: float(w) for t, w in zip(tickers, weights)},
+        **portfolio_metrics(weights, mu, cov, risk_free_rate, frontier),
+    }
+
+
+async def frontier_body(
+    snapshot: MarketSnapshot,
+    tickers: Sequence[str],
+    points: int,
+    risk_free_rate: float,
+    long_only: bool = True,
+    overlay: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """
+    JSON body of the efficient frontier of `tickers`: `points` portfolios
+    evenly spaced in return, plus the minimum-variance and maximum-Sharpe
+    portfolios. Returns, risks and `risk_free_rate` are annualized
+    (TRADING_DAYS). `overlay` (risk_factor, budget and run_vqe options) adds
+    the /quantum/optimize portfolio for those settings, placed on the same
+    axes; it goes through the result cache and runs while the frontier is solved.
+    """
+    vqe = None
+    if overlay is not None:
+        options = dict(overlay)
+        vqe = asyncio.ensure_future(optimize_cached(
+            snapshot, tickers, options.pop("risk_factor"), options.pop("budget"), **options
+        ))
+    try:
+        with span("moments"):
+            mu, cov = snapshot.moments(tickers, annualization=TRADING_DAYS)
+        with span("frontier") as stage, metrics.timer("frontier_seconds", long_only=str(long_only).lower()):
+            # in a thread: up to MAX_ITERATIONS per pass would otherwise hold the event loop
+            frontier = await asyncio.to_thread(
+                efficient_frontier, mu, cov, points, risk_free_rate, long_only
+            )
+            stage.desc = f"{points} points, {frontier.iterations} iterations"
+        body = {
+            "tickers": list(tickers),
+            "annualization": TRADING_DAYS,
+            "risk_free_rate": risk_free_rate,
+            "long_only": long_only,
+            # columnar: entry k of every list is frontier point k, by increasing return
+            "frontier": {
+                "return": frontier.returns,
+                "risk": frontier.risks,
+                "sharpe": frontier.sharpe,
+                "weights": dict(zip(tickers, np.ascontiguousarray(frontier.weights.T))),
+            },
+            "min_variance": _portfolio(tickers, frontier.min_variance, mu, cov, risk_free_rate),
+            "max_sharpe": _portfolio(tickers, frontier.max_sharpe, mu, cov, risk_free_rate),
+            "solver": {
+                "method": "projected_gradient" if long_only else "closed_form",
+                "iterations": frontier.iterations,
+                "converged": frontier.converged,
+            },
+        }
+        if vqe is not None:
+            result = await vqe
+            weights = np.array([result["weights"][t] for t in tickers])
+            total = weights.sum()
+            body["vqe"] = {
+                **result,
+                # as fractions of the budget, like the frontier portfolios
+                **_portfolio(tickers, weights / total if total > 0 else weights, mu, cov,
+                             risk_free_rate, frontier),
+            }
+    finally:
+        if vqe is not None:
+            if not vqe.done():
+                vqe.cancel()  # the frontier failed; a run already shared through the cache continues
+            elif not vqe.cancelled():
+                vqe.exception()  # retrieved, so asyncio doesn't log it as unhandled
+    with span("serialize"), metrics.timer("serialization_seconds", kind="frontier"):
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
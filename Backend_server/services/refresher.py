@@ -0,0 +1,137 @@
+"""
+Background data refresh for the API process.
+
+Every `interval` seconds, on a worker thread:
+
+  1. run the fetch pipeline (incremental price download into the price store),
+  2. load a new market snapshot (prices, fundamentals, μ/Σ) if the files changed,
+  3. rebuild the listing catalog if fundamentals / the ticker list changed.
+
+Steps 2 and 3 build the new object completely before swapping it in, so the
+event loop never parses files and requests in flight keep their snapshot.
+A failed fetch is recorded and the stores still pick up whatever is on disk.
+
+In multi-worker mode (serve.py) the loader process runs the fetch and hands
+each new snapshot to `publish`; the workers' refreshers don't fetch, they
+only rebuild their catalogs (their snapshots come from the loader).
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from quantum_optimizer.preprocessing.logger import metrics
+from quantum_optimizer.preprocessing.refresh import refresh_prices
+
+from .catalog import CatalogStore, catalog_store
+from .config import settings
+from .market_data import MarketDataStore, MarketSnapshot, market_store
+
+logger = logging.getLogger(__name__)
+
+
+class DataRefresher:
+    def __init__(
+        self,
+        interval: Optional[float],
+        market: MarketDataStore = market_store,
+        catalog: Optional[CatalogStore] = catalog_store,
+        fetch: Optional[Callable[[], Any]] = None,
+        fetch_enabled: bool = True,
+        publish: Optional[Callable[[MarketSnapshot], Any]] = None,
+    ):
+        self.interval = interval
+        self.market = market
+        self.catalog = catalog
+        # The pipeline step; default: bring every stored ticker up to today
+        self.fetch = fetch or (lambda: refresh_prices(store=market.price_store))
+        self.fetch_enabled = fetch_enabled
+        # Called with every new market snapshot (the loader publishes it to the workers)
+        self.publish = publish
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.last_run: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """One refresh cycle (blocking). Concurrent calls run one after the other."""
+        with self._lock:
+            started = time.perf_counter()
+            error = None
+            fetched = None
+            if self.fetch_enabled:
+                try:
+                    fetched = self.fetch()
+                except Exception as e:
+                    error = f"fetch: {type(e).__name__}: {e}"
+                    logger.warning("Data refresh %s", error)
+            try:
+                market_swapped = self.market.refresh()
+                if market_swapped and self.publish is not None:
+                    self.publish(self.market.peek())
+                catalog_swapped = self.catalog is not None and self.catalog.refresh()
+            except Exception as e:
+                # keep serving the current snapshots
+                market_swapped = catalog_swapped = False
+                error = f"load: {type(e).__name__}: {e}"
+                logger.exception("Data refresh failed to load new snapshots")
+            self.runs += 1
+            self.last_run = time.time()
+            self.last_duration = time.perf_counter() - started
+            self.last_error = error
+            metrics.observe("data_refresh_seconds", self.last_duration)
+            metrics.inc("data_refresh_runs_total", outcome="error" if error else "ok")
+            return {
+                "fetched": getattr(fetched, "summary", lambda: None)(),
+                "market_swapped": market_swapped,
+                "catalog_swapped": catalog_swapped,
+                "error": error,
+            }
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            await loop.run_in_executor(None, self.run_once)
+
+    def start(self) -> None:
+        if self.interval is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        """Versions and ages of the live snapshots (None until loaded), for /health."""
+        snapshot = self.market.peek()
+        catalog = self.catalog and self.catalog.peek()
+        return {
+            "snapshot_version": snapshot and snapshot.version,
+            "snapshot_age": snapshot and round(snapshot.age, 3),
+            "data_version": snapshot and snapshot.data_version,
+            "prices_through": str(snapshot.dates[-1])[:10] if snapshot and len(snapshot.dates) else None,
+            "catalog_version": catalog and catalog.version,
+            "catalog_age": catalog and round(time.time() - catalog.loaded_at, 3),
+            "refresh_interval": self.interval,
+            "refresh_runs": self.runs,
+            "last_refresh": self.last_run,
+            "last_refresh_seconds": self.last_duration,
+            "last_refresh_error": self.last_error,
+        }
+
+
+data_refresher = DataRefresher(
+    settings.data_refresh_interval,
+    # shared workers: the loader fetches and publishes, see serve.py
+    fetch_enabled=settings.data_refresh_fetch and settings.snapshot_source == "local",
+)
+metrics.gauge("market_snapshot_age_seconds", fn=lambda: market_store.peek().age)  # absent until loaded
@@ -0,0 +1,299 @@
+"""
+Bounded TTL/LRU cache for optimization results with request coalescing.
+
+Concurrent callers asking for the same key share one in-flight computation;
+finished results are served from memory until they expire or are evicted.
+
+Behind the memory tier sits an optional SQLite store (RESULT_CACHE_DB)
+shared by every worker process of the server: results are keyed by a hash
+of the request and the data version, so a result computed by one worker is
+a hit in all the others (and after a restart), and never crosses snapshots.
+A lease row makes workers that miss on the same key wait for the one
+computing it instead of running it again. The store is best-effort: SQLite
+errors are logged and treated as misses. Its calls block, so the async
+paths run them in a thread (asyncio.to_thread), never on the event loop.
+It is off unless RESULT_CACHE_DB is set, as serve.py does for its workers.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence
+
+import orjson
+
+from quantum_optimizer.preprocessing.logger import metrics
+
+from .config import settings
+from .market_data import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# How often a worker waiting on another worker's lease looks for the result
+LEASE_POLL_SECONDS = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    request TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (request, data_version)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    request TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (request, data_version)
+);
+"""
+
+
+def optimization_key(
+    data_version: str,
+    tickers: Sequence[str],
+    risk_factor: float,
+    budget: float,
+    **options: Any,
+) -> tuple:
+    """Cache key for one optimization: inputs plus the market-data version."""
+    return (
+        data_version,
+        tuple(tickers),
+        float(risk_factor),
+        float(budget),
+        tuple(sorted(options.items())),
+    )
+
+
+def request_hash(key: tuple) -> str:
+    """Stable across processes: an optimization_key without its data version, hashed."""
+    return hashlib.blake2b(repr(key[1:]).encode(), digest_size=16).hexdigest()
+
+
+class SharedResultCache:
+    """SQLite table of results (request hash, data version) -> JSON body, for every process."""
+
+    def __init__(self, path, ttl: float = 600.0, lease_ttl: float = 120.0, max_rows: int = 10_000):
+        self.path = Path(path)
+        self.ttl = ttl
+        # A lease older than this belongs to a worker that died mid-run
+        self.lease_ttl = lease_ttl
+        self.max_rows = max_rows
+        self.owner = f"{os.getpid()}"
+        self._local = threading.local()
+        self._puts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # short timeout: a busy database is a miss, not a request left waiting
+            db = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._local.db = db
+        return db
+
+    def _run(self, what: str, fn: Callable[[sqlite3.Connection], Any], default: Any = None) -> Any:
+        try:
+            return fn(self._db())
+        except sqlite3.Error as e:
+            logger.warning("Result cache %s failed: %s", what, e)
+            return default
+
+    def get(self, key: tuple) -> Optional[Any]:
+        row = self._run("read", lambda db: db.execute(
+            "SELECT body FROM results WHERE request = ? AND data_version = ? AND expires_at > ?",
+            (request_hash(key), key[0], time.time()),
+        ).fetchone())
+        return orjson.loads(row[0]) if row else None
+
+    def put(self, key: tuple, value: Any) -> None:
+        now = time.time()
+        self._run("write", lambda db: db.execute(
+            "INSERT OR REPLACE INTO results (request, data_version, body, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (request_hash(key), key[0], orjson.dumps(value), now, now + self.ttl),
+        ))
+        self._puts += 1
+        if self._puts % 64 == 0:
+            self._run("purge", lambda db: self._purge(db, now))
+
+    def _purge(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        db.execute(
+            "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+        db.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    def claim(self, key: tuple) -> bool:
+        """Take the lease to compute `key`; False while another process holds a live one."""
+        now = time.time()
+        cursor = self._run("lease", lambda db: db.execute(
+            "INSERT INTO leases (request, data_version, owner, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (request, data_version) DO UPDATE SET "
+            "owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at <= ?",
+            (request_hash(key), key[0], self.owner, now + self.lease_ttl, now),
+        ))
+        return cursor is None or cursor.rowcount == 1  # no database: compute
+
+    def release(self, key: tuple) -> None:
+        self._run("lease", lambda db: db.execute(
+            "DELETE FROM leases WHERE request = ? AND data_version = ? AND owner = ?",
+            (request_hash(key), key[0], self.owner),
+        ))
+
+    def stats(self) -> dict:
+        row = self._run("read", lambda db: db.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT data_version) FROM results WHERE expires_at > ?",
+            (time.time(),),
+        ).fetchone())
+        return {"rows": row[0], "data_versions": row[1]} if row else {}
+
+    def clear(self) -> None:
+        self._run("write", lambda db: db.executescript("DELETE FROM results; DELETE FROM leases;"))
+
+
+class ResultCache:
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 600.0,
+        name: str = "optimization",
+        shared: Optional[SharedResultCache] = None,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _local_get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """From memory, else from the shared store (then kept in memory too)."""
+        value = self._local_get(key)
+        if value is None and self.shared is not None:
+            value = await asyncio.to_thread(self.shared.get, key)
+            if value is not None:
+                self._remember(key, value)
+        return value
+
+    async def put(self, key: Hashable, value: Any) -> None:
+        self._remember(key, value)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.put, key, value)
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, or run `compute()` once no matter
+        how many callers are waiting on the same key. Failures are not cached.
+        """
+        value = self._local_get(key)
+        if value is not None:
+            self.hits += 1
+            metrics.inc("result_cache_requests_total", cache=self.name, result="hit")
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            metrics.inc("result_cache_requests_total", cache=self.name, result="coalesced")
+        else:
+            self.misses += 1
+            metrics.inc("result_cache_requests_total", cache=self.name, result="miss")
+            task = asyncio.ensure_future(
+                compute() if self.shared is None else self._compute_shared(key, compute)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # shield: one caller disconnecting must not cancel the shared work
+        return await asyncio.shield(task)
+
+    async def _compute_shared(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """A local miss: the shared store, another worker's run in progress, or our own run."""
+        shared = self.shared
+        value = await asyncio.to_thread(shared.get, key)
+        if value is not None:
+            metrics.inc("result_cache_shared_requests_total", cache=self.name, result="hit")
+            return value
+        waited = False
+        while not await asyncio.to_thread(shared.claim, key):
+            # another worker is computing it: wait for its result, or for its lease to lapse
+            waited = True
+            await asyncio.sleep(LEASE_POLL_SECONDS)
+            value = await asyncio.to_thread(shared.get, key)
+            if value is not None:
+                metrics.inc("result_cache_shared_requests_total", cache=self.name, result="waited")
+                return value
+        metrics.inc("result_cache_shared_requests_total", cache=self.name,
+                    result="lapsed" if waited else "miss")
+        try:
+            value = await compute()
+            await asyncio.to_thread(shared.put, key, value)
+            return value
+        finally:
+            await asyncio.to_thread(shared.release, key)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._remember(key, task.result())  # the shared store has it already
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+optimization_cache = ResultCache(
+    settings.result_cache_size,
+    settings.result_cache_ttl,
+    shared=SharedResultCache(
+        DATA_DIR / settings.result_cache_db,
+        ttl=settings.result_cache_ttl,
+        lease_ttl=settings.optimizer_timeout,
+    ) if settings.result_cache_db else None,
+)
+metrics.gauge("result_cache_entries", fn=lambda: len(optimization_cache._entries), cache="optimization")
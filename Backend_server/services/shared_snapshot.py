@@ -0,0 +1,205 @@
+"""
+Market snapshots shared by the worker processes of a multi-worker server.
+
+One loader process (serve.py) builds each snapshot, computing the daily
+returns and the universe μ/Σ of the price window, and publishes its arrays
+as .npy files in SNAPSHOT_DIR, a tmpfs directory (/dev/shm) by default.
+Uvicorn workers started with SNAPSHOT_SOURCE=shared map those files
+read-only instead of loading the data files themselves, so every worker
+serves the same snapshot from one copy in memory and none of them parses or
+computes anything at startup. Fundamentals are shared the same way through
+their compiled table (preprocessing.fundamentals_table).
+
+    SNAPSHOT_DIR/manifest.json       {"generation", "version", "mtimes", "window", "tickers", "arrays", ...}
+    SNAPSHOT_DIR/<array>-<gen>.npy   dates, prices, returns, finite, universe_{mask,mu,cov}
+
+Publishing writes a new generation and then swaps the manifest with one
+atomic rename. Workers stat the manifest on each snapshot() call and attach
+to a new generation when it changes; the previous generation's files are
+removed, but a worker that still maps them keeps valid pages until it lets
+go of that snapshot.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from quantum_optimizer.preprocessing.fundamentals_table import FundamentalsTable
+from quantum_optimizer.preprocessing.generations import (
+    MANIFEST, next_generation, read_manifest, remove, save_atomic, sweep,
+)
+from quantum_optimizer.processing.stats import ReturnStats
+
+from .market_data import MarketDataStore, MarketSnapshot
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class SnapshotPublisher:
+    """Loader side: writes each new snapshot where the workers can map it."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def publish(self, snapshot: MarketSnapshot) -> int:
+        """Publish `snapshot` (returns and window μ/Σ computed here if needed); its generation."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        generation = next_generation(read_manifest(self.directory, FORMAT_VERSION))
+        stats = snapshot.stats
+        window_rows = snapshot.window_rows
+        mask, mu, cov = stats.universe_moments(window_rows)
+        arrays = {
+            "dates": snapshot.dates,
+            "prices": snapshot.prices,
+            "returns": stats.returns,
+            "finite": stats.finite,
+            "universe_mask": mask,
+            "universe_mu": mu,
+            "universe_cov": cov,
+        }
+        files = {name: f"{name}-{generation}.npy" for name in arrays}
+        for name, values in arrays.items():
+            save_atomic(self.directory / files[name], values)
+        save_atomic(self.directory / MANIFEST, {
+            "format": FORMAT_VERSION,
+            "generation": generation,
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "mtimes": list(snapshot.mtimes),
+            "window": snapshot.window,
+            "window_rows": window_rows,
+            "tickers": list(snapshot.tickers),
+            "fundamentals": str(snapshot.fundamentals.path),
+            "arrays": files,
+            "published_at": time.time(),
+        })
+        sweep(self.directory, generation, arrays)
+        logger.info("Published snapshot %s (generation %s) to %s", snapshot.version, generation, self.directory)
+        return generation
+
+    def close(self) -> None:
+        """Remove the published files (the loader is going away)."""
+        manifest = read_manifest(self.directory, FORMAT_VERSION)
+        if manifest:
+            remove(self.directory, [MANIFEST, *manifest["arrays"].values()])
+
+
+def read_published(directory) -> MarketSnapshot:
+    """Map the current published snapshot (FileNotFoundError if there is none)."""
+    directory = Path(directory)
+    for attempt in range(2):
+        manifest = read_manifest(directory, FORMAT_VERSION)
+        if manifest is None:
+            raise FileNotFoundError(f"No published snapshot in {directory}")
+        try:
+            return _attach(directory, manifest)
+        except FileNotFoundError:
+            if attempt:
+                raise
+            # a newer generation replaced this one between the manifest read and the maps
+
+
+def _attach(directory: Path, manifest: dict) -> MarketSnapshot:
+    arrays = {name: np.load(directory / file, mmap_mode="r") for name, file in manifest["arrays"].items()}
+    tickers = tuple(manifest["tickers"])
+    stats = ReturnStats(
+        arrays["prices"],
+        tickers,
+        returns=arrays["returns"],
+        finite=arrays["finite"],
+        universe={manifest["window_rows"]: (
+            arrays["universe_mask"], arrays["universe_mu"], arrays["universe_cov"]
+        )},
+    )
+    return MarketSnapshot(
+        version=manifest["version"],
+        loaded_at=manifest["loaded_at"],
+        mtimes=tuple(manifest["mtimes"]),
+        dates=arrays["dates"],
+        prices=arrays["prices"],
+        tickers=tickers,
+        index={t: i for i, t in enumerate(tickers)},
+        fundamentals=FundamentalsTable.open(manifest["fundamentals"]),
+        window=manifest["window"],
+        precomputed=stats,
+    )
+
+
+class SharedSnapshotStore:
+    """
+    Worker side, with the MarketDataStore interface: the loader's latest
+    snapshot. Until a loader has published one, the worker loads the files
+    itself through `local`.
+    """
+
+    def __init__(self, directory, local: MarketDataStore):
+        self.directory = Path(directory)
+        self.local = local
+        self.window = local.window
+        self.price_store = local.price_store
+        self._lock = threading.Lock()
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._stamp: Optional[int] = None  # manifest mtime of _snapshot
+        self._warned = False
+
+    def _manifest_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory / MANIFEST).st_mtime_ns
+        except OSError:
+            return None
+
+    def _attach(self, stamp: int) -> MarketSnapshot:
+        snapshot = read_published(self.directory)
+        self._snapshot, self._stamp = snapshot, stamp
+        return snapshot
+
+    def _unpublished(self) -> MarketDataStore:
+        if not self._warned:
+            logger.warning("No snapshot published in %s; this worker loads the data files itself",
+                           self.directory)
+            self._warned = True
+        return self.local
+
+    def load(self) -> MarketSnapshot:
+        with self._lock:
+            stamp = self._manifest_stamp()
+            if stamp is None:
+                return self._unpublished().load()
+            return self._attach(stamp)
+
+    def refresh(self) -> bool:
+        """Attach to a newer published snapshot; True if there was one."""
+        with self._lock:
+            stamp = self._manifest_stamp()
+            if stamp is None:
+                return self._unpublished().refresh()
+            if self._snapshot is not None and self._stamp == stamp:
+                return False
+            self._attach(stamp)
+            return True
+
+    def snapshot(self) -> MarketSnapshot:
+        stamp = self._manifest_stamp()
+        if stamp is None:
+            return self._unpublished().snapshot()
+        current = self._snapshot
+        if current is not None and self._stamp == stamp:
+            return current
+        with self._lock:
+            if self._snapshot is not None and self._stamp == stamp:
+                return self._snapshot
+            return self._attach(stamp)
+
+    def peek(self) -> Optional[MarketSnapshot]:
+        return self._snapshot or self.local.peek()
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.snapshot().tickers)
+
@@ -0,0 +1,75 @@
+"""
+Startup sequence of the API process.
+
+The heavy work is a list of named steps: reading the listing catalog,
+loading the market snapshot (prices, fundamentals, μ/Σ), and spawning the
+optimizer workers, which import qiskit and run a tiny VQE (WARMUP_VQE) so
+the first real request pays neither. STARTUP_MODE decides when they run:
+
+  eager       in the lifespan, before the server accepts requests (default)
+  background  in a thread after the server is up; light routes answer at
+              once, GET /quantum/ready is 503 until every step is done
+  lazy        never up front: data loads on first use and the workers start
+              with the first optimization (tests, local runs)
+
+Whatever the mode, the stores load on demand and `ensure_started` starts
+the workers, so a request that arrives early is served, just slower.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from quantum_optimizer.preprocessing.logger import metrics
+
+logger = logging.getLogger(__name__)
+
+STARTUP_MODES = ("eager", "background", "lazy")
+
+
+class Startup:
+    def __init__(self, mode: str, steps: List[Tuple[str, Callable[[], Any]]]):
+        if mode not in STARTUP_MODES:
+            raise ValueError(f"Unknown startup mode '{mode}', expected one of {STARTUP_MODES}")
+        self.mode = mode
+        self.steps = steps
+        self.state: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name, _ in steps}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Future] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.mode == "lazy" or self.finished_at is not None
+
+    def run(self) -> None:
+        """Run every step in order (blocking). A failed step is recorded and the rest still run."""
+        for name, step in self.steps:
+            self.state[name] = {"status": "running"}
+            t0 = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.state[name] = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+                logger.exception("Startup step %s failed", name)
+                continue
+            seconds = time.perf_counter() - t0
+            self.state[name] = {"status": "done", "seconds": round(seconds, 3)}
+            metrics.observe("startup_step_seconds", seconds, step=name)
+        self.finished_at = time.time()
+
+    async def begin(self) -> None:
+        """Called from the lifespan: eager waits for the steps, background schedules them."""
+        loop = asyncio.get_running_loop()
+        if self.mode == "eager":
+            await loop.run_in_executor(None, self.run)
+        elif self.mode == "background":
+            self._task = loop.run_in_executor(None, self.run)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "steps": self.state,
+        }
@@ -0,0 +1,191 @@
+"""
+Pre-serialized responses for the stock listing routes.
+
+GET /stock/{ticker}: every row of the fundamentals table is rendered (missing
+-> "", everything else str()) and encoded to JSON bytes once at startup, so
+a request is a dict lookup on the upper-cased ticker plus an ETag comparison.
+
+GET /stocks: every {"ticker", "name"} object is encoded once into a single
+comma-separated buffer with per-row byte offsets, so a page is one slice of
+that buffer. Searches go through a suffix array over "symbol name" keys.
+
+GET/POST /stocks/fundamentals: reads the typed, memory-mapped columns of the
+fundamentals table directly, rendering only the requested rows, and encodes
+each column as one JSON array.
+"""
+import base64
+import binascii
+import bisect
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from quantum_optimizer.preprocessing.fundamentals_table import FundamentalsTable
+
+EMPTY_BODY = b"{}"
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@dataclass(frozen=True)
+class StockEntry:
+    body: bytes
+    etag: str
+
+
+class StockIndex:
+    """Case-insensitive ticker -> encoded fundamentals row."""
+
+    def __init__(self, entries: Dict[str, StockEntry]):
+        self._entries = entries
+
+    @classmethod
+    def from_table(cls, table: FundamentalsTable) -> "StockIndex":
+        entries: Dict[str, StockEntry] = {}
+        for row in table.records():
+            ticker = row[table.key].upper()
+            if ticker in entries:
+                continue  # first row wins, as with the old per-request scan
+            body = orjson.dumps(row)
+            entries[ticker] = StockEntry(body, etag_for(body))
+        return cls(entries)
+
+    def get(self, ticker: str) -> Optional[StockEntry]:
+        return self._entries.get(ticker.upper())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class InvalidCursor(ValueError):
+    """A /stocks cursor that this server did not issue."""
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset = raw.split(":", 1)
+        if prefix != "o" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(f"Invalid cursor '{cursor}'") from None
+
+
+def _null_if_nan(value):
+    return None if isinstance(value, float) and (np.isnan(value) or np.isinf(value)) else value
+
+
+class StockList:
+    """The /stocks listing as one pre-encoded JSON buffer."""
+
+    def __init__(self, symbols, names):
+        fragments = [
+            orjson.dumps({"ticker": _null_if_nan(s), "name": _null_if_nan(n)})
+            for s, n in zip(symbols, names)
+        ]
+        self._fragments = fragments
+        # fragment i is _blob[_offsets[i]:_offsets[i + 1] - 1]; the byte after it is ","
+        self._blob = b"".join(f + b"," for f in fragments)
+        self._offsets = np.concatenate(([0], np.cumsum([len(f) + 1 for f in fragments])))
+        self.etag = etag_for(self._blob)
+
+        # Suffix array over lower-cased "symbol name" keys: every suffix that
+        # starts with q belongs to a row containing q
+        suffixes = []
+        for row, (s, n) in enumerate(zip(symbols, names)):
+            key = f"{'' if _null_if_nan(s) is None else s} {'' if _null_if_nan(n) is None else n}".lower()
+            suffixes.extend((key[i:], row) for i in range(len(key)))
+        suffixes.sort()
+        self._suffixes = [text for text, _ in suffixes]
+        self._suffix_rows = np.fromiter((row for _, row in suffixes), dtype=np.intp, count=len(suffixes))
+        # per instance, so a replaced listing isn't kept alive by its cached searches
+        self.search = lru_cache(maxsize=1024)(self._search)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "StockList":
+        if frame.empty:
+            return cls([], [])
+        return cls(frame["Symbol"].tolist(), frame["Name"].tolist())
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def _search(self, q: str) -> np.ndarray:
+        """Rows whose symbol or name contains `q` (case-insensitive), in list order."""
+        q = q.lower()
+        lo = bisect.bisect_left(self._suffixes, q)
+        hi = bisect.bisect_left(self._suffixes, q + "\U0010ffff", lo)
+        rows = np.unique(self._suffix_rows[lo:hi])
+        rows.flags.writeable = False
+        return rows
+
+    def page(self, start: int, limit: int, q: Optional[str] = None) -> Tuple[bytes, int]:
+        """JSON array body for rows [start, start + limit) and the total row count."""
+        if not q:
+            total = len(self)
+            end = min(start + limit, total)
+            if start >= end:
+                return b"[]", total
+            return b"[" + self._blob[self._offsets[start]:self._offsets[end] - 1] + b"]", total
+        rows = self.search(q)
+        return b"[" + b",".join(self._fragments[i] for i in rows[start:start + limit]) + b"]", len(rows)
+
+
+class UnknownFields(ValueError):
+    """Requested fundamentals columns that the table does not have."""
+
+
+class FundamentalsColumns:
+    """Bulk reads of the fundamentals table, rendered as /stock renders them."""
+
+    def __init__(self, table: FundamentalsTable):
+        self.table = table
+        self.fields = table.fields
+        self._index: Dict[str, int] = {}
+        for row, ticker in enumerate(table.tickers):
+            self._index.setdefault(ticker.upper(), row)  # first row wins, like /stock
+
+    def select(self, tickers: Sequence[str], fields: Optional[Sequence[str]] = None) -> bytes:
+        """
+        {"tickers": [...], "fields": [...], "columns": {field: [...]}, "missing": [...]}
+        for the known tickers (case-insensitive, de-duplicated, request order).
+        """
+        fields = list(self.fields) if not fields else list(dict.fromkeys(fields))
+        unknown = [f for f in fields if f not in self.table.columns]
+        if unknown:
+            raise UnknownFields(f"Unknown fields {unknown}; available: {list(self.fields)}")
+
+        rows, missing = [], []
+        for ticker in dict.fromkeys(t.strip().upper() for t in tickers if t.strip()):
+            row = self._index.get(ticker)
+            if row is None:
+                missing.append(ticker)
+            else:
+                rows.append(row)
+        rows = np.asarray(rows, dtype=np.intp)
+        return orjson.dumps({
+            "tickers": [self.table.tickers[r] for r in rows],
+            "fields": fields,
+            "columns": {f: self.table.text(f, rows) for f in fields},
+            "missing": missing,
+        })
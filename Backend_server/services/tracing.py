@@ -0,0 +1,140 @@
+"""
+Per-request stage timing and on-demand profiling for the API.
+
+`timing_middleware` starts a Trace for every request. Handlers and the
+optimizer pipeline add stages with `span(...)`: load, moments (returns/cov),
+queue, hamiltonian, ansatz, vqe (iterations in its description) and
+serialize, the middle ones measured in the optimizer worker. The response
+carries them in a Server-Timing header (milliseconds, plus `total`), and one
+JSON line per request goes to the "quantum.timing" logger. Both are written
+when the handler returns, so work done while a streaming body is sent
+(/quantum/optimize/batch) is not broken down.
+
+`?profile=1` with an `X-Admin-Token` header equal to ADMIN_TOKEN runs the
+request under cProfile, and its optimizer run too (in the worker, bypassing
+the result cache), and answers with the text reports instead of the normal
+body. Without ADMIN_TOKEN profiling is off. The API-side profile covers the
+event loop thread, so requests served concurrently show up in it as well.
+"""
+import cProfile
+import hmac
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
+
+from quantum_optimizer.preprocessing.logger import Trace, metrics
+
+from .config import settings
+
+timing_logger = logging.getLogger("quantum.timing")
+
+# one profiler at a time: cProfile hooks are per thread and would replace each other
+_profile_lock = threading.Lock()
+
+
+def configure_timing_log(enabled: bool) -> None:
+    """One JSON object per line on stderr, unless the app configured the logger itself."""
+    if not enabled:
+        timing_logger.setLevel(logging.WARNING)
+        return
+    timing_logger.setLevel(logging.INFO)
+    if not timing_logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        timing_logger.addHandler(handler)
+        timing_logger.propagate = False
+
+
+def server_timing(trace: Trace, total: float) -> str:
+    parts = []
+    for name, seconds, desc in trace.export():
+        part = f"{name};dur={seconds * 1000:.2f}"
+        if desc:
+            part += ';desc="' + desc.replace("\\", "").replace('"', "'") + '"'
+        parts.append(part)
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _route(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")  # the template, so /stock/{ticker} is one series
+
+
+def _profile_denied(request: Request) -> Optional[Response]:
+    if settings.admin_token is None:
+        return PlainTextResponse("Profiling is disabled (ADMIN_TOKEN is not set)",
+                                 status_code=HTTPStatus.FORBIDDEN)
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), settings.admin_token.encode()):
+        return PlainTextResponse("Profiling needs a valid X-Admin-Token",
+                                 status_code=HTTPStatus.FORBIDDEN)
+    return None
+
+
+def _profile_report(profiler: cProfile.Profile, trace: Trace, status: int, total: float) -> str:
+    out = io.StringIO()
+    out.write(f"{status} in {total * 1000:.1f} ms\nServer-Timing: {server_timing(trace, total)}\n")
+    out.write("\n=== API process ===\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    for where, report in trace.profiles.items():
+        out.write(f"\n=== {where} ===\n{report}")
+    return out.getvalue()
+
+
+async def timing_middleware(request: Request, call_next):
+    profile = request.query_params.get("profile") in ("1", "true")
+    if profile:
+        denied = _profile_denied(request)
+        if denied is not None:
+            return denied
+        if not _profile_lock.acquire(blocking=False):
+            return PlainTextResponse("Another request is being profiled",
+                                     status_code=HTTPStatus.CONFLICT)
+
+    trace = Trace(profile=profile)
+    token = trace.activate()
+    profiler = cProfile.Profile() if profile else None
+    status = HTTPStatus.INTERNAL_SERVER_ERROR
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        response = await call_next(request)
+        status = response.status_code
+        if profiler is not None:
+            # run the whole handler, streamed bodies included, under the profiler
+            async for _ in response.body_iterator:
+                pass
+    finally:
+        total = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+        Trace.deactivate(token)
+        route = _route(request)
+        metrics.observe("http_request_seconds", total, method=request.method, route=route,
+                        status=int(status))
+        timing_logger.info(json.dumps({
+            "method": request.method,
+            "path": request.url.path,
+            "route": route,
+            "status": int(status),
+            "ms": round(total * 1000, 3),
+            "stages": {name: round(seconds * 1000, 3) for name, seconds, _ in trace.export()},
+            "profiled": profile,
+        }))
+
+    if profiler is not None:
+        response = PlainTextResponse(_profile_report(profiler, trace, status, total), status_code=status)
+    response.headers["Server-Timing"] = server_timing(trace, total)
+    return response
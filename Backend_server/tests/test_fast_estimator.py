@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from qiskit.circuit import Parameter, QuantumCircuit
+from qiskit.circuit.library import RealAmplitudes
+from qiskit.primitives import Estimator
+from qiskit.quantum_info import SparsePauliOp
+
+from quantum_optimizer.processing.fast_estimator import DiagonalStatevectorEstimator
+
+ISING = SparsePauliOp.from_list([("IIZ", 0.5), ("IZI", -1.2), ("ZZI", 0.7), ("ZIZ", 0.3), ("III", 2.0)])
+MIXED = SparsePauliOp.from_list([("IIZ", 0.5), ("XXI", -0.4), ("IYY", 0.2)])
+
+
+def _expression_ansatz():
+    a, b = Parameter("a"), Parameter("b")
+    qc = QuantumCircuit(3)
+    qc.ry(2 * a, 0)
+    qc.ry(a + b, 1)
+    qc.cx(0, 2)
+    return qc
+
+
+def _rx_ansatz():
+    a, b = Parameter("a"), Parameter("b")
+    qc = QuantumCircuit(3)
+    qc.rx(a, 0)
+    qc.h(1)
+    qc.ry(b, 2)
+    qc.cz(1, 2)
+    return qc
+
+
+CIRCUITS = {
+    "real_amplitudes": RealAmplitudes(3, reps=2),
+    "parameter_expressions": _expression_ansatz(),  # Statevector fallback
+    "rx": _rx_ansatz(),  # Statevector fallback
+}
+
+
+@pytest.mark.parametrize("observable", [ISING, MIXED], ids=["ising", "mixed"])
+@pytest.mark.parametrize("name", CIRCUITS)
+def test_matches_reference_estimator(name, observable):
+    circuit = CIRCUITS[name]
+    rng = np.random.default_rng(0)
+    values = rng.uniform(-np.pi, np.pi, size=(4, circuit.num_parameters))
+    batch = [circuit] * len(values), [observable] * len(values), values.tolist()
+
+    expected = Estimator().run(*batch).result().values
+    actual = DiagonalStatevectorEstimator().run(*batch).result().values
+    np.testing.assert_allclose(actual, expected, atol=1e-10)
@@ -0,0 +1,45 @@
+import copy
+
+from services.jobs import RUNNING, InMemoryJobStore, Job, JobManager, JobStore
+
+
+class CopyingJobStore(InMemoryJobStore):
+    """Hands out copies, like a store that serializes jobs (Redis, SQL)."""
+
+    def save(self, job):
+        super().save(copy.deepcopy(job))
+
+    def get(self, job_id):
+        return copy.deepcopy(super().get(job_id))
+
+    append_progress = JobStore.append_progress  # through get/save, as such a store would
+
+
+def test_progress_is_saved_by_a_store_that_returns_copies():
+    store = CopyingJobStore()
+    manager = JobManager(store, executor=None)
+    store.save(Job(id="job", request={}))
+
+    manager._on_event("job", "started", {})
+    for i in range(3):
+        manager._on_event("job", "progress", {"evaluation": i, "energy": -float(i)})
+
+    job = store.get("job")
+    assert job.status == RUNNING
+    assert [p["evaluation"] for p in job.progress] == [0, 1, 2]
+    assert job.to_dict()["energy"] == -2.0
+
+
+def test_progress_is_appended_in_place_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr("services.jobs.MAX_PROGRESS_POINTS", 3)
+    store = InMemoryJobStore()
+    manager = JobManager(store, executor=None)
+    job = Job(id="job", request={})
+    store.save(job)
+    points = job.progress
+
+    for i in range(5):
+        manager._on_event("job", "progress", {"evaluation": i, "energy": -float(i)})
+
+    assert store.get("job").progress is points
+    assert [p["evaluation"] for p in points] == [0, 1, 2]
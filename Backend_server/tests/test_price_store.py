@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantum_optimizer.preprocessing.price_store import PriceStore
+
+
+def _frame(dates, **columns):
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name="Date"))
+
+
+def test_upsert_merges_tickers_and_dates_and_new_prices_win(tmp_path):
+    store = PriceStore(tmp_path)
+    store.upsert(_frame(["2024-01-01", "2024-01-02"], A=[1.0, 2.0], B=[10.0, 20.0]))
+    # an intraday price for 01-02 is replaced by the close; NaN keeps the stored one
+    store.upsert(_frame(["2024-01-02", "2024-01-03"], A=[2.5, 3.0], C=[np.nan, 30.0]))
+
+    frame = store.frame()
+    assert list(frame.columns) == ["A", "B", "C"]
+    assert list(frame.index.strftime("%Y-%m-%d")) == [
+        "2024-01-01",
+        "2024-01-02",
+        "2024-01-03",
+    ]
+    np.testing.assert_array_equal(frame["A"], [1.0, 2.5, 3.0])
+    np.testing.assert_array_equal(frame["B"], [10.0, 20.0, np.nan])
+    np.testing.assert_array_equal(frame["C"], [np.nan, np.nan, 30.0])
+    assert store.last_dates()["B"] == pd.Timestamp("2024-01-02")
+
+    store.upsert(_frame(["2024-01-02"], B=[np.nan]))
+    assert store.frame()["B"].iloc[1] == 20.0
+
+
+def test_write_swaps_generation_and_sweeps_old_files(tmp_path):
+    store = PriceStore(tmp_path)
+    store.write(_frame(["2024-01-01"], A=[1.0]))
+    old = store.read()  # maps generation 1
+    store.write(_frame(["2024-01-01", "2024-01-02"], A=[1.0, 2.0]))
+
+    manifest = store.manifest()
+    assert manifest["generation"] == 2
+    assert manifest["last_date"] == "2024-01-02"
+    assert sorted(p.name for p in tmp_path.glob("*.npy")) == [
+        "dates-2.npy",
+        "prices-2.npy",
+    ]
+    assert not list(tmp_path.glob(".*"))  # no temporary files left behind
+    np.testing.assert_array_equal(old.values, [[1.0]])  # old mapping still readable
+    np.testing.assert_array_equal(store.read(["A"], start="2024-01-02").values, [[2.0]])
+
+
+def test_read_rejects_unknown_tickers(tmp_path):
+    store = PriceStore(tmp_path)
+    store.write(_frame(["2024-01-01"], A=[1.0]))
+    with pytest.raises(KeyError):
+        store.read(["A", "B"])
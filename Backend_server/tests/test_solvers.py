@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from quantum_optimizer.processing import solvers
+from quantum_optimizer.processing.solvers import solve_classical
+from quantum_optimizer.processing.vqe_portfolio import (
+    create_hamiltonian,
+    ising_coefficients,
+)
+
+
+def _problem(n, seed):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.001, 0.02, size=(250, n))
+    mu, cov = returns.mean(axis=0), np.cov(returns, rowvar=False)
+    fundamentals = {f"T{i}": {"PE": float(rng.uniform(5, 40))} for i in range(n)}
+    return mu, cov, fundamentals
+
+
+def _brute_force(offset, h, J):
+    """Lowest energy over every spin configuration, term by term."""
+    n = len(h)
+    best = None
+    for spins in itertools.product((1.0, -1.0), repeat=n):
+        energy = offset + sum(h[i] * spins[i] for i in range(n))
+        energy += sum(
+            J[i, j] * spins[i] * spins[j] for i in range(n) for j in range(i + 1, n)
+        )
+        best = energy if best is None else min(best, energy)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("solver", ["exact", "annealing"])
+def test_solver_matches_brute_force(solver, seed):
+    mu, cov, fundamentals = _problem(7, seed)
+    offset, h, J = ising_coefficients(mu, cov, fundamentals, 0.5, 3)
+
+    weights, result = solve_classical(offset, h, J, solver=solver, seed=seed)
+
+    assert result.eigenvalue == pytest.approx(_brute_force(offset, h, J), abs=1e-12)
+    assert weights.sum() == pytest.approx(1.0)
+    if not result.empty_selection:
+        np.testing.assert_array_equal(weights > 0, result.selection)
+
+
+def test_exact_energy_is_the_hamiltonian_ground_state(monkeypatch):
+    monkeypatch.setattr(solvers, "EXACT_CHUNK", 8)  # several chunks for 2^6 states
+    mu, cov, fundamentals = _problem(6, 11)
+    hamiltonian = create_hamiltonian(mu, cov, fundamentals, 0.5, 2)
+    diagonal = np.real(np.diag(hamiltonian.to_matrix()))
+
+    _, result = solve_classical(*ising_coefficients(mu, cov, fundamentals, 0.5, 2))
+
+    assert result.solver == "exact"
+    assert result.eigenvalue == pytest.approx(diagonal.min(), abs=1e-12)
+    # character i of the bitstring is asset i, which sits at label position i
+    assert diagonal[int(result.bitstring, 2)] == pytest.approx(result.eigenvalue)
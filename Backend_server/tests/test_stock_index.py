@@ -0,0 +1,18 @@
+import pytest
+
+from services.stock_index import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("offset", [0, 1, 50, 10**9])
+def test_cursor_round_trip(offset):
+    cursor = encode_cursor(offset)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == offset
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "not a cursor", "%%%", encode_cursor(-1), "eDo1"]  # "eDo1": b"x:5"
+)
+def test_foreign_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)